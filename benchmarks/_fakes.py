@@ -0,0 +1,86 @@
+"""Tiny stand-ins for the bot and the asyncpg pool, so benchmarks can count database round trips."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import os
+import sys
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database.statements import STATEMENTS  # noqa: E402
+
+Handler = Callable[[str, str, tuple[Any, ...]], Any]
+
+
+class FakePreparedStatement:
+    def __init__(self, connection: FakeConnection, query: str) -> None:
+        self.connection = connection
+        self.query = query
+
+    async def fetch(self, *args: Any) -> Any:
+        return await self.connection.fetch(self.query, *args)
+
+    async def fetchrow(self, *args: Any) -> Any:
+        return await self.connection.fetchrow(self.query, *args)
+
+    async def fetchval(self, *args: Any) -> Any:
+        return await self.connection.fetchval(self.query, *args)
+
+
+class FakeConnection:
+    def __init__(self, handler: Handler, latency: float, counter: collections.Counter[str]) -> None:
+        self.handler = handler
+        self.latency = latency
+        self.counter = counter
+
+    async def _call(self, method: str, query: str, args: tuple[Any, ...]) -> Any:
+        self.counter[method] += 1
+        self.counter["round_trips"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.handler(method, query, args)
+
+    async def fetch(self, query: str, *args: Any) -> Any:
+        return await self._call("fetch", query, args)
+
+    async def fetchrow(self, query: str, *args: Any) -> Any:
+        return await self._call("fetchrow", query, args)
+
+    async def fetchval(self, query: str, *args: Any) -> Any:
+        return await self._call("fetchval", query, args)
+
+    async def execute(self, query: str, *args: Any) -> Any:
+        return await self._call("execute", query, args)
+
+    async def prepared(self, name: str) -> FakePreparedStatement:
+        # statements are prepared when the connection is opened, so this costs no round trip
+        return FakePreparedStatement(self, STATEMENTS[name])
+
+
+class FakeConnectionContext:
+    def __init__(self, bot: FakeBot) -> None:
+        self.bot = bot
+
+    async def __aenter__(self) -> FakeConnection:
+        self.bot.counter["acquires"] += 1
+        return self.bot.connection
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+
+class FakeBot:
+    """Implements just enough of :class:`core.Dwello` for the ORM."""
+
+    def __init__(self, handler: Handler, *, latency: float = 0.0005) -> None:
+        self.counter: collections.Counter[str] = collections.Counter()
+        self.connection = FakeConnection(handler, latency, self.counter)
+
+    def safe_connection(self, **kwargs: Any) -> FakeConnectionContext:
+        return FakeConnectionContext(self)
+
+    def reset(self) -> None:
+        self.counter.clear()
@@ -0,0 +1,164 @@
+"""
+Replays synthetic guild traffic through :class:`SpamChecker`, next to the previous CooldownMapping-based version,
+and reports the per-message cost and the memory the checkers hold afterwards. The current checker flags
+more messages on the same traffic since its windows slide instead of resetting (see :class:`SpamChecker`).
+
+Usage: python benchmarks/antispam.py [messages] (default: 1000000)
+"""
+
+from __future__ import annotations
+
+import datetime
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from discord.ext import commands
+
+from utils.antispam import SpamChecker, SpamEngine
+
+GUILDS = 200
+CHANNELS = 10
+MEMBERS = 500
+MESSAGES_PER_SECOND = 150.0
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+YEAR_AGO = NOW - datetime.timedelta(days=365)
+MONTH_AGO = NOW - datetime.timedelta(days=30)
+DAY_AGO = NOW - datetime.timedelta(days=1)
+
+
+class CooldownByContent(commands.CooldownMapping):
+    def _bucket_key(self, message: Any) -> tuple[int, str]:
+        return (message.channel.id, message.content)
+
+
+class PreviousSpamChecker:
+    # the implementation this replaced, except that buckets are verified against the replay clock
+    # (instead of time.time()) so idle ones are dropped the way they would be in real time
+
+    def __init__(self) -> None:
+        self.by_content = CooldownByContent.from_cooldown(15, 17.0, commands.BucketType.member)
+        self.by_user = commands.CooldownMapping.from_cooldown(10, 12.0, commands.BucketType.user)
+        self.new_user = commands.CooldownMapping.from_cooldown(30, 35.0, commands.BucketType.channel)
+        self.by_mentions = commands.CooldownMapping.from_cooldown(10, 12, commands.BucketType.member)
+        self.fast_joiners: set[int] = set()
+        self.hit_and_run = commands.CooldownMapping.from_cooldown(10, 12, commands.BucketType.channel)
+
+    def is_spamming(self, message: Any, current: float) -> bool:
+        if message.author.id in self.fast_joiners:
+            bucket = self.hit_and_run.get_bucket(message, current)
+            if bucket and bucket.update_rate_limit(current):
+                return True
+
+        if SpamChecker.is_new(self, message.author):  # type: ignore
+            new_bucket = self.new_user.get_bucket(message, current)
+            if new_bucket and new_bucket.update_rate_limit(current):
+                return True
+
+        user_bucket = self.by_user.get_bucket(message, current)
+        if user_bucket and user_bucket.update_rate_limit(current):
+            return True
+
+        content_bucket = self.by_content.get_bucket(message, current)
+        return bool(content_bucket and content_bucket.update_rate_limit(current))
+
+    def is_mention_spam(self, message: Any, current: float) -> bool:
+        bucket = self.by_mentions.get_bucket(message, current)
+        count = sum(not m.bot and m.id != message.author.id for m in message.mentions)
+        return bucket is not None and bucket.update_rate_limit(current, tokens=count) is not None
+
+
+def synthetic_messages(amount: int, seed: int = 0) -> list[tuple[float, Any]]:
+    rng = random.Random(seed)
+    guilds = [SimpleNamespace(id=guild_id) for guild_id in range(1, GUILDS + 1)]
+    members = {
+        guild.id: [
+            # every 20th member is new: their account is a month old and they joined yesterday
+            SimpleNamespace(
+                id=guild.id * 10_000 + i,
+                bot=False,
+                created_at=MONTH_AGO if i % 20 == 0 else YEAR_AGO,
+                joined_at=DAY_AGO if i % 20 == 0 else YEAR_AGO,
+            )
+            for i in range(MEMBERS)
+        ]
+        for guild in guilds
+    }
+    words = [f"message {i}" for i in range(5_000)]
+
+    messages = []
+    now = 0.0
+    for _ in range(amount):
+        now += rng.expovariate(MESSAGES_PER_SECOND)
+        guild = guilds[min(int(rng.paretovariate(1.2)) - 1, GUILDS - 1)]  # a few busy guilds, many quiet ones
+        author = rng.choice(members[guild.id])
+        spam = rng.random() < 0.02
+        messages.append(
+            (
+                now,
+                SimpleNamespace(
+                    guild=guild,
+                    channel=SimpleNamespace(id=guild.id * 100 + rng.randrange(CHANNELS)),
+                    author=author,
+                    content="buy cheap nitro" if spam else rng.choice(words),
+                    mentions=rng.sample(members[guild.id], 4) if spam else [],
+                ),
+            )
+        )
+    return messages
+
+
+def replay_previous(messages: list[tuple[float, Any]]) -> tuple[float, int, dict[int, Any]]:
+    checkers: defaultdict[int, PreviousSpamChecker] = defaultdict(PreviousSpamChecker)
+    flagged = 0
+    start = time.perf_counter()
+    for current, message in messages:
+        checker = checkers[message.guild.id]
+        flagged += checker.is_spamming(message, current) or checker.is_mention_spam(message, current)
+    return time.perf_counter() - start, flagged, checkers
+
+
+def replay_current(messages: list[tuple[float, Any]]) -> tuple[float, int, dict[int, Any]]:
+    clock = [0.0]
+    engine = SpamEngine(clock=lambda: clock[0])
+    checkers: defaultdict[int, SpamChecker] = defaultdict(lambda: SpamChecker(engine))
+    flagged = 0
+    start = time.perf_counter()
+    for current, message in messages:
+        clock[0] = current
+        checker = checkers[message.guild.id]
+        flagged += checker.is_spamming(message) or checker.is_mention_spam(message)
+    return time.perf_counter() - start, flagged, checkers
+
+
+def retained(replay: Any, messages: list[tuple[float, Any]]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _, _, checkers = replay(messages)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del checkers
+    return current
+
+
+if __name__ == "__main__":
+    amount = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    messages = synthetic_messages(amount)
+    print(f"{amount} messages over {messages[-1][0]:.0f}s of synthetic time, {GUILDS} guilds\n")
+
+    print(f"{'':>10} | {'per message':>12} | {'flagged':>8} | {'memory':>10}")
+    for name, replay in (("previous", replay_previous), ("current", replay_current)):
+        elapsed, flagged, _ = replay(messages)
+        memory = retained(replay, messages)
+        print(f"{name:>10} | {elapsed / amount * 1e6:9.2f} µs | {flagged:>8} | {memory / 1024:7.0f} KiB")
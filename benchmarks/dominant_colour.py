@@ -0,0 +1,152 @@
+"""
+Event loop blocking of avatar dominant colours: ``stats``-like calls for a set of users, where most users
+come back more than once, while a probe measures how late the loop wakes it up.
+
+Compares the previous function (downloads the full avatar and decodes and counts it on the loop) with
+:meth:`CardRenderer.dominant_colour` (a 64x64 avatar, quantized with NumPy in a thread and cached by url).
+Downloads are faked with a fixed latency.
+
+Usage: python benchmarks/dominant_colour.py [calls] (default: 2000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+import time
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+import discord
+from PIL import Image
+
+from utils.cards import CardRenderer
+
+DOWNLOAD_LATENCY = 0.02
+USERS = 200
+FULL_SIZE = 1024
+
+
+def synthetic_avatar(seed: int, size: int) -> bytes:
+    # a noisy gradient, so it has as many colours as a photo would
+    rng = random.Random(seed)
+    image = Image.linear_gradient("L").resize((size, size)).convert("RGB")
+    image = Image.blend(image, Image.effect_noise((size, size), 64).convert("RGB"), 0.5)
+    image = Image.blend(image, Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3))), 0.5)
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    async def __aenter__(self) -> FakeResponse:
+        await asyncio.sleep(DOWNLOAD_LATENCY)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        return None
+
+    async def read(self) -> bytes:
+        return self.data
+
+
+class FakeSession:
+    def __init__(self, avatars: dict[str, bytes]) -> None:
+        self.avatars = avatars
+        self.downloads = 0
+
+    def get(self, url: str) -> FakeResponse:
+        self.downloads += 1
+        return FakeResponse(self.avatars[url])
+
+
+class FakeAsset:
+    def __init__(self, user_id: int) -> None:
+        self.user_id = user_id
+        self.size = FULL_SIZE
+
+    def replace(self, *, format: str, size: int) -> FakeAsset:
+        asset = FakeAsset(self.user_id)
+        asset.size = size
+        return asset
+
+    @property
+    def url(self) -> str:
+        return f"https://cdn.discordapp.com/avatars/{self.user_id}/hash.png?size={self.size}"
+
+
+async def previous_dominant_colour(user: Any, session: FakeSession) -> discord.Colour | None:
+    # the implementation this replaced, reading the avatar through the fake session
+    async with session.get(user.display_avatar.url) as response:
+        image = Image.open(BytesIO(await response.read()))
+    colours = [
+        colour
+        for colour in sorted(image.getcolors(image.size[0] * image.size[1]), key=lambda c: c[0], reverse=True)
+        if not isinstance(colour[1], tuple) or len(colour[1]) < 4 or colour[1][3] != 0
+    ]
+    r, g, b = colours[0][1][:3]
+    return discord.Colour.from_rgb(r, g, b)
+
+
+async def probe(lateness: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lateness.append(max(time.perf_counter() - start - 0.001, 0.0))
+
+
+async def measure(calls: list[Any], func: Callable[[Any], Awaitable[Any]]) -> tuple[float, float, float]:
+    lateness: list[float] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(lateness, stop))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    # a few concurrent commands at a time
+    for i in range(0, len(calls), 8):
+        await asyncio.gather(*(func(user) for user in calls[i : i + 8]))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await task
+    return elapsed, sum(lateness), max(lateness)
+
+
+async def main(amount: int) -> None:
+    rng = random.Random(0)
+    users = [SimpleNamespace(id=i, display_avatar=FakeAsset(i)) for i in range(USERS)]
+    avatars: dict[str, bytes] = {}
+    for user in users:
+        avatars[user.display_avatar.url] = synthetic_avatar(user.id, FULL_SIZE)
+        small = user.display_avatar.replace(format="png", size=CardRenderer.COLOUR_AVATAR_SIZE)
+        avatars[small.url] = synthetic_avatar(user.id, CardRenderer.COLOUR_AVATAR_SIZE)
+    calls = [users[min(int(rng.paretovariate(1.0)) - 1, USERS - 1)] for _ in range(amount)]
+
+    print(f"{amount} calls for {len(set(map(id, calls)))} distinct users\n")
+    print(f"{'':>10} | {'total':>8} | {'loop blocked':>12} | {'longest block':>13} | {'downloads':>9}")
+
+    previous_session, session = FakeSession(avatars), FakeSession(avatars)
+    renderer = CardRenderer(SimpleNamespace(http_session=session))  # type: ignore
+    for name, func, fake_session in (
+        ("previous", lambda user: previous_dominant_colour(user, previous_session), previous_session),
+        ("current", renderer.dominant_colour, session),
+    ):
+        elapsed, blocked, longest = await measure(calls, func)
+        print(
+            f"{name:>10} | {elapsed:6.2f} s | {blocked * 1000:9.1f} ms | {longest * 1000:10.1f} ms"
+            f" | {fake_session.downloads:>9}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
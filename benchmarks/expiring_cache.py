@@ -0,0 +1,48 @@
+"""
+Lookup cost of :class:`ExpiringCache` as the amount of entries grows, next to the previous dict-scanning version.
+
+Usage: python benchmarks/expiring_cache.py
+"""
+
+from __future__ import annotations
+
+import time
+import timeit
+from typing import Any
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from utils.cache import ExpiringCache
+
+
+class PreviousExpiringCache(dict):
+    # the implementation this replaced: every lookup scanned every entry
+    def __init__(self, seconds: float) -> None:
+        self.ttl = seconds
+        super().__init__()
+
+    def _verify(self) -> None:
+        now = time.monotonic()
+        for k in [k for (k, (_, t)) in self.items() if now > (t + self.ttl)]:
+            del self[k]
+
+    def __contains__(self, key: Any) -> bool:
+        self._verify()
+        return super().__contains__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, (value, time.monotonic()))
+
+
+def per_lookup(cache: Any, size: int, number: int) -> float:
+    for i in range(size):
+        cache[i] = True
+    return timeit.timeit(lambda: size // 2 in cache, number=number) / number
+
+
+if __name__ == "__main__":
+    print(f"{'entries':>8} | {'previous':>12} | {'current':>12}")
+    for size in (100, 1_000, 10_000, 100_000):
+        previous = per_lookup(PreviousExpiringCache(600), size, max(10, 100_000 // size))
+        current = per_lookup(ExpiringCache(600, maxsize=size), size, 100_000)
+        print(f"{size:>8} | {previous * 1e6:9.2f} µs | {current * 1e6:9.3f} µs")
@@ -0,0 +1,75 @@
+"""
+Resizes a synthetic 300-frame GIF with the previous ``resize_gif`` (every resized frame kept in a list before
+saving) and with :class:`ImageResizer` (frames resized while they're encoded, into a budgeted buffer),
+each in a fresh process, and reports the latency and the peak RSS of that process.
+
+Usage: python benchmarks/gif_resize.py [frames] [size] (default: 300 640)
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import resource
+import sys
+import time
+from io import BytesIO
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from PIL import Image, ImageDraw, ImageSequence
+
+from utils.pillow import ImageResizer
+
+OUTPUT_SIZE = (500, 500)
+
+
+def synthetic_gif(frames: int, size: int) -> bytes:
+    images = []
+    for i in range(frames):
+        image = Image.effect_noise((size, size), 40 + i % 20).convert("RGB")
+        ImageDraw.Draw(image).ellipse((i % size, i % size, i % size + size // 4, i % size + size // 4), fill=(255, 0, 0))
+        images.append(image)
+    buffer = BytesIO()
+    images[0].save(buffer, save_all=True, append_images=images[1:], loop=0, duration=40, format="GIF")
+    return buffer.getvalue()
+
+
+def previous_resize(data: bytes) -> int:
+    # the implementation this replaced
+    im = Image.open(BytesIO(data))
+    frames = (frame.resize(OUTPUT_SIZE) for frame in ImageSequence.Iterator(im))
+    om = next(frames)
+    om.info = im.info
+    buffer = BytesIO()
+    om.save(buffer, save_all=True, append_images=list(frames), loop=0, disposal=2, format="GIF")
+    return len(buffer.getvalue())
+
+
+def current_resize(data: bytes) -> int:
+    resizer = ImageResizer(max_output_bytes=100 * 1024 * 1024)
+    return len(resizer.resize(BytesIO(data), OUTPUT_SIZE, ".gif").getvalue())
+
+
+def run(name: str, data: bytes) -> tuple[float, int, int]:
+    func = previous_resize if name == "previous" else current_resize
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    output = func(data)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, peak - before, output
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 640
+    data = synthetic_gif(frames, size)
+    print(f"{frames} frames of {size}x{size} ({len(data) / 1024 / 1024:.1f} MiB) resized to {OUTPUT_SIZE}\n")
+
+    print(f"{'':>10} | {'latency':>9} | {'peak RSS growth':>15} | {'output':>9}")
+    context = multiprocessing.get_context("spawn")
+    for name in ("previous", "current"):
+        with context.Pool(1) as pool:
+            elapsed, growth, output = pool.apply(run, (name, data))
+        # ru_maxrss is in KiB on Linux
+        print(f"{name:>10} | {elapsed * 1000:6.0f} ms | {growth / 1024:11.1f} MiB | {output / 1024 / 1024:5.1f} MiB")
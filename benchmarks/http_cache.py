@@ -0,0 +1,138 @@
+"""
+Replays popular (Zipf-distributed) scraping lookups through :class:`HTTPCache` against a fake API session
+with a fixed latency, next to calling the session directly, and reports the requests that reached the APIs,
+the total time and the hit rate of every endpoint. Queries are typed with random casing and spacing,
+which the normalized keys of casefolding endpoints fold together.
+
+Usage: python benchmarks/http_cache.py [lookups] (default: 5000)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import json
+import random
+import sys
+import tempfile
+import time
+from typing import Any
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from utils.http_cache import HTTPCache
+
+LATENCY = 0.05
+CONCURRENCY = 20
+ENDPOINTS = {
+    # name: (url, ttl, query parameter)
+    "tmdb": ("https://api.themoviedb.org/3/search/movie", 3600.0, "query"),
+    "weather": ("http://api.openweathermap.org/data/2.5/weather", 600.0, "q"),
+    "urban": ("http://api.urbandictionary.com/v0/define", 3600.0, "term"),
+}
+
+
+class FakeResponse:
+    def __init__(self, body: bytes) -> None:
+        self.status = 200
+        self.reason = "OK"
+        self.content_type = "application/json"
+        self.body = body
+
+    async def __aenter__(self) -> FakeResponse:
+        await asyncio.sleep(LATENCY)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    async def read(self) -> bytes:
+        return self.body
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.requests: collections.Counter[str] = collections.Counter()
+
+    def request(self, method: str, url: str, **kwargs: Any) -> FakeResponse:
+        self.requests[url] += 1
+        return FakeResponse(json.dumps({"results": [{"title": "x" * 200}] * 20, "params": kwargs["params"]}).encode())
+
+
+def lookups(amount: int, seed: int = 0) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    names = list(ENDPOINTS)
+    result = []
+    for _ in range(amount):
+        query = f"popular query {min(int(rng.paretovariate(1.1)), 2000)}"
+        # people type the same thing differently
+        query = "".join(c.upper() if rng.random() < 0.1 else c for c in query)
+        result.append((rng.choice(names), f" {query} " if rng.random() < 0.2 else query))
+    return result
+
+
+async def replay(calls: list[tuple[str, str]], fetch: Any) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def call(name: str, query: str) -> None:
+        async with semaphore:
+            await fetch(name, query)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(name, query) for name, query in calls))
+    return time.perf_counter() - start
+
+
+async def main(amount: int) -> None:
+    calls = lookups(amount)
+    print(f"{amount} lookups, {len(set(calls))} distinct spellings, {CONCURRENCY} at a time\n")
+
+    session = FakeSession()
+
+    async def uncached(name: str, query: str) -> None:
+        url, _, parameter = ENDPOINTS[name]
+        async with session.request("GET", url, params={parameter: query}) as response:
+            json.loads(await response.read())
+
+    elapsed = await replay(calls, uncached)
+    print(f"{'uncached':>10}: {sum(session.requests.values()):>6} api requests in {elapsed:6.2f} s")
+
+    with tempfile.TemporaryDirectory() as path:
+        session = FakeSession()
+        http_cache = HTTPCache(session, path=path)  # type: ignore
+        for name, (_, ttl, _) in ENDPOINTS.items():
+            http_cache.add_endpoint(name, ttl, casefold=True)
+
+        async def cached(name: str, query: str) -> None:
+            url, _, parameter = ENDPOINTS[name]
+            (await http_cache.get(name, url, params={parameter: query})).json()
+
+        elapsed = await replay(calls, cached)
+        print(f"{'cached':>10}: {sum(session.requests.values()):>6} api requests in {elapsed:6.2f} s")
+        print(f"{'':>10}  {len(http_cache)} responses, {http_cache.bytes / 1024:.0f} KiB in memory\n")
+
+        for name, endpoint in http_cache.endpoints.items():
+            stats = endpoint.stats
+            print(
+                f"{name:>10}: {stats.hit_rate:6.1%} hit rate | {stats.hits} memory, {stats.coalesced} coalesced,"
+                f" {stats.disk_hits} disk, {stats.misses} misses"
+            )
+
+        # a restarted bot starts with an empty memory cache, but the responses are still on disk
+        await asyncio.gather(*http_cache._writes)
+        restarted = HTTPCache(session, path=path)  # type: ignore
+        for name, (_, ttl, _) in ENDPOINTS.items():
+            restarted.add_endpoint(name, ttl, casefold=True)
+        before = sum(session.requests.values())
+
+        async def after_restart(name: str, query: str) -> None:
+            url, _, parameter = ENDPOINTS[name]
+            await restarted.get(name, url, params={parameter: query})
+
+        elapsed = await replay(calls, after_restart)
+        requests = sum(session.requests.values()) - before
+        print(f"\n{'restarted':>10}: {requests:>6} api requests in {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,65 @@
+"""
+Pages through a :class:`PageSource` whose pages take a fixed latency to render (like fetching a message or a user),
+next to building every page up front like list paginators do, and reports how long the first page and each
+click on the next button wait, with and without the next page rendered ahead while the current one is read.
+
+Usage: python benchmarks/lazy_pages.py [pages] (default: 10)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from core import Embed
+from utils.paginator import PageSource
+
+LATENCY = 0.1
+# time spent reading a page before clicking next
+READING = 0.3
+
+
+async def render(index: int) -> Embed:
+    await asyncio.sleep(LATENCY)
+    return Embed(title=f"Page {index + 1}")
+
+
+async def eager(pages: int) -> tuple[float, float]:
+    start = time.perf_counter()
+    embeds = [await render(i) for i in range(pages)]
+    first = time.perf_counter() - start
+    assert len(embeds) == pages
+    return first, 0.0
+
+
+async def lazy(pages: int, prefetch: bool) -> tuple[float, float]:
+    source = PageSource(render, pages)
+    start = time.perf_counter()
+    await source.get_page(0)
+    first = time.perf_counter() - start
+
+    waited = 0.0
+    for index in range(1, pages):
+        if prefetch:
+            source.prefetch(index)
+        await asyncio.sleep(READING)
+        start = time.perf_counter()
+        await source.get_page(index)
+        waited += time.perf_counter() - start
+    return first, waited / (pages - 1)
+
+
+async def main(pages: int) -> None:
+    print(f"{pages} pages, {LATENCY * 1000:.0f} ms to render one, {READING * 1000:.0f} ms spent on each\n")
+
+    runs = (("eager", eager(pages)), ("lazy", lazy(pages, False)), ("prefetched", lazy(pages, True)))
+    for name, run in runs:
+        first, click = await run
+        print(f"{name:>10}: first page {first * 1000:7.1f} ms | next page {click * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,150 @@
+"""
+Load test of the antispam stage during a raid: 200 fresh accounts flood a mocked guild.
+
+Compares awaiting every ban inline in the message handler (the previous behaviour) with the guild's
+:class:`BanExecutor` worker, once with single bans and once with the bulk ban endpoint, all against
+a fake HTTP client. A few of the accounts can't be banned, to show that their failures end up in one report.
+Reports how long the messages took to get through the stage, the amount of ban requests, how long until
+every spammer was banned and the amount of report messages sent.
+
+Usage: python benchmarks/raid.py [accounts] (default: 200)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any
+from unittest import mock
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+import discord
+
+from cogs.moderation.automod import AutoMod
+from utils import SpamChecker
+
+BAN_LATENCY = 0.05
+BULK_BAN_LATENCY = 0.25
+MESSAGES_PER_ACCOUNT = 12
+UNBANNABLE = 5
+
+
+class FakeHTTPClient:
+    def __init__(self, unbannable: set[int]) -> None:
+        self.unbannable = unbannable
+        self.requests: list[str] = []
+        self.banned: set[int] = set()
+        self.failed: set[int] = set()
+        # set once `expected` accounts were banned or failed to be
+        self.expected = 0
+        self.all_handled = asyncio.Event()
+
+    def _handled(self, banned: list[int], failed: list[int]) -> None:
+        self.banned.update(banned)
+        self.failed.update(failed)
+        if len(self.banned) + len(self.failed) >= self.expected:
+            self.all_handled.set()
+
+    def _forbidden(self) -> discord.Forbidden:
+        return discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+
+    async def ban(
+        self, user_id: int, guild_id: int, delete_message_seconds: int = 86400, reason: str | None = None,
+    ) -> None:
+        self.requests.append("ban")
+        await asyncio.sleep(BAN_LATENCY)
+        if user_id in self.unbannable:
+            self._handled([], [user_id])
+            raise self._forbidden()
+        self._handled([user_id], [])
+
+
+class FakeBulkHTTPClient(FakeHTTPClient):
+    async def bulk_ban(
+        self, guild_id: int, user_ids: list[int], delete_message_seconds: int = 86400, reason: str | None = None,
+    ) -> dict[str, list[str]]:
+        self.requests.append("bulk_ban")
+        await asyncio.sleep(BULK_BAN_LATENCY)
+        failed = [user_id for user_id in user_ids if user_id in self.unbannable]
+        banned = [user_id for user_id in user_ids if user_id not in self.unbannable]
+        self._handled(banned, failed)
+        return {"banned_users": list(map(str, banned)), "failed_users": list(map(str, failed))}
+
+
+class InlineAutoMod(AutoMod):
+    async def auto_ban(self, checker: SpamChecker, member: discord.Member, message: discord.Message, reason: str) -> None:
+        try:
+            await self.bot.http.ban(member.id, member.guild.id, reason=reason)
+        except discord.HTTPException:
+            await message.channel.send(f"Failed to ban {member}")
+
+
+class FakeContext:
+    def __init__(self, message: Any, _guild: Any) -> None:
+        self.message = message
+        self._guild = _guild
+
+    async def get_guild(self) -> Any:
+        return self._guild
+
+
+def mocked_member(guild: Any, member_id: int) -> Any:
+    now = discord.utils.utcnow()
+    member = mock.Mock(spec=discord.Member)
+    member.id = member_id
+    member.bot = False
+    member.guild = guild
+    member.created_at = now - datetime.timedelta(days=1)
+    member.joined_at = now - datetime.timedelta(minutes=1)
+    return member
+
+
+async def run(cog_cls: type[AutoMod], http: FakeHTTPClient, accounts: int) -> tuple[float, int, float, int]:
+    guild = mock.Mock(spec=discord.Guild, id=1, owner_id=2)
+    _guild = SimpleNamespace(id=guild.id, antispam=True, antispam_mention_count=5)
+    channel = mock.Mock(spec=discord.TextChannel, id=10)
+    channel.send = mock.AsyncMock()
+
+    bot = SimpleNamespace(user=SimpleNamespace(id=3), http=http)
+    cog = cog_cls(bot)  # type: ignore
+
+    members = [mocked_member(guild, 1000 + i) for i in range(accounts)]
+    messages = [
+        SimpleNamespace(id=i, guild=guild, channel=channel, author=member, content=f"raid {i}", mentions=[])
+        for i in range(MESSAGES_PER_ACCOUNT)
+        for member in members
+    ]
+
+    http.expected = accounts
+    start = time.perf_counter()
+    for message in messages:
+        if message.author.id in http.banned:  # banned members can't send messages anymore
+            continue
+        await cog.antispam_stage(FakeContext(message, _guild))  # type: ignore
+    handled = time.perf_counter() - start
+
+    await cog.bans.close()
+    await http.all_handled.wait()
+    done = time.perf_counter() - start
+    return handled, len(http.requests), done, channel.send.await_count
+
+
+async def main(accounts: int) -> None:
+    unbannable = set(range(1000, 1000 + UNBANNABLE))
+    print(f"{accounts} accounts ({UNBANNABLE} unbannable), {MESSAGES_PER_ACCOUNT} messages each\n")
+    print(f"{'':>14} | {'handler time':>12} | {'requests':>8} | {'all handled after':>17} | {'reports':>7}")
+    for name, cog_cls, http in (
+        ("inline", InlineAutoMod, FakeHTTPClient(unbannable)),
+        ("worker, single", AutoMod, FakeHTTPClient(unbannable)),
+        ("worker, bulk", AutoMod, FakeBulkHTTPClient(unbannable)),
+    ):
+        handled, requests, done, reports = await run(cog_cls, http, accounts)
+        print(f"{name:>14} | {handled:10.2f} s | {requests:>8} | {done:15.2f} s | {reports:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
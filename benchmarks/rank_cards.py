@@ -0,0 +1,65 @@
+"""
+Rank card render throughput: rendering on the event loop, one card after another (how the old commands did it),
+next to :class:`CardRenderer`'s process pool with a growing amount of workers and concurrent renders.
+
+Usage: python benchmarks/rank_cards.py [cards] (default: 200)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from io import BytesIO
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from PIL import Image
+
+# the font is loaded relative to the repository
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cards import CardRenderer, render_rank_card  # noqa: E402
+
+
+def synthetic_avatar(seed: int) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (256, 256), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def card_args(i: int, avatars: list[bytes]) -> tuple:
+    return (avatars[i % len(avatars)], f"member {i}", i + 1, i % 50 + 1, i * 7 % 500, 500, (88, 101, 242))
+
+
+async def on_loop(cards: int, avatars: list[bytes]) -> float:
+    start = time.perf_counter()
+    for i in range(cards):
+        render_rank_card(*card_args(i, avatars))
+    return time.perf_counter() - start
+
+
+async def pooled(cards: int, avatars: list[bytes], workers: int) -> float:
+    renderer = CardRenderer(None, workers=workers)  # type: ignore  # the bot is only needed to fetch avatars
+    await renderer.render(render_rank_card, *card_args(0, avatars))  # start the processes
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(renderer.render(render_rank_card, *card_args(i, avatars)) for i in range(cards)))
+        return time.perf_counter() - start
+    finally:
+        renderer.close()
+
+
+async def main(cards: int) -> None:
+    avatars = [synthetic_avatar(i) for i in range(20)]
+    print(f"{cards} rank cards\n")
+    elapsed = await on_loop(cards, avatars)
+    print(f"{'on the loop':>16}: {cards / elapsed:7.1f} cards/s | loop blocked {elapsed * 1000:8.1f} ms")
+    for workers in (1, 2, 4):
+        elapsed = await pooled(cards, avatars, workers)
+        print(f"{f'{workers} worker(s)':>16}: {cards / elapsed:7.1f} cards/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,48 @@
+"""
+Rank lookups, xp updates and top 10 queries of :class:`RankIndex` at 100k and 1M users,
+next to counting every user with more xp (what ``user.rank`` made postgres do for every lookup).
+
+Usage: python benchmarks/ranks.py
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import timeit
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from utils.database.ranks import RankIndex
+
+
+def per_call(func, number: int) -> float:
+    return timeit.timeit(func, number=number) / number
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    print(f"{'users':>9} | {'build':>9} | {'scan rank':>11} | {'index rank':>11} | {'update':>9} | {'top 10':>9}")
+    for size in (100_000, 1_000_000):
+        total_xp = {user_id: int(rng.paretovariate(1.1) * 100) for user_id in range(10**17, 10**17 + size)}
+        ids = list(total_xp)
+
+        index = RankIndex(None)  # type: ignore  # the bot is only needed to reconcile
+        start = time.perf_counter()
+        index.load(dict(total_xp))
+        build = time.perf_counter() - start
+
+        values = list(total_xp.values())
+        scan = per_call(lambda: sum(1 for xp in values if xp > values[size // 2]) + 1, 5)
+        rank = per_call(lambda: index.get_rank(rng.choice(ids)), 100_000)
+
+        def update() -> None:
+            user_id = rng.choice(ids)
+            index.update(user_id, index._total_xp[user_id] + 5)
+
+        updated = per_call(update, 100_000)
+        top = per_call(lambda: index.top(10), 100_000)
+        print(
+            f"{size:>9} | {build:7.2f} s | {scan * 1e3:8.2f} ms | {rank * 1e6:8.2f} µs "
+            f"| {updated * 1e6:6.2f} µs | {top * 1e6:6.2f} µs"
+        )
@@ -0,0 +1,103 @@
+"""
+Times the follow-up requests of the ``artist`` command (albums and top tracks of every search result) against
+a fake Spotify API with a fixed latency: awaited one after another like the command used to, and started at once
+through :class:`SpotifyFetcher`, where the first page only waits for its own requests. A repeated search is
+served from the fetcher's cache.
+
+Usage: python benchmarks/spotify_followups.py [results] (default: 5)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from typing import Any
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from utils.spotify import SpotifyFetcher
+from utils.tokens import TokenManager
+
+LATENCY = 0.15
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    async def __aenter__(self) -> FakeResponse:
+        await asyncio.sleep(LATENCY)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        return None
+
+    async def json(self) -> dict[str, Any]:
+        return {"items": [], "tracks": []}
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.requests = 0
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.requests += 1
+        return FakeResponse(url)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.http_session = FakeSession()
+        self.tokens = TokenManager(self.http_session)  # type: ignore
+
+        async def fetch(session: Any) -> tuple[str, float]:
+            return "token", 3600.0
+
+        self.tokens.add_provider("spotify", fetch)
+
+
+async def sequential(fetcher: SpotifyFetcher, ids: list[str]) -> tuple[float, float]:
+    start = time.perf_counter()
+    first = 0.0
+    for i, _id in enumerate(ids):
+        await fetcher.get(f"/artists/{_id}/albums", include_groups="album", market="US", limit=5)
+        await fetcher.get(f"/artists/{_id}/top-tracks", market="US")
+        if i == 0:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def concurrent(fetcher: SpotifyFetcher, ids: list[str]) -> tuple[float, float]:
+    start = time.perf_counter()
+    tasks = [task for _id in ids for task in (fetcher.artist_albums(_id), fetcher.artist_top_tracks(_id))]
+    await asyncio.gather(*tasks[:2])
+    first = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    return first, time.perf_counter() - start
+
+
+async def main(results: int) -> None:
+    ids = [f"artist{i}" for i in range(results)]
+    print(f"{results} results, {LATENCY * 1000:.0f} ms per request\n")
+
+    for name, run in (("sequential", sequential), ("concurrent", concurrent), ("cached", concurrent)):
+        if name != "cached":
+            bot = FakeBot()
+            fetcher = SpotifyFetcher(bot)  # type: ignore
+            await bot.tokens.get("spotify")
+        before = bot.http_session.requests
+        first, total = await run(fetcher, ids)
+        print(
+            f"{name:>10}: first page {first * 1000:7.1f} ms | all pages {total * 1000:7.1f} ms"
+            f" | {bot.http_session.requests - before} requests"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
@@ -0,0 +1,63 @@
+"""
+Counts database round trips for loading users one at a time and with :func:`User.get_many`.
+
+Usage: python benchmarks/user_loader.py [users]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from typing import Any
+
+from _fakes import FakeBot
+
+from utils import User, XPAccumulator
+
+
+def row(user_id: int) -> dict[str, Any]:
+    return {
+        "id": user_id, "xp": 0, "level": 1, "messages": 0, "total_xp": 0, "money": 0,
+        "worked": False, "command_count": 0, "user_id": user_id, "notify_user_on_levelup": False,
+    }
+
+
+def handler(method: str, query: str, args: tuple[Any, ...]) -> Any:
+    if method == "fetch":
+        return [row(user_id) for user_id in args[0]]
+    if isinstance(args[0], list):
+        return row(args[0][0])
+    return row(args[0])
+
+
+async def previous(bot: FakeBot, ids: list[int]) -> None:
+    # what User.get cost before: config row, then user row, each its own round trip
+    for user_id in ids:
+        async with bot.safe_connection() as conn:
+            await conn.fetchrow("SELECT * FROM user_config WHERE user_id = $1", user_id)
+            await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+
+
+async def one_by_one(bot: FakeBot, ids: list[int]) -> None:
+    for user_id in ids:
+        await User.get(user_id, bot)  # type: ignore
+
+
+async def bulk(bot: FakeBot, ids: list[int]) -> None:
+    await User.get_many(ids, bot)  # type: ignore
+
+
+async def run(amount: int) -> None:
+    ids = list(range(1, amount + 1))
+    for name, path in (("previous", previous), ("User.get", one_by_one), ("get_many", bulk)):
+        bot = FakeBot(handler)
+        bot.xp_accumulator = XPAccumulator(bot)  # type: ignore
+        start = time.perf_counter()
+        await path(bot, ids)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10}: {elapsed * 1000:8.1f} ms | round trips: {bot.counter['round_trips']:5}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000))
@@ -0,0 +1,115 @@
+"""
+Welcome card latency during a join burst: every member of the burst joins at once and each card is timed
+from the start of the burst until it's rendered, reported as p50/p99.
+
+Compares the previous renderer (template, mask and fonts reopened for every card, linear font size search,
+in the default thread pool) with the cached template rendered in :class:`CardRenderer`'s process pool.
+Avatars are in-memory PNGs, so neither variant downloads anything.
+
+Usage: python benchmarks/welcome_cards.py [joins] (default: 500)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+from typing import Any, Callable
+
+import _fakes  # noqa: F401  # puts the repository on sys.path
+
+from PIL import Image, ImageDraw, ImageFont
+
+# the template and fonts are loaded relative to the repository
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cards import CardRenderer  # noqa: E402
+from utils.pillow import DIR, get_center, render_welcome_card  # noqa: E402
+
+
+def previous_welcome_card(text: str, pfp: bytes) -> bytes:
+    # the implementation this replaced, minus the avatar download
+    with Image.open(f"{DIR}images/2TVCKxLS.jpg").convert("RGBA") as base:
+        base = base.resize((920, 500))
+        txt = Image.new("RGBA", base.size, (255, 255, 255, 0))
+
+        fontsize = 64
+        font = ImageFont.truetype(f"{DIR}LemonMilk.otf", fontsize)
+        while font.getlength(text) > (base.size[0] - 80):
+            fontsize -= 1
+            font = ImageFont.truetype(f"{DIR}LemonMilk.otf", fontsize)
+
+        d = ImageDraw.Draw(txt)
+        pos1 = get_center(base.size, d.textbbox((0, 0), text, font=font))
+        l, t, r, b = d.textbbox(tuple(pos1), text, font=font)  # noqa: E741
+        d.rectangle((l - 20, t - 20, r + 20, b + 20), fill=(0, 0, 0, 150))
+        d.text(tuple(pos1), text, font=font)
+        base.paste(Image.alpha_composite(base, txt))
+
+        image = Image.open(BytesIO(pfp)).resize((172, 172))
+        pos2 = get_center(base.size, image.getbbox())  # type: ignore
+        pos2[1] -= (base.size[1] / 3) - 22
+        mask = Image.open(f"{DIR}images/mask.jpg").convert("L").resize((172, 172))
+        mask2 = mask.resize((185, 185))
+        border = Image.new("L", (185, 185), 255)
+        pos3 = get_center(base.size, border.getbbox())  # type: ignore
+        pos3[1] -= (base.size[1] / 3) - 22
+        base.paste(border, tuple(int(i) for i in pos3), mask2)
+        base.paste(image, tuple(int(i) for i in pos2), mask)
+
+        buffer = BytesIO()
+        base.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def synthetic_avatar(seed: int) -> bytes:
+    buffer = BytesIO()
+    # never solid black, getbbox() of a black avatar is None and the previous renderer centred it by its bbox
+    colour = (1 + (seed * 37) % 255, 1 + (seed * 91) % 255, 1 + (seed * 53) % 255)
+    Image.new("RGB", (256, 256), colour).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def burst(joins: int, render: Callable[[str, bytes], Any], avatars: list[bytes]) -> list[float]:
+    start = time.perf_counter()
+
+    async def join(i: int) -> float:
+        await render(f"Welcome to the server member {i}!", avatars[i % len(avatars)])
+        return time.perf_counter() - start
+
+    return list(await asyncio.gather(*(join(i) for i in range(joins))))
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    cuts = statistics.quantiles(latencies, n=100)
+    return cuts[49], cuts[98]
+
+
+async def main(joins: int) -> None:
+    avatars = [synthetic_avatar(i) for i in range(50)]
+    print(f"{joins} joins at once\n")
+    print(f"{'':>22} | {'p50':>9} | {'p99':>9} | {'cards/s':>7}")
+
+    async def previous(title: str, avatar: bytes) -> bytes:
+        return await asyncio.to_thread(previous_welcome_card, title, avatar)
+
+    renderer = CardRenderer(None)  # type: ignore  # the bot is only needed to fetch avatars
+    await renderer.render(render_welcome_card, "warm up", avatars[0])  # start the processes
+
+    async def current(title: str, avatar: bytes) -> Any:
+        return await renderer.render(render_welcome_card, title, avatar, filename="welcome.png")
+
+    try:
+        for name, render in (("previous, thread pool", previous), ("cached, process pool", current)):
+            latencies = await burst(joins, render, avatars)
+            p50, p99 = percentiles(latencies)
+            print(f"{name:>22} | {p50 * 1000:6.0f} ms | {p99 * 1000:6.0f} ms | {joins / max(latencies):7.1f}")
+    finally:
+        renderer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,81 @@
+"""
+Replays synthetic messages through the per-message xp path and through :class:`XPAccumulator`.
+
+Usage: python benchmarks/xp_accumulator.py [messages] [users]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from _fakes import FakeBot
+
+from utils import RankIndex, User, XPAccumulator
+from utils.database.statements import STATEMENTS
+
+
+def row(user_id: int) -> dict[str, Any]:
+    # a users row joined with its user_config row, like ``user.load`` returns
+    return {
+        "id": user_id, "xp": 0, "level": 1, "messages": 0, "total_xp": 0,
+        "money": 0, "worked": False, "command_count": 0,
+        "user_id": user_id, "notify_user_on_levelup": False,
+    }
+
+
+def handler(method: str, query: str, args: tuple[Any, ...]) -> Any:
+    if query == STATEMENTS["user.load"]:
+        return [row(user_id) for user_id in args[0]] if method == "fetch" else row(args[0][0])
+    if "INTO users" in query:
+        return row(args[0])
+    return None
+
+
+def make_messages(amount: int, users: int) -> list[SimpleNamespace]:
+    guild = SimpleNamespace(id=1)
+    authors = [SimpleNamespace(id=i, bot=False) for i in range(1, users + 1)]
+    return [SimpleNamespace(author=random.choice(authors), guild=guild) for _ in range(amount)]
+
+
+async def per_message(bot: FakeBot, messages: list[SimpleNamespace]) -> None:
+    # what every message cost before: User.get followed by one UPDATE
+    for message in messages:
+        _user = await User.get(message.author.id, bot)  # type: ignore
+        async with bot.safe_connection() as conn:
+            await conn.execute(
+                "UPDATE users SET xp = $1, total_xp = $2, level = $3, messages = $4 WHERE id = $5",
+                _user.xp + 5, _user.total_xp + 5, _user.level, _user.messages + 1, _user.id,
+            )
+
+
+async def accumulated(bot: FakeBot, messages: list[SimpleNamespace]) -> None:
+    for message in messages:
+        await bot.xp_accumulator.record(message)  # type: ignore
+    await bot.xp_accumulator.close()
+
+
+async def run(amount: int, users: int) -> None:
+    messages = make_messages(amount, users)
+
+    for name, path in (("per-message", per_message), ("accumulator", accumulated)):
+        bot = FakeBot(handler)
+        bot.xp_accumulator = XPAccumulator(bot, max_pending=500)  # type: ignore
+        bot.ranks = RankIndex(bot)  # type: ignore
+        start = time.perf_counter()
+        await path(bot, messages)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>12}: {elapsed * 1000:9.1f} ms | round trips: {bot.counter['round_trips']:6} "
+            f"| acquires: {bot.counter['acquires']:6} | per message: {elapsed / amount * 1e6:7.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    _amount = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    _users = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(_amount, _users))
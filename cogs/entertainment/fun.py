@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import aiofiles
 import datetime
 import io
@@ -16,7 +15,7 @@ from discord import app_commands, Interaction, Attachment
 
 import constants as cs
 from core import BaseCog, Context, Dwello, Embed
-from utils import ENV, resize_discord_file, BlackJackView
+from utils import ENV, BlackJackView, ResizeLimitError
 
 
 Choice = app_commands.Choice
@@ -303,18 +302,20 @@ class Fun(BaseCog):
         return await self.bot.autocomplete(current, list(cs.JEY_API_DICT.items()), choice_length=25)
     
     async def _resize(
-        self, attachments: list[discord.Attachment | discord.File], _width: int = 500, _height: int = 500,
+        self,
+        attachments: list[discord.Attachment | discord.File],
+        _width: int = 500,
+        _height: int = 500,
+        guild: discord.Guild | None = None,
     ) -> list[discord.File]:
         files: list[discord.File] = []
+        # resized files have to fit into what can be uploaded in the guild
+        budget = guild.filesize_limit if guild else None
         for attachment in attachments:
-            if isinstance(attachment, discord.File):
-                file = attachment
-            else:
-                file = await attachment.to_file(filename=attachment.filename)
-            extension = re.search(r'\.[^.]+$', file.filename) # might need to adjust
+            extension = re.search(r'\.[^.]+$', attachment.filename) # might need to adjust
             if (extension:= extension.group(0)) not in cs.IMAGE_EXTENSIONS: # check which ones are supported by PIL
                 raise ValueError(extension)
-            files.append(await asyncio.to_thread(resize_discord_file, file, (_width, _height), extension))
+            files.append(await self.bot.resizer.resize_file(attachment, (_width, _height), extension, budget=budget))
         return files
     
     @app_commands.command(name="resize", description="Resizes an image.")
@@ -322,7 +323,9 @@ class Fun(BaseCog):
     async def app_resize(self, interaction: Interaction, attachment: Attachment, width: int, height: int) -> discord.Message:
         await interaction.response.defer(thinking=True)
         try:
-            files = await self._resize([attachment], width, height)
+            files = await self._resize([attachment], width, height, interaction.guild)
+        except ResizeLimitError as e:
+            return await interaction.followup.send(str(e))
         except ValueError as ve:
             return await interaction.followup.send(f"Sorry, we currently don't support this file type: {ve}")
         return await interaction.followup.send(files=files)
@@ -364,7 +367,9 @@ class Fun(BaseCog):
                 )
         await ctx.defer()
         try:
-            files = await self._resize(attachments[:10], width, height)
+            files = await self._resize(attachments[:10], width, height, ctx.guild)
+        except ResizeLimitError as e:
+            return await ctx.reply(str(e), user_mistake=True)
         except ValueError as ve:
             return await ctx.reply(f"Sorry, we currently don't support this file type: {ve}", user_mistake=True)
         
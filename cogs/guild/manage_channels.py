@@ -71,14 +71,7 @@ async def add_counter(
             
     _guild = await Guild.get(guild.id, bot)
 
-    bot_counter = sum(bool(member.bot) for member in guild.members)
-    member_counter = len(guild.members) - bot_counter
-
-    count = {
-        "all": guild.member_count or len(guild.members),
-        "bot": bot_counter,
-        "member": member_counter,
-    }.get(_type)
+    count = bot.counters.get_counts(guild).get(_type)
 
     method = {
         "text": guild.create_text_channel,
@@ -14,6 +14,7 @@ import time
 import traceback
 from typing import Any, TypeVar
 
+import aiohttp
 import discord
 import psutil
 import pygit2
@@ -26,7 +27,7 @@ from typing_extensions import override
 
 import constants as cs
 from core import Context, Dwello, Embed
-from utils import DefaultPaginator, Idea, Guild, create_codeblock, resize_from_url
+from utils import DefaultPaginator, Idea, Guild, PageSource, ResizeLimitError, create_codeblock
 
 from .news import NewsViewer
 
@@ -445,8 +446,11 @@ class MyHelp(commands.HelpCommand):
                 if (_url:= command.extras["preview"]): # add previews to most commands ig
                     async with self.context.bot.reaction_typing(self.context.message):
                         extension = re.search(r'\.([^.?/]+)(?:\?|$)', _url) # takes too long | find the fastest way or make a customisation option   # noqa: E501
-                        preview = await asyncio.to_thread(resize_from_url, _url, (700, 350), extension.group(0))
-                        embed.set_image(url=f"attachment://{preview.filename}")
+                        bot = self.context.bot
+                        # downloaded with the bot's session and resized in a thread, not on the event loop
+                        with contextlib.suppress(ResizeLimitError, aiohttp.ClientError):
+                            preview = await bot.resizer.resize_url(bot.http_session, _url, (700, 350), extension.group(0))
+                            embed.set_image(url=f"attachment://{preview.filename}")
         if command.aliases:
             embed.description = f'{embed.description}\n\n**Aliases:**\n`{"`, `".join(command.aliases)}`'
         try:
@@ -1116,44 +1120,39 @@ class IdeaPaginator(DefaultPaginator):
         **kwargs,
     ) -> None:
         self.ideas = ideas
-        try:
-            bot = obj.bot
-        except AttributeError:
-            bot = obj.client
-        self._embeds = self._construct_embeds(bot)  # dont override the parent class' embeds
-        super().__init__(obj, self._embeds, values=self.ideas, **kwargs)
-
-        self.voted = [(embed, self.ideas[n].voted(self.author.id)) for n, embed in enumerate(self.embeds)]
+        # rendered when they're shown, their authors might have to be fetched
+        super().__init__(obj, PageSource(self._render, len(ideas)), values=self.ideas, **kwargs)
 
         self.upvote = UpvoteIdeaButton(row=1)
         self.add_item(self.upvote)
         self.previous.row = 0
         self.next.row = 2
 
-    def _construct_embeds(self, bot: Dwello) -> list[Embed]:
-        embeds: list[Embed] = []
-        for idea in self.ideas:
-            author: discord.User | None = bot.get_user(idea.author_id)
-            embed = Embed(
-                title=idea.title,
-                description=idea.content,
-                timestamp=idea.created_at,
-            )
-            embed.set_footer(text=f"Votes: {idea.votes}")
-            if author:
-                embed.set_author(name=author.name, icon_url=author.display_avatar.url)
-            embeds.append(embed)
-        return embeds
+    async def _render(self, index: int) -> Embed:
+        idea = self.ideas[index]
+        author: discord.User | None = None
+        with contextlib.suppress(discord.HTTPException):
+            author = await self.bot.getch(self.bot.get_user, self.bot.fetch_user, idea.author_id)
+
+        embed = Embed(
+            title=idea.title,
+            description=idea.content,
+            timestamp=idea.created_at,
+        )
+        embed.set_footer(text=f"Votes: {idea.votes}")
+        if author:
+            embed.set_author(name=author.name, icon_url=author.display_avatar.url)
+        return embed
 
     def _update_buttons(self) -> None:
         styles = {True: ButtonStyle.gray, False: ButtonStyle.blurple}
         page = self.current_page
-        total = len(self.embeds) - 1
+        total = len(self.ideas) - 1
         self.next.disabled = page == total
         self.previous.disabled = page == 0
         self.next.style = styles[page == total]
         self.previous.style = styles[page == 0]
-        self.upvote.disabled = self.voted[page][1]
+        self.upvote.disabled = self.ideas[page].voted(self.author.id)
         if self.upvote.disabled is True:
             self.upvote.label = "Voted"
             self.upvote.style = ButtonStyle.red
@@ -1187,15 +1186,13 @@ class UpvoteIdeaButton(discord.ui.Button["IdeaPaginator"]):
         view: IdeaPaginator = self.view
 
         page = view.current_page
-        embed = view.embeds[page]
         idea: Idea = view.ideas[page]
 
         await idea.upvote(view.author.id)
 
-        embed.set_footer(text=f"Votes: {idea.votes}")
-        view.voted[page] = (embed, True)
-        self.disabled = True
-        await interaction.response.edit_message(view=view)
+        # rendered again with the new vote count
+        view.source.invalidate(page)
+        await view.turn_page(interaction, page)
 
 
 class ShowCodeButton(discord.ui.Button["SourceView"]):
@@ -12,7 +12,7 @@ from discord import ButtonStyle, app_commands
 from discord.ext import commands
 
 from core import BaseCog, Context, Dwello, Embed
-from utils import get_unix_timestamp, is_discord_link
+from utils import CachedMessage, PageSource, get_unix_timestamp, is_discord_link
 
 NVT = TypeVar("NVT", bound="NewsViewer")
 
@@ -28,7 +28,7 @@ class Page:  # DO SMTH LIKE THIS FOR EVERY CMD IN SCRAPING YO UNPACK EASILY | MA
     title: str
     message_id: int
     channel_id: int
-    cached_message: discord.Message | None = None
+    cached_message: CachedMessage | None = None
 
 
 class NewsFeed:
@@ -99,12 +99,9 @@ class NewsPreviousButton(discord.ui.Button[NVT]):
         view: NewsViewer = self.view
 
         view.news.advance()
-        page = view.news.current
         view.update_labels()
 
-        embed: Embed = await view.get_embed(page)
-
-        await interaction.response.edit_message(embed=embed, view=view)
+        await view.show_current(interaction)
 
 
 class NewsCurrentButton(discord.ui.Button[NVT]):
@@ -132,12 +129,9 @@ class NewsNextButton(discord.ui.Button[NVT]):
         view: NewsViewer = self.view
 
         view.news.go_back()
-        page = view.news.current
         view.update_labels()
 
-        embed: Embed = await view.get_embed(page)
-
-        await interaction.response.edit_message(embed=embed, view=view)
+        await view.show_current(interaction)
 
 
 class NewsGoBackButton(discord.ui.Button[NVT]):
@@ -192,6 +186,8 @@ class NewsViewer(discord.ui.View):
 
         if news:
             self.news = NewsFeed(news)
+            # the messages of the pages are fetched when they're shown, and those of the pages around in the background
+            self.pages: PageSource = PageSource(self._render, self.news.max_pages)
 
             self.current = NewsCurrentButton(style=ButtonStyle.red)
             self.next = NewsNextButton(style=ButtonStyle.blurple, label="\u226b")
@@ -211,26 +207,54 @@ class NewsViewer(discord.ui.View):
     async def get_embed(self, page: Page) -> Embed:
         """:class:`Embed`: Used to get the embed for the current page."""
 
-        message: discord.Message | None = page.cached_message
+        message: CachedMessage | None = page.cached_message
 
         if not message:
             channel: discord.TextChannel = await self.bot.getch(
                 self.bot.get_channel, self.bot.fetch_channel, page.channel_id
             )
-            message: discord.Message | None = await self.bot.get_or_fetch_message(channel, page.message_id)
-            page.cached_message = message
+            # a hit in the bot's message cache is already a compact projection, which is all this needs
+            fetched = await self.bot.get_or_fetch_message(channel, page.message_id)
+            if isinstance(fetched, discord.Message):
+                fetched = CachedMessage.from_message(fetched)
+            message = page.cached_message = fetched
 
         time: datetime.datetime = message.created_at
 
         embed = Embed(title=f"\N{NEWSPAPER} {fm_dt(time)} ({fm_dt(time, 'R')})")
         embed.add_field(name=page.title, value=message.content)
         embed.set_footer(
-            text=f"ID: {page.news_id} - Authored by {message.author.name}",
-            icon_url=message.author.display_avatar.url,
+            text=f"ID: {page.news_id} - Authored by {message.author_name}",
+            icon_url=message.author_avatar_url,
         )
 
         return embed
 
+    async def _render(self, index: int) -> Embed:
+        return await self.get_embed(self.news.news[index])
+
+    async def current_embed(self) -> Embed:
+        """:class:`Embed`: The embed of the current page, the pages next to it are rendered in the background."""
+
+        index = self.news.current_index
+        embed = await self.pages.get_page(index)
+        # the feed wraps around, either of them can be next
+        for neighbour in (index - 1, index + 1):
+            self.pages.prefetch(neighbour % self.news.max_pages)
+        return embed
+
+    async def show_current(self, interaction: discord.Interaction) -> None:
+        """Shows the current page in response to a button click, deferring it first if the page has to be fetched."""
+
+        if not self.pages.is_rendered(self.news.current_index):
+            await interaction.response.defer()
+
+        embed = await self.current_embed()
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embed=embed, view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
+
     def update_labels(self):
         """Used to update the internal cache of the view, it will update the labels of the buttons."""
 
@@ -270,7 +294,7 @@ class NewsViewer(discord.ui.View):
             )
         else:
             new.update_labels()
-            _embed: Embed = await new.get_embed(new.news.current)  # news[new.news.current_index]
+            _embed: Embed = await new.current_embed()
 
         new.message = await ctx.send(embed=_embed, view=new)
         await new.wait()
@@ -293,7 +317,7 @@ class NewsViewer(discord.ui.View):
             )
         else:
             new.update_labels()
-            _embed: Embed = await new.get_embed(new.news.current)
+            _embed: Embed = await new.current_embed()
 
         if new.old_view and new.embed:
             await interaction.response.edit_message(embed=_embed, view=new)
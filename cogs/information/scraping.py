@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import difflib
+import random
 import re
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
 import aiofiles
+import aiohttp
 import discord
 import wikipediaapi
 from aiospotify import Artist, Image, ObjectType, PartialAlbum, SearchResult, SpotifyClient, Track, http
@@ -16,7 +19,7 @@ from yarl import URL
 
 import constants as cs
 from core import BaseCog, Context, Dwello, Embed
-from utils import ENV, DefaultPaginator, capitalize_greek_numbers, get_unix_timestamp
+from utils import ENV, DefaultPaginator, PageSource, SpotifyFetcher, capitalize_greek_numbers, get_unix_timestamp
 
 try:
     import orjson as json
@@ -27,7 +30,6 @@ except ImportError:
     import json as json
 
 if TYPE_CHECKING:
-    from aiohttp import ClientResponse, ClientSession
     from discord import Interaction
 
 mk = discord.utils.escape_markdown
@@ -36,21 +38,16 @@ TMDB_KEY = ENV["TMDB_API_TOKEN"]
 STEAM_KEY = ENV["STEAM_API_KEY"]
 CLIENT_ID = ENV["TWITCH_CLIENT_ID"]
 WEATHER_KEY = ENV["OPENWEATHERMAP_KEY"]
-CLIENT_SECRET = ENV["TWITCH_CLIENT_SECRET"]
 SPOTIFY_CLIENT_ID = ENV["SPOTIFY_CLIENT_ID"]
 SPOTIFY_CLIENT_SECRET = ENV["SPOTIFY_CLIENT_SECRET"]
 UNSPLASH_DEMO_ACCESS_KEY = ENV["UNSPLASH_DEMO_ACCESS_KEY"]
 
 
-async def get_access_token(session: ClientSession):
-    body = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-    }
-    request: ClientResponse = await session.post("https://id.twitch.tv/oauth2/token", data=body)
-    keys = await request.json()
-    return keys["access_token"]
+class ScrapingError(Exception):
+    def __init__(self, status_code: int, reason: str | None) -> None:
+        self.status_code: int = status_code
+        self.reason: str | None = reason
+        super().__init__(f"API responded with HTTP Status Code {status_code}")
 
 
 # not sure what this is
@@ -97,13 +94,21 @@ class Scraping(BaseCog):
     def __init__(self, bot: Dwello, *args: Any, **kwargs: Any) -> None:
         super().__init__(bot, *args, **kwargs)
 
-        self.access_token: str | None = None
+        # responses of these apis are cached by the bot's http cache, see the lookups below
+        http_cache = self.bot.http_cache
+        http_cache.add_endpoint("tmdb", 3600.0, casefold=True)
+        http_cache.add_endpoint("weather", 600.0, statuses=(200, 404), casefold=True, private_params=("APPID",))
+        http_cache.add_endpoint("urban", 3600.0, casefold=True)
+        http_cache.add_endpoint("unsplash", 900.0, casefold=True)
+        http_cache.add_endpoint("igdb", 86400.0)
 
         self.spotify_client: SpotifyClient = SpotifyClient(
             SPOTIFY_CLIENT_ID,
             SPOTIFY_CLIENT_SECRET,
             session=self.bot.http_session,
         )
+        # album tracks and artist albums/top tracks, requested concurrently and cached by id
+        self.spotify: SpotifyFetcher = SpotifyFetcher(self.bot)
 
         # for some reason user_agent is a required argument on the laptop
         # but not on the pc (for me at least)
@@ -124,11 +129,10 @@ class Scraping(BaseCog):
             "Authorization": f"Bearer {self.tmdb_key}",
         }
     
-    @property
-    def game_headers(self) -> dict[str, Any]:
+    def game_headers(self, access_token: str) -> dict[str, Any]:
         return {
             "Client-ID": CLIENT_ID,
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {access_token}",
         }
 
     @property
@@ -143,6 +147,66 @@ class Scraping(BaseCog):
     def wiki_headers(self) -> dict[str, str]:
         return {"User-Agent": self.wiki_user_agent}
 
+    # the lookups below go through the bot's http cache: identical requests made at the same time share one
+    # http request and responses are kept for the ttl of their endpoint, failed requests (raising ScrapingError)
+    # aren't cached
+
+    async def tmdb_search(self, kind: str, query: str, year: int | None = None) -> list[dict[str, Any]]:
+        """Returns the TMDB search results for a 'movie', 'tv' or 'person' query."""
+
+        response = await self.bot.http_cache.get(
+            "tmdb",
+            f"https://api.themoviedb.org/3/search/{kind}",
+            params={
+                "query": query,
+                "include_adult": "True",
+                "language": "en-US",
+                "page": 1,
+                "primary_release_year": year,
+            },
+            headers=self.tmdb_headers,
+        )
+        if response.status != 200:
+            raise ScrapingError(response.status, response.reason)
+
+        return response.json(loads=json.loads)["results"]
+
+    async def current_weather(self, location: str) -> dict[str, Any]:
+        """Returns the OpenWeatherMap payload of a location, unknown locations included ('cod' is '404')."""
+
+        response = await self.bot.http_cache.get(
+            "weather",
+            "http://api.openweathermap.org/data/2.5/weather",
+            params={"q": location, "APPID": WEATHER_KEY, "units": "metric"},
+        )
+        if response.status not in (200, 404):
+            raise ScrapingError(response.status, response.reason)
+        return response.json(loads=json.loads)
+
+    async def urban_define(self, word: str) -> list[dict[str, Any]]:
+        """Returns the urban dictionary definitions of a word."""
+
+        response = await self.bot.http_cache.get(
+            "urban", "http://api.urbandictionary.com/v0/define", params={"term": word},
+        )
+        if response.status != 200:
+            raise ScrapingError(response.status, response.reason)
+
+        return response.json(loads=json.loads).get("list", [])
+
+    async def unsplash_photos(self, query: str | None = None) -> list[dict[str, Any]]:
+        """Returns a batch of random Unsplash photos (matching the query), a random one of them is picked per use."""
+
+        response = await self.bot.http_cache.get(
+            "unsplash",
+            "https://api.unsplash.com/photos/random",
+            params={"query": query, "count": 30},
+            headers={"Authorization": f"Client-ID {UNSPLASH_DEMO_ACCESS_KEY}"},
+        )
+        if response.status != 200:
+            raise ScrapingError(response.status, response.reason)
+        return response.json(loads=json.loads)
+
     # apply for production rate of unsplash api (5k req/h)
     @commands.hybrid_command(
         name="image",
@@ -158,24 +222,16 @@ class Scraping(BaseCog):
         for this application.
         """
 
-        url: URL = "https://api.unsplash.com/photos/random"
-
-        headers = {
-            "Authorization": f"Client-ID {UNSPLASH_DEMO_ACCESS_KEY}",
-        }
-
-        params = {
-            "query": image,
-        } if image else None
-
-        async with self.bot.http_session.get(url, headers=headers, params=params) as response:
-            if response.status == 200:
-                data = await response.json(loads=json.loads)
+        try:
+            photos = await self.unsplash_photos(image)
+        except ScrapingError:
+            return await ctx.reply(
+                f"Something went wrong while trying to get an image for {mk(image)}",
+            )
+        if not photos:
+            return await ctx.reply(f"Couldn't find an image for {mk(image)}", user_mistake=True)
 
-            elif response.status >= 400:
-                return await ctx.reply(
-                    f"Something went wrong while trying to get an image for {mk(image)}",
-                )
+        data = random.choice(photos)
 
         embed = Embed(
             title=data["alt_description"].capitalize(),
@@ -206,11 +262,12 @@ class Scraping(BaseCog):
                 f"Can't find any albums by the name of *{mk(album, as_needed=False)}*",
                 user_mistake=True,
             )
-        embeds: list[Embed] = []
-        for album in albums:
-            album: dict[str, Any]  # = albums[0]
+        # the tracks of every album are requested at once, each page only waits for its own
+        track_tasks = [self.spotify.album_tracks(album["id"]) for album in albums]
+
+        async def render(index: int) -> Embed:
+            album: dict[str, Any] = albums[index]
 
-            _id = album["id"]
             name = album["name"]
             release_date = album["release_date"]
             link = album["external_urls"]["spotify"]
@@ -234,16 +291,20 @@ class Scraping(BaseCog):
                     value="\n".join([f"> [{i[0].title()}]({i[1]})" for i in artists]),
                 )
             )
-            tracks_data: dict[str, Any] = await self.spotify_http_client.get_album_tracks(id=_id, market="US", limit=5)
+            try:
+                # shielded, the tasks are cached and shared with other commands
+                tracks = await asyncio.shield(track_tasks[index])
+            except aiohttp.ClientError:
+                tracks = []
 
-            if tracks := tracks_data["items"]:
+            if tracks:
                 embed.add_field(
                     name="Tracks",
                     value="\n".join([f"> [{track['name']}]({track['external_urls']['spotify']})" for track in tracks]),
                 )
-            embeds.append(embed)
+            return embed
 
-        return await DefaultPaginator.start(ctx, embeds)
+        return await DefaultPaginator.start(ctx, PageSource(render, len(albums)))
 
     @commands.hybrid_command(
         name="artist",
@@ -267,17 +328,17 @@ class Scraping(BaseCog):
                 user_mistake=True,
             )
         
-        # making too many requests here. maybe smh else?
-        embeds: list[Embed] = []
-        for artist in artists:
-            artist: Artist
-            album_data: dict[str, Any] = await self.spotify_http_client.get_artist_albums(
-                id=artist.id, include_groups=["album"], market="US", limit=5
-            )
-
-            tracks_data: dict[str, Any] = await self.spotify_http_client.get_artist_top_tracks(id=artist.id, market="US")
+        # the albums and top tracks of every artist are requested at once, each page only waits for its own
+        # (started in page order, so the semaphore lets the first page's requests through first)
+        tasks = [(self.spotify.artist_albums(artist.id), self.spotify.artist_top_tracks(artist.id)) for artist in artists]
 
-            albums = album_data["items"]
+        async def render(index: int) -> Embed:
+            artist: Artist = artists[index]
+            try:
+                # shielded, the tasks are cached and shared with other commands
+                albums, tracks = await asyncio.shield(asyncio.gather(*tasks[index]))
+            except aiohttp.ClientError:
+                albums, tracks = [], []
 
             unique_albums = sorted(albums, key=lambda x: x["name"].split(" (")[0])
             unique_albums = [
@@ -298,31 +359,30 @@ class Scraping(BaseCog):
                 for name, album in zip(album_names, sorted_unique_albums)
             ]
 
-            tracks: list[dict[str, Any]] = tracks_data["tracks"]
             top_tracks = sorted(tracks, key=lambda x: x["popularity"], reverse=True)
 
             _description = f"**Followers**: {artist.followers.total:,}\n**Genres**: " + ", ".join(list(artist.genres[:2]))
-            embed = (
-                Embed(
-                    title=artist.name,
-                    url=artist.external_urls.spotify,
-                    description=_description,
-                )
-                .add_field(
+            embed = Embed(
+                title=artist.name,
+                url=artist.external_urls.spotify,
+                description=_description,
+            )
+            if album_tuples:
+                embed.add_field(
                     name="Top Albums",
                     value="\n".join(f"> [{name}]({url})" for name, url in album_tuples),
                 )
-                .add_field(
+            if top_tracks:
+                embed.add_field(
                     name="Top Tracks",
                     value="\n".join(f"> [{track['name']}]({track['external_urls']['spotify']})" for track in top_tracks[:3]),
                 )
-            )
             image: Image = artist.images[1] if artist.images else None
             if image:
                 embed.set_thumbnail(url=image.url)
-            embeds.append(embed)
+            return embed
 
-        return await DefaultPaginator.start(ctx, embeds)
+        return await DefaultPaginator.start(ctx, PageSource(render, len(artists)))
 
     @commands.hybrid_command(
         name="playlist",
@@ -464,19 +524,18 @@ class Scraping(BaseCog):
         """
     
         await ctx.typing()
-        if self.access_token is None:
-            # access token expires, so refresh
-            self.access_token = await get_access_token(ctx.bot.http_session)
-
         conditions=f'fields *; search "{game}"; exclude tags, keywords; limit 5;'
-        async with self.bot.http_session.post(
-            url="https://api.igdb.com/v4/games",
-            headers=self.game_headers, data=conditions,
-        ) as response:
-            data: list[dict[str, Any]] = await response.json(loads=json.loads)
-
+        # igdb authorizes with the twitch app token, retried once with a new one if it got rejected
+        response = await self.bot.tokens.call(
+            "twitch",
+            lambda access_token: self.bot.http_cache.post(
+                "igdb", "https://api.igdb.com/v4/games", headers=self.game_headers(access_token), data=conditions,
+            ),
+        )
         if response.status != 200:
             return await ctx.reply("Couldn't connect to the API.", user_mistake=True)
+
+        data: list[dict[str, Any]] = response.json(loads=json.loads)
         
         if len(data) == 0:
             return await ctx.reply(f"Couldn't find a game by the name: {game}", user_mistake=True)
@@ -554,18 +613,13 @@ class Scraping(BaseCog):
         Consequently, this command may require additional time to complete.
         """
 
-        pages: int = 1
-        url: URL = (
-            f"https://api.themoviedb.org/3/search/person?query={person}&include_adult=True&language=en-US&page={pages}"
-        )
-        async with self.bot.http_session.get(url=url, headers=self.tmdb_headers) as response:
-            data = await response.json(loads=json.loads)
-
-        if response.status != 200:
+        try:
+            results = await self.tmdb_search("person", person)
+        except ScrapingError:
             return await ctx.reply("Couldn't connect to the API.", user_mistake=True)
 
         try:
-            people = sorted(data["results"], key=lambda person: person["popularity"], reverse=True)[:5]
+            people = sorted(results, key=lambda person: person["popularity"], reverse=True)[:5]
             if len(people) == 0:
                 raise ValueError
 
@@ -614,16 +668,13 @@ class Scraping(BaseCog):
         that might become unresponsive once the request threshold is reached.
         """
 
-        pages: int = 1
-        url: URL = f"https://api.themoviedb.org/3/search/movie?query={movie}&include_adult=True&language=en-US&page={pages}"
-        async with self.bot.http_session.get(url=url, headers=self.tmdb_headers) as response:
-            data = await response.json(loads=json.loads)
-
-        if response.status != 200:
+        try:
+            results = await self.tmdb_search("movie", movie)
+        except ScrapingError:
             return await ctx.reply("Couldn't connect to the API.", user_mistake=True)
 
         try:
-            movies = sorted(data["results"], key=lambda _movie: _movie["vote_count"], reverse=True)[:5]
+            movies = sorted(results, key=lambda _movie: _movie["vote_count"], reverse=True)[:5]
             if len(movies) == 0:
                 raise ValueError
 
@@ -662,20 +713,13 @@ class Scraping(BaseCog):
         that might become unresponsive once the request threshold is reached.
         """
 
-        pages: int = 1
-        url: URL = f"https://api.themoviedb.org/3/search/movie?query={movie}&include_adult=True&language=en-US&primary_release_year={year}&page={pages}"
-
-        if not year:
-            url = f"https://api.themoviedb.org/3/search/movie?query={movie}&include_adult=True&language=en-US&page={pages}"
-
-        async with self.bot.http_session.get(url=url, headers=self.tmdb_headers) as response:
-            data = await response.json(loads=json.loads)
-
-        if response.status != 200:
+        try:
+            results = await self.tmdb_search("movie", movie, year)
+        except ScrapingError:
             return await interaction.response.send_message("Couldn't connect to the API.", ephemeral=True)
 
         try:
-            movies = sorted(data["results"], key=lambda _movie: _movie["vote_count"], reverse=True)[:5]
+            movies = sorted(results, key=lambda _movie: _movie["vote_count"], reverse=True)[:5]
             if len(movies) == 0:
                 raise ValueError
 
@@ -717,16 +761,13 @@ class Scraping(BaseCog):
         that might become unresponsive once the request threshold is reached.
         """
 
-        pages: int = 1
-        url: URL = f"https://api.themoviedb.org/3/search/tv?query={show}&include_adult=True&language=en-US&page={pages}"
-        async with self.bot.http_session.get(url=url, headers=self.tmdb_headers) as response:
-            data = await response.json(loads=json.loads)
-
-        if response.status != 200:
+        try:
+            results = await self.tmdb_search("tv", show)
+        except ScrapingError:
             return await ctx.reply("Couldn't connect to the API.", user_mistake=True)
 
         try:
-            shows = sorted(data["results"], key=lambda _show: _show["vote_count"], reverse=True)[:5]
+            shows = sorted(results, key=lambda _show: _show["vote_count"], reverse=True)[:5]
             if len(shows) == 0:
                 raise ValueError
             
@@ -766,21 +807,13 @@ class Scraping(BaseCog):
         that might become unresponsive once the request threshold is reached.
         """
 
-        pages: int = 1
-
-        url = f"https://api.themoviedb.org/3/search/tv?query={show}&include_adult=True&language=en-US&primary_release_year={year}&page={pages}"
-
-        if not year:
-            url = f"https://api.themoviedb.org/3/search/tv?query={show}&include_adult=True&language=en-US&page={pages}"
-
-        async with self.bot.http_session.get(url=url, headers=self.tmdb_headers) as response:
-            data = await response.json(loads=json.loads)
-
-        if response.status != 200:
+        try:
+            results = await self.tmdb_search("tv", show, year)
+        except ScrapingError:
             return await interaction.response.send_message("Couldn't connect to the API.", ephemeral=True)
 
         try:
-            shows = sorted(data["results"], key=lambda _show: _show["vote_count"], reverse=True)[:5]
+            shows = sorted(results, key=lambda _show: _show["vote_count"], reverse=True)[:5]
             if len(shows) == 0:
                 raise ValueError
             
@@ -830,10 +863,10 @@ class Scraping(BaseCog):
 
         _location = city.lower()
 
-        async with self.bot.http_session.get(
-            f"http://api.openweathermap.org/data/2.5/weather?q={_location}&APPID={WEATHER_KEY}&units=metric"
-        ) as response:
-            data = await response.json(loads=json.loads)
+        try:
+            data = await self.current_weather(_location)
+        except ScrapingError:
+            return await ctx.reply("Couldn't connect to the API.", user_mistake=True)
 
         if data["cod"] == "404":
             # please don't use this... find a way for openweathermap to return a similair city maybe,
@@ -906,15 +939,21 @@ class Scraping(BaseCog):
     async def _urban(self, ctx: Context, *, word: str = None):
         """Searches urban dictionary."""
 
-        url = 'http://api.urbandictionary.com/v0/define' if word else "https://api.urbandictionary.com/v0/random"
-        async with ctx.bot.http_session.get(url, params={'term': word} if word else None) as resp:
-            if resp.status != 200:
-                return await ctx.send(f'An error occurred: {resp.status} {resp.reason}') # not a very good handler haha
-
-            js = await resp.json()
-            data = js.get('list', [])
-            if not data:
-                return await ctx.send('No results found, sorry.')
+        if word:
+            try:
+                data = await self.urban_define(word)
+            except ScrapingError as e:
+                return await ctx.send(f'An error occurred: {e.status_code} {e.reason}')
+        else:
+            async with ctx.bot.http_session.get("https://api.urbandictionary.com/v0/random") as resp:
+                if resp.status != 200:
+                    return await ctx.send(f'An error occurred: {resp.status} {resp.reason}') # not a very good handler haha
+
+                js = await resp.json()
+                data = js.get('list', [])
+
+        if not data:
+            return await ctx.send('No results found, sorry.')
 
         embeds: list[Embed] = [
             Embed(
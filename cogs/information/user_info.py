@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 from typing import Any
-from asyncio import to_thread
 
 import discord
 from discord.ext import commands
 
 import constants as cs
-from utils import resize_discord_file
 from core import BaseCog, Context, Dwello, Embed
 
 # from colorthief import ColorThief
@@ -60,7 +58,7 @@ class UserInfo(BaseCog):
         if _user.banner:
             _file = await _user.banner.to_file(filename="banner")
             _ext = ".gif" if _user.banner.is_animated() else ".png"
-            banner = await to_thread(resize_discord_file, _file, (800, 300), _ext)
+            banner = await self.bot.resizer.resize_file(_file, (800, 300), _ext)
 
         return await ctx.reply(
             file=banner,
@@ -145,6 +143,40 @@ class UserInfo(BaseCog):
             ),
         )
 
+    @commands.hybrid_command(name="rank", brief="Shows member's rank card.", description="Shows member's rank card.")
+    async def rank(self, ctx: Context, member: discord.Member | None = commands.Author) -> discord.Message | None:
+        """Displays the member's global rank, level and progress towards the next level as an image."""
+
+        await ctx.defer()
+        # the locally kept user if they have xp that isn't written yet
+        _user = await self.bot.xp_accumulator.get_user(member.id)
+        rank = await _user.get_rank()
+        file = await self.bot.cards.rank_card(
+            member,
+            rank=rank or 0,
+            level=_user.level,
+            xp=_user.xp,
+            needed=_user.xp_formula,
+            accent=member.color,
+        )
+        return await ctx.reply(file=file)
+
+    @commands.hybrid_command(
+        name="leaderboard",
+        aliases=["lb"],
+        brief="Shows the level leaderboard.",
+        description="Shows the level leaderboard.",
+    )
+    async def leaderboard(self, ctx: Context) -> discord.Message | None:
+        """Displays the ten users with the most total xp as an image."""
+
+        await ctx.defer()
+        top = await self.bot.ranks.fetch_top(10)
+        file = await self.bot.cards.leaderboard(
+            [(rank, self.bot.get_user(user_id), total_xp) for rank, (user_id, total_xp) in enumerate(top, start=1)]
+        )
+        return await ctx.reply(file=file)
+
     """@commands.hybrid_command(name = 'stats', description="Shows personal information and rank statistics",with_app_command=True)
     async def stats(self, ctx: Context, member: discord.Member | None = commands.Author) -> discord.Message | None:
 
@@ -1,36 +1,79 @@
 from __future__ import annotations
 
 import contextlib
-from collections import defaultdict
 from typing import Any
 
 import discord
 from discord.ext import commands
 
-from core import BaseCog, Dwello
-from utils import HandleHTTPException, SpamChecker, Guild
+from constants import WARNING_COLOR
+from core import BaseCog, Dwello, Embed
+from utils import BanExecutor, BanReport, Guild, MessageContext, SpamChecker, SpamEngine
 
 
 class AutoMod(BaseCog):
     def __init__(self, bot: Dwello, *args: Any, **kwargs: Any) -> None:
         super().__init__(bot, *args, **kwargs)
-        self._spam_check: defaultdict[int, SpamChecker] = defaultdict(SpamChecker)
+        # one engine for every guild, so idle sweeps and the memory cap cover all of them
+        self.spam_engine: SpamEngine = SpamEngine()
+        self._spam_check: dict[int, SpamChecker] = {}
+        self.bans: BanExecutor = BanExecutor(bot.http, on_report=self.send_ban_report)
+        # guild id -> channel the last auto-ban was triggered in, failed bans are reported there
+        self._report_channels: dict[int, discord.abc.Messageable] = {}
+
+    def get_checker(self, _guild: Guild) -> SpamChecker:
+        checker = self._spam_check.get(_guild.id)
+        if checker is None:
+            checker = self._spam_check[_guild.id] = SpamChecker(self.spam_engine)
+            checker.configure(_guild)
+        return checker
 
-    # add events here?
+    @commands.Cog.listener()
+    async def on_guild_config_update(self, _guild: Guild) -> None:
+        if checker := self._spam_check.get(_guild.id):
+            checker.configure(_guild)
 
-    async def check_raid(self, guild_id: int, member: discord.Member, message: discord.Message) -> None:
-        checker = self._spam_check[guild_id]
-        if not checker.is_spamming(message):
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self._spam_check.pop(guild.id, None)
+        self._report_channels.pop(guild.id, None)
+        self.bans.forget(guild.id)
+
+    async def auto_ban(self, checker: SpamChecker, member: discord.Member, message: discord.Message, reason: str) -> None:
+        # the ban runs in the guild's ban worker, during raids it waits a moment to ban everyone in bulk
+        self._report_channels[member.guild.id] = message.channel
+        # a member who keeps spamming while their ban is queued is only counted once towards raid mode
+        if self.bans.is_queued(member.guild.id, member.id):
             return
+        self.bans.put(member.guild.id, member.id, reason=reason, batch=checker.record_ban())
 
-        if member.guild.owner.id == member.id or self.bot.user.id == member.id:
+    async def send_ban_report(self, guild_id: int, report: BanReport) -> None:
+        channel = self._report_channels.get(guild_id)
+        if channel is None:
             return
 
-        async with HandleHTTPException(message.channel, title=f"Failed to ban {member}"):
-            await member.ban(reason="Auto-ban for spamming")
+        with contextlib.suppress(discord.HTTPException):
+            await channel.send(
+                embed=Embed(
+                    title="Failed to auto-ban some members",
+                    description=report.summary(),
+                    color=WARNING_COLOR,
+                ),
+            )
+
+    async def check_raid(self, checker: SpamChecker, member: discord.Member, message: discord.Message) -> bool:
+        if not checker.is_spamming(message):
+            return False
+
+        if member.guild.owner_id == member.id or self.bot.user.id == member.id:
+            return False
+
+        await self.auto_ban(checker, member, message, "Auto-ban for spamming")
+        return True
 
     async def ban_for_mention_spam(
         self,
+        checker: SpamChecker,
         mention_count: int,
         message: discord.Message,
         member: discord.Member,
@@ -41,39 +84,48 @@ class AutoMod(BaseCog):
         else:
             reason = f"Spamming mentions ({mention_count} mentions)"
 
-        async with HandleHTTPException(message.channel, title=f"Failed to ban {member}"):
-            await member.ban(reason=reason)
-
-    # parallel event running in events.py
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        try:
-            guild_id = message.guild.id
-        except AttributeError:
-            return
-
-        _guild = await Guild.get(message.guild.id, self.bot)
-        
-        if _guild.antispam:
-            with contextlib.suppress(AttributeError):
-                await self.check_raid(guild_id, message.author, message)
-
-            checker = self._spam_check[guild_id]
-            if checker.is_mention_spam(message):
-                return await self.ban_for_mention_spam(
-                    checker.mention_count,
-                    message,
-                    message.author,
-                    multiple=True,
-                )
-
-            # auto-ban tracking for mention spams begin here
-            if len(message.mentions) <= 3:
-                return
-
-            # check if it meets the thresholds required
-            mention_count = sum(not m.bot and m.id != message.author.id for m in message.mentions)
-            if mention_count < checker.mention_count:
-                return
-
-            await self.ban_for_mention_spam(mention_count, message, message.author)
+        await self.auto_ban(checker, member, message, reason)
+
+    async def cog_load(self) -> None:
+        self.bot.pipeline.add_stage("antispam", self.antispam_stage)
+
+    async def cog_unload(self) -> None:
+        self.bot.pipeline.remove_stage("antispam")
+        await self.bans.close()
+
+    async def antispam_stage(self, context: MessageContext) -> bool | None:
+        message = context.message
+        # dms, webhooks and the bot itself
+        if not isinstance(message.author, discord.Member) or message.author.id == self.bot.user.id:
+            return None
+
+        # cached, so this only queries the database the first time a guild is seen (or after it expired)
+        _guild = await context.get_guild()
+        if not _guild or not _guild.antispam:
+            return None
+
+        checker = self.get_checker(_guild)
+        if await self.check_raid(checker, message.author, message):
+            return True
+
+        if checker.is_mention_spam(message):
+            await self.ban_for_mention_spam(
+                checker,
+                checker.mention_count,
+                message,
+                message.author,
+                multiple=True,
+            )
+            return True
+
+        # auto-ban tracking for mention spams begin here
+        if len(message.mentions) <= 3:
+            return None
+
+        # check if it meets the thresholds required
+        mention_count = sum(not m.bot and m.id != message.author.id for m in message.mentions)
+        if not checker.mention_count or mention_count < checker.mention_count:
+            return None
+
+        await self.ban_for_mention_spam(checker, mention_count, message, message.author)
+        return True
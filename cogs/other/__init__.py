@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from discord import Message
-
 from .botconfig import BotConfig
 from .events import Events
 from .tasks import Tasks
@@ -15,7 +13,6 @@ if TYPE_CHECKING:
 class Other(Events, Tasks, BotConfig):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        self.message_cache: dict[int, Message] = {}
 
     """Other Class"""
 
@@ -2,8 +2,6 @@ from __future__ import annotations
 
 from typing import Any, Literal
 
-import re
-import io
 import sys
 import time
 import asyncio
@@ -14,10 +12,9 @@ from contextlib import suppress
 from string import Template
 from discord.ext import commands
 from typing_extensions import Self
-from asyncio import to_thread
 
 from constants import PERMISSIONS_URL, WARNING_COLOR
-from utils import User, Guild, get_welcome_card, extract_ids_from_discord_message_link
+from utils import MESSAGE_LINK_RE, User, Guild, MessageContext
 from core import BaseCog, Context, Dwello, Embed
 
 
@@ -31,8 +28,6 @@ class Events(BaseCog):
         guild = member.guild
         welcome = _type == "welcome"
 
-        await self.bot.db.update_counters(guild)
-
         _guild = await Guild.get(guild.id, self.bot)
         _channel = _guild.get_channel_by_type(_type)
 
@@ -72,11 +67,7 @@ class Events(BaseCog):
                 )
             _title = f"Welcome to {member.guild.name} {member.name}!"
 
-            buffer = io.BytesIO()
-            image = await to_thread(get_welcome_card, _title, member.display_avatar.url)
-            image.save(buffer, format="PNG")
-            buffer.seek(0)
-            file: discord.File = discord.File(buffer, "welcome.png")
+            file: discord.File = await self.bot.cards.welcome_card(member, _title)
         else:
             if not _message:
                 _message = "If you left, you had a reason to do so. Farewell, dweller!" # better sentence
@@ -100,6 +91,10 @@ class Events(BaseCog):
         await Guild.create(guild.id, self.bot)
         #await self.listeners.bot_join(guild)
 
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.bot.counters.forget(guild.id)
+
     # ADD THIS TO USER CUSTOMISATION
     # THUS ONLY SEND IF ENABLED
     # USER_CONFIG DICT
@@ -128,51 +123,50 @@ class Events(BaseCog):
     except discord.HTTPException:
         pass"""
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if not message.author.bot: # sometimes get the NoneType error
-            _user = await User.get(message.author.id, self.bot)
-            await _user.increase_xp(message)
-
-        #with suppress(AttributeError):
-        #await Guild.get(message.guild.id, self.bot) # for now
-
-        try:
-            _guild = await Guild.get(message.guild.id, self.bot)
-        except AttributeError:
-            _guild = None
-            
-        if message.content == f"<@{self.bot.user.id}>" and not message.author.bot:
-            prefix: str = str(self.bot.DEFAULT_PREFIXES[0])
-            content: str = f"Hello there! I'm {self.bot.user.name}. Use `{prefix}help` for more."
-            if self.bot.test_instance:
-                content = (
-                    f"Hello there! I'm {self.bot.user.name}, the test instance of Dwello, "
-                    f"but you can use me regardless. Use `{prefix}help` for more."
-                )
-            await message.reply(content=content)
+    # the cog is mixed into Other with Tasks and BotConfig, so the hooks have to chain to theirs
+    async def cog_load(self) -> None:
+        await super().cog_load()
+        pipeline = self.bot.pipeline
+        pipeline.add_stage("xp", self.xp_stage)
+        pipeline.add_stage("link_preview", self.link_preview_stage)
+        pipeline.add_stage("mention_reply", self.mention_reply_stage)
+
+    async def cog_unload(self) -> None:
+        for name in ("xp", "link_preview", "mention_reply"):
+            self.bot.pipeline.remove_stage(name)
+        await super().cog_unload()
+
+    async def xp_stage(self, context: MessageContext) -> None:
+        message = context.message
+        if message.author.bot or not message.guild:
+            return
+
+        _user = await context.get_user()
+        await _user.increase_xp(message)
 
-        # turns message link into an embed
+    async def link_preview_stage(self, context: MessageContext) -> None:
+        # turns message links into embeds
         # should be customised
-        if _guild and _guild.turn_link_into_message:  # noqa: SIM102
-            if match:= re.compile(r"https?://(.+)?.?discord\.com/channels/\d+/\d+/\d+").search(message.content):
-                link = match.group()
-                guild_id, channel_id, message_id = extract_ids_from_discord_message_link(link)
-                if (
-                    guild_id == message.guild.id
-                    and (msg := await self.bot.get_or_fetch_message(channel_id, message_id))
-                    and (not msg.channel.is_nsfw() or (msg.channel.is_nsfw() and message.channel.is_nsfw()))
-                    and msg.content
-                ):
-                    content_preview = msg.content[:300] + ('...' if len(msg.content) > 300 else '')
-                    await message.channel.send(
-                        embed=Embed(description=f"**Contents**\n{content_preview}")
-                        .set_author(name=msg.author.name, icon_url=msg.author.display_avatar.url)
-                        .add_field(name="Message", value=f"[Jump!](<{msg.jump_url}>)")
-                    )
+        if not context.guild or not MESSAGE_LINK_RE.search(context.message.content):
+            return
+
+        _guild = await context.get_guild()
+        if _guild and _guild.turn_link_into_message:
+            await self.bot.link_previews.send_previews(context.message)
+
+    async def mention_reply_stage(self, context: MessageContext) -> None:
+        message = context.message
+        if message.content != f"<@{self.bot.user.id}>" or message.author.bot:
+            return
 
-        if message.author == self.bot.user:
-            self.bot.reply_count += 1
+        prefix: str = str(self.bot.DEFAULT_PREFIXES[0])
+        content: str = f"Hello there! I'm {self.bot.user.name}. Use `{prefix}help` for more."
+        if self.bot.test_instance:
+            content = (
+                f"Hello there! I'm {self.bot.user.name}, the test instance of Dwello, "
+                f"but you can use me regardless. Use `{prefix}help` for more."
+            )
+        await message.reply(content=content)
 
     cmd_execution_times: dict[str, float] = {}
 
@@ -206,12 +200,20 @@ class Events(BaseCog):
         ctx.command.extras["times_executed"] += 1
         ctx.bot.commands_executed += 1 # could just iterate through all cmds and get their "times_executed" in extras
 
-        _guild = await Guild.get(ctx.guild.id, self.bot)
+        if context := ctx.message_context:
+            _guild = await context.get_guild()
+            _user = await context.get_user()
+        else:
+            _guild = await Guild.get(ctx.guild.id, self.bot) if ctx.guild else None
+            _user = await User.get(ctx.author.id, self.bot)
+
+        await _user.increase_command_count() # setter maybe?
+        if _guild is None:  # dms
+            return
 
         if _guild.reactions_on_command:
             with suppress(discord.NotFound):
                 await ctx.message.add_reaction("\N{WHITE HEAVY CHECK MARK}")
-        await (await User.get(ctx.author.id, self.bot)).increase_command_count() # setter maybe?
 
         await asyncio.sleep(_guild.delete_reaction_after)
         with suppress(discord.Forbidden, discord.NotFound):
@@ -222,7 +224,10 @@ class Events(BaseCog):
     
     @commands.Cog.listener("on_command_completion")
     async def on_command_completion_invoker_msg_deletion(self, ctx: Context) -> None:
-        _guild = await Guild.get(ctx.guild.id, ctx.bot)
+        if ctx.guild is None:
+            return
+
+        _guild = await ctx.message_context.get_guild() if ctx.message_context else await Guild.get(ctx.guild.id, ctx.bot)
         if _guild.delete_invoker_message and ctx.me.guild_permissions.manage_messages:
             await asyncio.sleep(_guild.delete_invoker_message_after) if _guild.delete_invoker_message_after else 0.0
             await ctx.message.delete()
@@ -237,11 +242,13 @@ class Events(BaseCog):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
+        self.bot.counters.member_joined(member)
         await User.get(member.id, self.bot)
         await self.send_welcome_or_leave_message(member, "welcome")
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
+        self.bot.counters.member_removed(member)
         await self.send_welcome_or_leave_message(member, "leave")
 
     @commands.Cog.listener()
@@ -10,6 +10,7 @@ import discord
 from discord.ext import commands
 
 from core import Context, Dwello, Embed
+from utils import Guild
 
 
 async def setup(bot: Dwello) -> None:
@@ -167,6 +168,118 @@ class Owner(commands.Cog):
 
         await ctx.send(f"Synced the tree to {ret}/{len(guilds)}.")
 
+    @commands.command(name="cache", hidden=True)
+    @commands.is_owner()
+    async def cache(self, ctx: Context) -> discord.Message:
+        """Displays hit/miss statistics of the bot's in-memory caches."""
+
+        hits, misses, evictions = Guild.cache.get_stats()
+        total = hits + misses
+
+        messages = self.bot.message_cache
+        m_hits, m_misses, m_evictions = messages.get_stats()
+        m_total = m_hits + m_misses
+
+        http_cache = self.bot.http_cache
+        endpoints: list[str] = []
+        for name, endpoint in http_cache.endpoints.items():
+            stats = endpoint.stats
+            endpoints.append(
+                f"`{name}`: `{stats.hit_rate:.0%}` of `{stats.requests}` ({stats.hits} memory, {stats.disk_hits} disk, "
+                f"{stats.coalesced} coalesced), {stats.evictions} evicted"
+            )
+        return await ctx.reply(
+            embed=Embed(title="Caches")
+            .add_field(
+                name="Guild ORM",
+                value=(
+                    f"Entries: `{len(Guild.cache)}`\n"
+                    f"Hits: `{hits}`\nMisses: `{misses}`\nEvictions: `{evictions}`\n"
+                    f"Hit rate: `{hits / total if total else 0:.2%}`"
+                ),
+            )
+            .add_field(
+                name="Messages",
+                value=(
+                    f"Entries: `{len(messages)}/{messages.maxsize}`\n"
+                    f"Memory: `{messages.bytes / 1024:.1f}/{messages.max_bytes / 1024:.0f} KiB`\n"
+                    f"Hits: `{m_hits}`\nMisses: `{m_misses}`\nEvictions: `{m_evictions}`\n"
+                    f"Hit rate: `{m_hits / m_total if m_total else 0:.2%}`\n"
+                    f"In flight: `{messages.inflight}`"
+                ),
+            )
+            .add_field(
+                name="HTTP",
+                value=(
+                    f"Entries: `{len(http_cache)}`\n"
+                    f"Memory: `{http_cache.bytes / 1024:.1f}/{http_cache.max_bytes / 1024:.0f} KiB`\n"
+                    f"In flight: `{http_cache.inflight}`\n"
+                    + "\n".join(endpoints)
+                )[:1024],
+                inline=False,
+            )
+        )
+
+    @commands.command(name="pool", hidden=True)
+    @commands.is_owner()
+    async def pool(self, ctx: Context) -> discord.Message:
+        """Displays connection pool usage and the call sites holding connections the longest."""
+
+        metrics = self.bot.pool_metrics
+        wait = metrics.acquire_wait
+        embed = (
+            Embed(title="Connection Pool")
+            .add_field(
+                name="Connections",
+                value=(
+                    f"Size: `{self.bot.pool.get_size()}/{self.bot.pool.get_max_size()}`\n"
+                    f"Idle: `{self.bot.pool.get_idle_size()}`\n"
+                    f"In use: `{metrics.in_use}` (peak `{metrics.peak_in_use}`)"
+                ),
+            )
+            .add_field(
+                name="Acquire wait",
+                value=(
+                    f"Mean: `{wait.mean * 1000:.2f}ms`\n"
+                    f"p95: `{wait.percentile(0.95) * 1000:.2f}ms`\n"
+                    f"Max: `{wait.max * 1000:.2f}ms`"
+                ),
+            )
+            .add_field(
+                name="Timeouts",
+                value=f"Acquire: `{metrics.acquire_timeouts}`\nStatement: `{metrics.statement_timeouts}`",
+            )
+        )
+        if slowest := metrics.slowest(10):
+            embed.add_field(
+                name="Call sites (count, mean, p95)",
+                value="\n".join(
+                    f"`{name}`: {h.count}, {h.mean * 1000:.1f}ms, {h.percentile(0.95) * 1000:.1f}ms"
+                    for name, h in slowest
+                )[:1024],
+                inline=False,
+            )
+        return await ctx.reply(embed=embed)
+
+    @commands.command(name="pipeline", hidden=True)
+    @commands.is_owner()
+    async def pipeline(self, ctx: Context) -> discord.Message:
+        """Displays how long each stage of the message pipeline takes."""
+
+        timings = self.bot.pipeline.timings
+        if not timings:
+            return await ctx.reply("No message stages are registered.")
+
+        return await ctx.reply(
+            embed=Embed(
+                title="Message pipeline (count, mean, p95, max)",
+                description="\n".join(
+                    f"`{name}`: {h.count}, {h.mean * 1000:.2f}ms, {h.percentile(0.95) * 1000:.1f}ms, {h.max * 1000:.1f}ms"
+                    for name, h in timings.items()
+                ),
+            )
+        )
+
     # REDO
     """@commands.command()
     @commands.is_owner()
@@ -10,6 +10,7 @@ import logging
 import os
 import re
 import sys
+import time
 
 from discord.ext import commands
 from typing_extensions import override
@@ -43,8 +44,27 @@ else:
 from constants import GITHUB, TYPING_EMOJI, COMMAND_PREVIEW_DICT
 from utils import NewEmbed as Embed
 from utils import NewTranslator as Translator
-from utils import get_avatar_dominant_color
-from utils import ENV, DataBaseOperations, Twitch
+from utils import (
+    ENV,
+    CachedMessage,
+    CardRenderer,
+    CounterUpdater,
+    DataBaseOperations,
+    Guild,
+    HTTPCache,
+    ImageResizer,
+    LinkPreviewer,
+    MessageCache,
+    MessagePipeline,
+    PoolMetrics,
+    PreparedConnection,
+    RankIndex,
+    Scheduler,
+    TokenManager,
+    Twitch,
+    XPAccumulator,
+    client_credentials,
+)
 
 from .web import AiohttpWeb as Web
 from .context import NewContext as Context
@@ -148,14 +168,28 @@ def blacklist_check(ctx: Context) -> bool:
 
 
 class ContextManager(Generic[DBT]):
-    __slots__: tuple[str, ...] = ("bot", "timeout", "_pool", "_conn", "_tr")
+    __slots__: tuple[str, ...] = (
+        "bot", "timeout", "transaction", "statement_timeout", "call_site", "_pool", "_conn", "_tr", "_acquired_at",
+    )
 
-    def __init__(self, bot: Dwello, *, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        bot: Dwello,
+        *,
+        timeout: float = 10.0,
+        transaction: bool = True,
+        statement_timeout: float | None = None,
+        call_site: str = "unknown",
+    ) -> None:
         self.bot: DBT = bot
         self.timeout: float = timeout
+        self.transaction: bool = transaction
+        self.statement_timeout: float | None = statement_timeout
+        self.call_site: str = call_site
         self._pool: Pool = bot.pool
         self._conn: Connection | None = None
         self._tr: Transaction | None = None
+        self._acquired_at: float = 0.0
 
     async def acquire(self) -> Connection:
         return await self.__aenter__()
@@ -164,21 +198,49 @@ class ContextManager(Generic[DBT]):
         return await self.__aexit__(None, None, None)
 
     async def __aenter__(self) -> Connection:
-        self._conn = conn = await self._pool.acquire(timeout=self.timeout)  # type: ignore
+        metrics = self.bot.pool_metrics
+        start = time.perf_counter()
+        try:
+            self._conn = conn = await self._pool.acquire(timeout=self.timeout)  # type: ignore
+        except asyncio.TimeoutError:
+            metrics.acquire_timeouts += 1
+            raise
+
+        self._acquired_at = time.perf_counter()
+        metrics.acquired(self._acquired_at - start)
+
         conn: Connection
-        self._tr = conn.transaction()
-        await self._tr.start()
+        try:
+            if self.transaction:
+                tr = conn.transaction()
+                await tr.start()
+                self._tr = tr
+            if self.statement_timeout is not None:
+                # SET LOCAL ends with the transaction, a plain SET is undone by the pool's reset on release
+                scope = "LOCAL " if self.transaction else ""
+                await conn.execute(f"SET {scope}statement_timeout = {int(self.statement_timeout * 1000)}")
+        except BaseException as e:
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
+
         return conn  # type: ignore
 
     async def __aexit__(self, exc_type, exc, tb):
-        if exc and self._tr:
-            await self._tr.rollback()
+        if isinstance(exc, asyncpg.QueryCanceledError):
+            self.bot.pool_metrics.statement_timeouts += 1
+
+        try:
+            if exc and self._tr:
+                await self._tr.rollback()
 
-        elif not exc and self._tr:
-            await self._tr.commit()
+            elif not exc and self._tr:
+                await self._tr.commit()
 
-        if self._conn is not None:
-            await self._pool.release(self._conn)
+        finally:
+            if self._conn is not None:
+                await self._pool.release(self._conn)
+                self._conn = None
+                self.bot.pool_metrics.released(self.call_site, time.perf_counter() - self._acquired_at)
 
 
 class ReactionTyping:
@@ -227,6 +289,23 @@ class Dwello(commands.AutoShardedBot):
         self._BotBase__cogs = commands.core._CaseInsensitiveDict()
         self.pool = pool
         self.http_session = session
+        self.http_cache: HTTPCache = HTTPCache(session, path="storage/http_cache")
+
+        # client credentials tokens, twitch's is used for igdb as well
+        self.tokens: TokenManager = TokenManager(session)
+        self.tokens.add_provider(
+            "twitch",
+            client_credentials("https://id.twitch.tv/oauth2/token", ENV["TWITCH_CLIENT_ID"], ENV["TWITCH_CLIENT_SECRET"]),
+        )
+        self.tokens.add_provider(
+            "spotify",
+            client_credentials(
+                "https://accounts.spotify.com/api/token",
+                ENV["SPOTIFY_CLIENT_ID"],
+                ENV["SPOTIFY_CLIENT_SECRET"],
+                basic_auth=True,
+            ),
+        )
 
         self.repo = GITHUB
 
@@ -250,12 +329,19 @@ class Dwello(commands.AutoShardedBot):
 
         # redo except db
         self.db: DataBaseOperations = DataBaseOperations(self)
+        self.xp_accumulator: XPAccumulator = XPAccumulator(self)
+        self.ranks: RankIndex = RankIndex(self)
+        self.pool_metrics: PoolMetrics = PoolMetrics()
+        self.scheduler: Scheduler = Scheduler(self)
+        self.counters: CounterUpdater = CounterUpdater(self)
         # maybe make it a pool if no funcs (that are bound to this db class) are triggered?
         self.web = Web(self)
 
-        # Caching Variables (for now)
-        # TODO: Use LRU Cache
-        self.message_cache: dict[int, discord.Message] = {}
+        self.message_cache: MessageCache = MessageCache()
+        self.link_previews: LinkPreviewer = LinkPreviewer(self)
+        self.cards: CardRenderer = CardRenderer(self)
+        self.resizer: ImageResizer = ImageResizer()
+        self.pipeline: MessagePipeline = MessagePipeline(self)
 
     @property
     def color(self) -> discord.Color | None:
@@ -297,12 +383,15 @@ class Dwello(commands.AutoShardedBot):
                     command.extras["preview"] = COMMAND_PREVIEW_DICT.get(key)
 
         self.tables = await self.db.create_tables()
+        # connections opened before the schema existed (or changed) couldn't prepare every statement
+        await self.pool.expire_connections()
         #self.db_data = await self.db.fetch_table_data()
         self.guild_prefixes = dict(
             await self.pool.fetch("SELECT guild_id, array_agg(prefix) FROM prefixes GROUP BY guild_id")
         )
         blacklist: list[asyncpg.Record] = await self.pool.fetch("SELECT * FROM blacklist")
-        self.twitch = await Twitch.create_access_token(self)
+        self.tokens.start()
+        self.twitch = Twitch(self)
         for record in blacklist:
             self.blacklisted_users[record["user_id"]] = record["reason"]
 
@@ -317,9 +406,27 @@ class Dwello(commands.AutoShardedBot):
         )"""
 
         await self.tree.set_translator(Translator(self.http_session))
+        await asyncio.to_thread(self.http_cache.prune)
+
+        self.xp_accumulator.start()
+        self.ranks.start()
+        self.scheduler.start()
 
         asyncio.create_task(self.web.run(port=8081))
 
+    @override
+    async def close(self) -> None:
+        self.scheduler.close()
+        self.counters.close()
+        self.ranks.close()
+        self.tokens.close()
+        self.cards.close()
+        try:
+            await self.xp_accumulator.close()
+        except Exception as e:
+            self.logger.error("Failed to flush pending xp", exc_info=e)
+        await super().close()
+
     async def is_owner(self, user: discord.User | discord.Member) -> bool:
         """This makes jishaku usable by any of the team members or the application owner if the bot isn't in a team"""
         ids = set()
@@ -334,8 +441,35 @@ class Dwello(commands.AutoShardedBot):
 
         return True if user.id in ids else await super().is_owner(user)
 
-    def safe_connection(self, *, timeout: float = 10.0) -> ContextManager:
-        return ContextManager(self, timeout=timeout)
+    def safe_connection(
+        self,
+        *,
+        timeout: float = 10.0,
+        transaction: bool = True,
+        statement_timeout: float | None = None,
+        call_site: str | None = None,
+    ) -> ContextManager:
+        """
+        Acquires a connection from the pool, wrapped in a transaction unless ``transaction`` is False.
+
+        Single statements, read-only lookups in particular, are atomic on their own and can skip the
+        BEGIN/COMMIT round trips with ``transaction=False``. ``statement_timeout`` (seconds) makes postgres
+        cancel queries running longer than that. Acquire waits and the time the connection was held for are
+        recorded in :attr:`pool_metrics`, by ``call_site`` (the calling function if not given).
+        """
+
+        if call_site is None:
+            frame = sys._getframe(1)
+            code = frame.f_code
+            call_site = f"{frame.f_globals.get('__name__')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+        return ContextManager(
+            self,
+            timeout=timeout,
+            transaction=transaction,
+            statement_timeout=statement_timeout,
+            call_site=call_site,
+        )
 
     def is_blacklisted(self, user_id: int) -> bool:
         return user_id in self.blacklisted_users  # rewrite member and user and put it there as a property
@@ -381,6 +515,11 @@ class Dwello(commands.AutoShardedBot):
         self.logger.info(f"{col()}Python Version: {sys.version} {col()}")
         self.logger.info(f"{col()}Discord Version: {discord.__version__} {col()}")
         self.logger.info(f"{col(2, bg=True)}Logged in as {self.user} {col()}")
+
+        if not self._was_ready:  # warm up the guild cache with a single query
+            guilds = await Guild.get_many([guild.id for guild in self.guilds], self)
+            # catch up on joins and leaves that happened while offline
+            self.counters.touch(*[_id for _id, _guild in guilds.items() if _guild.filtered_counter_ids])
         self._was_ready = True
 
         if self.user.id == 1125762669056630915:
@@ -391,7 +530,7 @@ class Dwello(commands.AutoShardedBot):
             self.uptime = datetime.datetime.now(datetime.timezone.utc)
 
         if not hasattr(self, "default_color"):
-            self.default_color = await get_avatar_dominant_color(self.user)
+            self.default_color = await self.cards.dominant_colour(self.user)
             Embed.bot_dominant_colour = self.default_color
 
     @override
@@ -435,7 +574,7 @@ class Dwello(commands.AutoShardedBot):
         self,
         channel: ...,
         message: ...,
-    ) -> discord.Message | None:
+    ) -> discord.Message | CachedMessage | None:
         ...
 
     @overload
@@ -447,14 +586,14 @@ class Dwello(commands.AutoShardedBot):
         partial: bool = ...,
         force_fetch: bool = ...,
         dm_allowed: bool = ...,
-    ) -> discord.Message | discord.PartialMessage | None:
+    ) -> discord.Message | discord.PartialMessage | CachedMessage | None:
         ...
 
     @overload
     async def get_or_fetch_message(
         self,
         channel: str | int,
-    ) -> discord.Message | None:
+    ) -> discord.Message | CachedMessage | None:
         ...
 
     async def get_or_fetch_message(
@@ -465,26 +604,32 @@ class Dwello(commands.AutoShardedBot):
         partial: bool = False,
         force_fetch: bool = False,
         dm_allowed: bool = False,
-    ) -> discord.Message | discord.PartialMessage | None:
+    ) -> discord.Message | discord.PartialMessage | CachedMessage | None:
+        """
+        Returns the message from discord.py's cache, then :attr:`message_cache` (as a compact :class:`CachedMessage`),
+        and only fetches it if neither has it. ``force_fetch`` always fetches the full message.
+        """
+
         if message is None:
             dummy_message = str(channel)
             if link := LINKS_RE.match(dummy_message):
                 dummy_message_id = int(link.string.split("/")[-1])
-                if dummy_message_id in self.message_cache:
-                    return self.message_cache[dummy_message_id]
+                if msg := self._connection._get_message(dummy_message_id):
+                    return msg
+                if not force_fetch and (cached := self.message_cache.get(dummy_message_id)) is not None:
+                    return cached
 
                 dummy_channel_id = int(link.string.split("/")[-2])
                 dummy_channel = await self.getch(self.get_channel, self.fetch_channel, dummy_channel_id)
                 if dummy_channel is not None and force_fetch:
-                    msg = await dummy_channel.fetch_message(dummy_message_id)
-                    if msg:
-                        self.message_cache[msg.id] = msg
-                    return msg
+                    return await self.message_cache.fetch(dummy_channel, dummy_message_id)
+                return None
 
             try:
-                return self.message_cache[int(dummy_message)]
-            except (ValueError, KeyError):
+                dummy_message_id = int(dummy_message)
+            except ValueError:
                 return None
+            return self._connection._get_message(dummy_message_id) or self.message_cache.get(dummy_message_id)
 
         message = int(message)
 
@@ -498,30 +643,71 @@ class Dwello(commands.AutoShardedBot):
             raise ValueError("DMChannel is not allowed")
 
         if force_fetch:
-            msg = await channel.fetch_message(message)  # type: ignore
-            self.message_cache[message] = msg
-            return msg
+            return await self.message_cache.fetch(channel, message)  # type: ignore
 
         if msg := self._connection._get_message(message):
-            self.message_cache[message] = msg
             return msg
 
         if partial:
             return channel.get_partial_message(message)  # type: ignore
 
+        if (cached := self.message_cache.get(message)) is not None:
+            return cached
+
         try:
-            msg = self.message_cache[message]
-            return msg
-        except KeyError:
-            async for msg in channel.history(  # type: ignore
-                limit=1,
-                before=discord.Object(message + 1),
-                after=discord.Object(message - 1),
-            ):
-                self.message_cache[message] = msg
-                return msg
+            return await self.message_cache.fetch(channel, message)  # type: ignore
+        except discord.NotFound:
+            return None
+
+    async def get_cached_message(self, channel_id: int, message_id: int) -> CachedMessage | None:
+        """
+        Returns a compact :class:`CachedMessage` from :attr:`message_cache`, fetching the message on a miss.
+        Meant for previews and lookups that don't need a full :class:`discord.Message`.
+        """
 
-        return None
+        if cached := self.message_cache.get(message_id):
+            return cached
+
+        if msg := self._connection._get_message(message_id):
+            return self.message_cache.put(msg)
+
+        channel = await self.getch(self.get_channel, self.fetch_channel, channel_id)
+        if channel is None:
+            return None
+
+        try:
+            return await self.message_cache.get_or_fetch(channel, message_id)
+        except discord.HTTPException:
+            return None
+
+    @override
+    async def on_message(self, message: discord.Message) -> None:
+        if message.author == self.user:
+            self.reply_count += 1
+            return
+
+        # antispam, xp and the rest run in the background and share the guild and user lookups with the command,
+        # which doesn't wait for them (like it didn't when they were separate listeners)
+        context = self.pipeline.start(message)
+        if message.author.bot:
+            return
+
+        ctx: Context = await self.get_context(message)
+        ctx.message_context = context
+        await self.invoke(ctx)
+
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        self.message_cache.invalidate(payload.message_id)
+        self.link_previews.invalidate(payload.channel_id, payload.message_id)
+
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent) -> None:
+        for message_id in payload.message_ids:
+            self.message_cache.invalidate(message_id)
+            self.link_previews.invalidate(payload.channel_id, message_id)
+
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent) -> None:
+        self.message_cache.invalidate(payload.message_id)
+        self.link_previews.invalidate(payload.channel_id, payload.message_id)
 
     async def getch(self, get_function, fetch_function, *args, **kwargs) -> Any:
         if args[0] <= 0:
@@ -539,7 +725,11 @@ async def runner():
         "port": ENV["pg_port"],
     }
 
-    async with asyncpg.create_pool(**credentials) as pool, aiohttp.ClientSession() as session, Dwello(pool, session) as bot:
+    async with asyncpg.create_pool(
+        **credentials,
+        connection_class=PreparedConnection,
+        init=PreparedConnection.prepare_statements,
+    ) as pool, aiohttp.ClientSession() as session, Dwello(pool, session) as bot:
         await bot.start(ENV["token"])
 
 
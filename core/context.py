@@ -13,7 +13,7 @@ import discord
 from discord.ext import commands
 from typing_extensions import override
 
-from utils import NewView, Guild
+from utils import NewView, Guild, MessageContext
 
 T = TypeVar("T")
 
@@ -114,7 +114,8 @@ class NewContext(commands.Context):  # [commands.Bot], Generic[T]
 
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
-        # maybe somehow set orm_guild in here, so i wouldnt have to fetch it everytime
+        # set by the bot for message commands, holds the guild and user rows the message pipeline already loaded
+        self.message_context: MessageContext | None = None
 
     @staticmethod
     def with_type(func: Callable[..., Any]) -> Callable[..., Any]:
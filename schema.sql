@@ -75,6 +75,11 @@ CREATE TABLE IF NOT EXISTS prefixes(
     PRIMARY KEY (prefix, guild_id)
 );
 
+CREATE TABLE IF NOT EXISTS scheduled_jobs(
+    name TEXT PRIMARY KEY,
+    last_run TIMESTAMP WITH TIME ZONE
+);
+
 CREATE TABLE IF NOT EXISTS todo(
     id SERIAL PRIMARY KEY,
     user_id BIGINT NOT NULL,
@@ -105,6 +110,8 @@ CREATE TABLE IF NOT EXISTS users(
     command_count BIGINT DEFAULT 0
 );
 
+CREATE INDEX IF NOT EXISTS users_total_xp_idx ON users (total_xp DESC);
+
 CREATE TABLE IF NOT EXISTS user_config(
     user_id BIGINT PRIMARY KEY REFERENCES users(id),
     notify_user_on_levelup BOOLEAN DEFAULT FALSE
@@ -1,15 +1,29 @@
 from .antispam import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .bans import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .botfuncs import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .cache import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .cards import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .config import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .counters import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .database.accumulator import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .database.metrics import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .database.operations import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .database.orm import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .database.ranks import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .database.statements import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .dpy.embed import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .dpy.view import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .errorhandlers import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .flags import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .games.blackjack import * # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .http_cache import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .messages import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .paginator import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .pipeline import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .previews import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .scheduler import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .spotify import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .pillow import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
+from .tokens import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .translator import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
 from .twitch import *  # noqa: F401, F403  # pylint: disable=unused-wildcard-import
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
 import datetime
-from collections.abc import MutableMapping
+import itertools
+import sys
+import time
+import weakref
+from array import array
+from collections.abc import Callable, Hashable, MutableMapping
+from typing import TYPE_CHECKING, ClassVar
 
 import discord
-from discord.ext import commands
 
 from .cache import ExpiringCache, cache  # noqa: F401
 from .flags import BaseFlags, flag_value
 
+if TYPE_CHECKING:
+    from .database.orm import Guild
+
 
 class AutoModFlags(BaseFlags):
     @flag_value
@@ -89,9 +97,183 @@ class AutoModFlags(BaseFlags):
             await member.add_roles(discord.Object(id=self.mute_role_id), reason=reason)"""
 
 
-class CooldownByContent(commands.CooldownMapping):
-    def _bucket_key(self, message: discord.Message) -> tuple[int, str]:
-        return (message.channel.id, message.content)
+# approximate bytes a ring with its first two timestamps takes over a single timestamp
+_RING_COST = sys.getsizeof(array("d", (0.0, 0.0, 0.0))) - sys.getsizeof(0.0)
+
+
+class SlidingWindow:
+    """
+    Per-key sliding window allowing ``rate`` events every ``per`` seconds.
+
+    A key with a single event only keeps its timestamp. From the second one on it owns a ring buffer of its
+    last timestamps in an ``array('d')`` (slot 0 holds the index of the oldest timestamp), which grows with
+    the key's events up to ``rate`` of them, so a hit is O(1) and a quiet key only takes the slots it used.
+    Keys without events in the last ``per`` seconds are swept every ``per / 2`` seconds. Windows are created
+    through :meth:`SpamEngine.window`, which also sweeps idle keys and caps their memory.
+    """
+
+    __slots__ = ("engine", "rate", "per", "cost", "next_sweep", "_rings", "__weakref__")
+
+    def __init__(self, engine: SpamEngine, rate: int, per: float) -> None:
+        self.engine: SpamEngine = engine
+        self.rate: int = rate
+        self.per: float = per
+        # approximate bytes a key with a single event takes: the timestamp, the dict slot and the key itself
+        self.cost: int = sys.getsizeof(0.0) + SpamEngine.KEY_OVERHEAD
+        self.next_sweep: float = engine.clock() + per / 2
+        self._rings: dict[Hashable, float | array[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def _size(self, ring: float | array[float]) -> int:
+        if isinstance(ring, float):
+            return self.cost
+        return self.cost + _RING_COST + 8 * (len(ring) - 2)
+
+    def _last(self, ring: float | array[float]) -> float:
+        if isinstance(ring, float):
+            return ring
+        if len(ring) <= self.rate:
+            return ring[-1]
+        return ring[1 + (int(ring[0]) - 1) % self.rate]
+
+    def hit(self, key: Hashable, now: float, tokens: int = 1) -> bool:
+        """Records ``tokens`` events for ``key``. Returns True if that puts it over the rate."""
+
+        if tokens <= 0:
+            return False
+
+        rate, cutoff = self.rate, now - self.per
+        ring = self._rings.get(key)
+        if ring is None:
+            self.engine._grow(self.cost, now)
+            if tokens == 1 and rate > 1:
+                self._rings[key] = now
+                return self._after_hit(now, False)
+            ring = self._rings[key] = array("d", (0.0,))
+            # the first timestamp is counted below, with the rest
+            self.engine._grow(_RING_COST - 8, now)
+        elif isinstance(ring, float):
+            ring = self._rings[key] = array("d", (0.0, ring))
+            self.engine._grow(_RING_COST, now)
+
+        head, size = int(ring[0]), len(ring) - 1
+        if size < rate:
+            # not full yet, so the timestamps are in order from slot 1 and the head stays at 0;
+            # over the rate if the event that has to have left the window is still inside it
+            oldest = size + tokens - rate
+            exceeded = tokens > rate or (oldest > 0 and ring[oldest] > cutoff)
+            grown = min(tokens, rate - size)
+            ring.extend(itertools.repeat(now, grown))
+            self.engine._grow(8 * grown, now)
+            tokens -= grown
+        else:
+            # over the rate if the `tokens`-th oldest of the last `rate` events is still inside the window
+            exceeded = tokens > rate or ring[1 + (head + tokens - 1) % rate] > cutoff
+
+        for _ in range(min(tokens, rate)):
+            ring[1 + head] = now
+            head = (head + 1) % rate
+        ring[0] = head
+        return self._after_hit(now, exceeded)
+
+    def _after_hit(self, now: float, exceeded: bool) -> bool:
+        if now >= self.next_sweep:
+            self.engine.bytes -= self.sweep(now)
+        if now >= self.engine.next_sweep:
+            self.engine.sweep(now)
+        return exceeded
+
+    def sweep(self, now: float) -> int:
+        """Drops keys without events in the last ``per`` seconds. Returns the bytes freed."""
+
+        self.next_sweep = now + self.per / 2
+        cutoff = now - self.per
+        idle = [key for key, ring in self._rings.items() if self._last(ring) <= cutoff]
+        return sum(self._size(self._rings.pop(key)) for key in idle)
+
+    def evict(self, amount: int) -> tuple[int, int]:
+        """Drops up to ``amount`` of the longest tracked keys. Returns the amount dropped and the bytes freed."""
+
+        keys = list(itertools.islice(self._rings, amount))
+        return len(keys), sum(self._size(self._rings.pop(key)) for key in keys)
+
+
+class SpamEngine:
+    """
+    Owns the :class:`SlidingWindow`s of every :class:`SpamChecker`, across all guilds.
+
+    Idle keys of every window are swept every ``sweep_interval`` seconds (windows that are hit also sweep
+    themselves every ``per / 2`` seconds), and once the keys of all windows together
+    take more than ``max_bytes`` the longest tracked ones are dropped (after a sweep), so a raid over
+    many guilds can't grow the antispam state without bound. Every window reads the same :attr:`clock`.
+
+    Parameters
+    ----------
+    max_bytes: :class:`int`
+        Approximate memory cap of all windows together. (Default: 16 MiB)
+    sweep_interval: :class:`float`
+        Seconds between sweeps of idle keys. (Default: 60.0)
+    clock: Callable[[], float]
+        Returns the current time in seconds. (Default: :func:`time.time`)
+    """
+
+    KEY_OVERHEAD: ClassVar[int] = 100
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int = 16 * 1024 * 1024,
+        sweep_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_bytes: int = max_bytes
+        self.sweep_interval: float = sweep_interval
+        self.clock: Callable[[], float] = clock
+
+        self.bytes: int = 0
+        self.evictions: int = 0
+        self.next_sweep: float = clock() + sweep_interval
+        self._windows: weakref.WeakSet[SlidingWindow] = weakref.WeakSet()
+
+    def window(self, rate: int, per: float) -> SlidingWindow:
+        if rate < 1:
+            raise ValueError("rate has to be at least 1")
+
+        window = SlidingWindow(self, rate, per)
+        self._windows.add(window)
+        return window
+
+    def discard(self, window: SlidingWindow) -> None:
+        """Stops tracking a window that is being replaced, releasing its keys from the memory cap."""
+
+        self._windows.discard(window)
+        self.bytes -= sum(window._size(ring) for ring in window._rings.values())
+        window._rings.clear()
+
+    def _grow(self, cost: int, now: float) -> None:
+        self.bytes += cost
+        if self.bytes > self.max_bytes:
+            self.sweep(now)
+            self._shrink()
+
+    def sweep(self, now: float) -> None:
+        self.next_sweep = now + self.sweep_interval
+        for window in list(self._windows):
+            self.bytes -= window.sweep(now)
+
+    def _shrink(self) -> None:
+        # drop an equal share of every window, oldest keys first, until a tenth below the cap
+        target = self.max_bytes * 9 // 10
+        windows = [window for window in self._windows if len(window)]
+        while self.bytes > target and windows:
+            excess = self.bytes - target
+            for window in windows:
+                dropped, freed = window.evict(max(1, excess // (window.cost * len(windows))))
+                self.bytes -= freed
+                self.evictions += dropped
+            windows = [window for window in windows if len(window)]
 
 
 class SpamChecker:
@@ -107,31 +289,62 @@ class SpamChecker:
     just catches regular singular spam bots.
 
     From experience these values aren't reached unless someone is actively spamming.
+
+    The windows are :class:`SlidingWindow`s of the given (usually shared) :class:`SpamEngine`.
+    Unlike the fixed windows of :class:`~discord.ext.commands.CooldownMapping` used before, which start
+    at the first message and reset ``per`` seconds later, these count the last ``per`` seconds at every
+    message. A burst split over a reset (e.g. 8 messages at the end of one window and 8 at the start of
+    the next) is now flagged, so expect somewhat more users to be flagged on the same traffic.
     """
 
-    def __init__(self) -> None:
-        self.by_content = CooldownByContent.from_cooldown(15, 17.0, commands.BucketType.member)
-        self.by_user = commands.CooldownMapping.from_cooldown(10, 12.0, commands.BucketType.user)
+    RAID_MODE_DURATION: ClassVar[float] = 300.0
+
+    def __init__(self, engine: SpamEngine | None = None) -> None:
+        self.engine: SpamEngine = engine or SpamEngine()
+        # keyed by hash((channel_id, content)), the content itself isn't kept
+        self.by_content: SlidingWindow = self.engine.window(15, 17.0)
+        self.by_user: SlidingWindow = self.engine.window(10, 12.0)
         self.last_join: datetime.datetime | None = None
-        self.new_user = commands.CooldownMapping.from_cooldown(30, 35.0, commands.BucketType.channel)
-        self._by_mentions: commands.CooldownMapping | None = None
-        self._by_mentions_rate: int | None = None
+        self.new_user: SlidingWindow = self.engine.window(30, 35.0)
+        self._by_mentions: SlidingWindow | None = None
 
         # user_id flag mapping (for about 30 minutes)
         self.fast_joiners: MutableMapping[int, bool] = ExpiringCache(seconds=1800.0)
-        self.hit_and_run = commands.CooldownMapping.from_cooldown(10, 12, commands.BucketType.channel)
+        self.hit_and_run: SlidingWindow = self.engine.window(10, 12.0)
+
+        # hydrated from the guild config, see :meth:`configure`
+        self.mention_count: int = 5
+
+        # more than 4 auto-bans in 30 seconds put the guild in raid mode for RAID_MODE_DURATION seconds
+        self.auto_bans: SlidingWindow = self.engine.window(4, 30.0)
+        self.raid_mode_until: float = 0.0
 
-        self.mention_count = 5  # add to guild config table instead
-        # how do i fetch ^ from db if i dont have async?
+    def configure(self, _guild: Guild) -> None:
+        """Applies the thresholds of the guild's config, on creation and whenever the config changes."""
 
-    def by_mentions(self) -> commands.CooldownMapping | None:
+        self.mention_count = _guild.antispam_mention_count or 0
+
+    @property
+    def raid_mode(self) -> bool:
+        return self.engine.clock() < self.raid_mode_until
+
+    def record_ban(self) -> bool:
+        """Records an auto-ban. Returns whether the guild is (now) in raid mode."""
+
+        now = self.engine.clock()
+        if self.auto_bans.hit(0, now):
+            self.raid_mode_until = now + self.RAID_MODE_DURATION
+        return now < self.raid_mode_until
+
+    def by_mentions(self) -> SlidingWindow | None:
         if not self.mention_count:
             return None
 
         mention_threshold = self.mention_count * 2 # hm, why *2
-        if self._by_mentions_rate != mention_threshold:
-            self._by_mentions = commands.CooldownMapping.from_cooldown(mention_threshold, 12, commands.BucketType.member)
-            self._by_mentions_rate = mention_threshold
+        if self._by_mentions is None or self._by_mentions.rate != mention_threshold:
+            if self._by_mentions is not None:
+                self.engine.discard(self._by_mentions)
+            self._by_mentions = self.engine.window(mention_threshold, 12.0)
         return self._by_mentions
 
     def is_new(self, member: discord.Member) -> bool:
@@ -144,24 +357,19 @@ class SpamChecker:
         if message.guild is None:
             return False
 
-        current = message.created_at.timestamp()
+        current = self.engine.clock()
+        channel_id = message.channel.id
 
-        if message.author.id in self.fast_joiners:
-            bucket = self.hit_and_run.get_bucket(message)
-            if bucket and bucket.update_rate_limit(current):
-                return True
+        if message.author.id in self.fast_joiners and self.hit_and_run.hit(channel_id, current):
+            return True
 
-        if self.is_new(message.author):  # type: ignore
-            new_bucket = self.new_user.get_bucket(message)
-            if new_bucket and new_bucket.update_rate_limit(current):
-                return True
+        if self.is_new(message.author) and self.new_user.hit(channel_id, current):  # type: ignore
+            return True
 
-        user_bucket = self.by_user.get_bucket(message)
-        if user_bucket and user_bucket.update_rate_limit(current):
+        if self.by_user.hit(message.author.id, current):
             return True
 
-        content_bucket = self.by_content.get_bucket(message)
-        if content_bucket and content_bucket.update_rate_limit(current):
+        if self.by_content.hit(hash((channel_id, message.content)), current):
             return True
 
         return False
@@ -178,11 +386,9 @@ class SpamChecker:
         return is_fast
 
     def is_mention_spam(self, message: discord.Message) -> bool:  # config:
-        mapping = self.by_mentions()
-        if mapping is None:
+        window = self.by_mentions()
+        if window is None:
             return False
 
-        current = message.created_at.timestamp()
-        mention_bucket = mapping.get_bucket(message, current)
         mention_count = sum(not m.bot and m.id != message.author.id for m in message.mentions)
-        return mention_bucket is not None and mention_bucket.update_rate_limit(current, tokens=mention_count) is not None
+        return window.hit(message.author.id, self.engine.clock(), tokens=mention_count)
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Callable, Coroutine
+from typing import Any, Protocol
+
+import discord
+
+from .cache import ExpiringCache
+
+log = logging.getLogger(__name__)
+
+
+class BanHTTPClient(Protocol):
+    """
+    The part of :class:`discord.http.HTTPClient` used for banning, so a fake one can be passed in tests.
+
+    ``bulk_ban(guild_id, user_ids, delete_message_seconds, reason=...)`` is used as well if the client has it,
+    it's only there on discord.py versions supporting the bulk ban endpoint.
+    """
+
+    def ban(
+        self, user_id: int, guild_id: int, delete_message_seconds: int = 86400, reason: str | None = None,
+    ) -> Coroutine[Any, Any, Any]:
+        ...
+
+
+class BanReport:
+    """Counts of what happened to the bans of a guild, instead of a message for every failure."""
+
+    __slots__ = ("banned", "failed", "errors", "last_error")
+
+    def __init__(self) -> None:
+        self.banned: int = 0
+        self.failed: int = 0
+        # error text -> amount of bans it failed
+        self.errors: Counter[str] = Counter()
+        self.last_error: str | None = None
+
+    def __repr__(self) -> str:
+        return f"<BanReport banned={self.banned} failed={self.failed}>"
+
+    def record_failure(self, amount: int, error: str) -> None:
+        self.failed += amount
+        self.errors[error] += amount
+        self.last_error = error
+
+    def merge(self, other: BanReport) -> None:
+        self.banned += other.banned
+        self.failed += other.failed
+        self.errors.update(other.errors)
+        self.last_error = other.last_error or self.last_error
+
+    def summary(self) -> str:
+        lines = [f"Banned: `{self.banned}`", f"Failed: `{self.failed}`"]
+        lines.extend(f"`{amount}x` {error}" for error, amount in self.errors.most_common(5))
+        return "\n".join(lines)
+
+
+class _GuildBanQueue:
+    __slots__ = ("pending", "banning", "banned", "batch", "task", "semaphore", "report")
+
+    def __init__(self, concurrency: int) -> None:
+        # user id -> reason
+        self.pending: dict[int, str | None] = {}
+        # user ids taken from pending whose bans are being sent
+        self.banning: set[int] = set()
+        # recently banned user ids, so members still sending messages aren't banned twice
+        self.banned: ExpiringCache[int, bool] = ExpiringCache(3600.0, maxsize=10_000)
+        self.batch: bool = False
+        self.task: asyncio.Task[None] | None = None
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+        self.report: BanReport = BanReport()
+
+
+class BanExecutor:
+    """
+    Bans members from a worker per guild, so the message handler never awaits a ban itself.
+
+    Members already queued or banned within the last hour are skipped. Whatever is queued when the worker
+    gets to it is banned together: with the bulk ban endpoint (up to :attr:`BULK_LIMIT` users per request,
+    one request per reason) if the HTTP client supports it, with single bans otherwise. A guild never has more
+    than ``concurrency`` ban requests running at once. Results add up in :meth:`get_report`, and ``on_report``
+    is called once per drained queue that had failures, rather than once per failure.
+
+    Parameters
+    ----------
+    http: :class:`BanHTTPClient`
+        Usually ``bot.http``.
+    concurrency: :class:`int`
+        Maximum amount of concurrent ban requests per guild. (Default: 2)
+    linger: :class:`float`
+        Seconds a batch queued with ``batch=True`` (raids) waits for more members. (Default: 1.0)
+    on_report: Callable[[int, BanReport], Coroutine] | None
+        Called with the guild id and the report of the drained queue, if any of its bans failed.
+    """
+
+    BULK_LIMIT: int = 200
+    DELETE_MESSAGE_SECONDS: int = 86400
+
+    def __init__(
+        self,
+        http: BanHTTPClient,
+        *,
+        concurrency: int = 2,
+        linger: float = 1.0,
+        on_report: Callable[[int, BanReport], Coroutine[Any, Any, Any]] | None = None,
+    ) -> None:
+        self.http: BanHTTPClient = http
+        self.concurrency: int = concurrency
+        self.linger: float = linger
+        self.on_report: Callable[[int, BanReport], Coroutine[Any, Any, Any]] | None = on_report
+
+        self._queues: dict[int, _GuildBanQueue] = {}
+
+    def __len__(self) -> int:
+        return sum(len(queue.pending) for queue in self._queues.values())
+
+    def _get_queue(self, guild_id: int) -> _GuildBanQueue:
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = _GuildBanQueue(self.concurrency)
+        return queue
+
+    def get_report(self, guild_id: int) -> BanReport | None:
+        queue = self._queues.get(guild_id)
+        return queue.report if queue else None
+
+    def forget(self, guild_id: int) -> None:
+        if (queue := self._queues.pop(guild_id, None)) and queue.task is not None:
+            queue.task.cancel()
+
+    def is_queued(self, guild_id: int, user_id: int) -> bool:
+        """Whether the user is waiting to be banned or was banned recently."""
+
+        queue = self._queues.get(guild_id)
+        return queue is not None and (
+            user_id in queue.pending or user_id in queue.banning or queue.banned.peek(user_id) is not None
+        )
+
+    def put(self, guild_id: int, user_id: int, *, reason: str | None = None, batch: bool = False) -> bool:
+        """
+        Queues a ban. Returns False if the user is already queued or was banned recently.
+
+        ``batch`` makes the worker wait :attr:`linger` seconds for more bans before starting, during raids.
+        """
+
+        if self.is_queued(guild_id, user_id):
+            return False
+
+        queue = self._get_queue(guild_id)
+
+        queue.pending[user_id] = reason
+        queue.batch = queue.batch or batch
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._work(guild_id, queue))
+        return True
+
+    async def _work(self, guild_id: int, queue: _GuildBanQueue) -> None:
+        report = BanReport()
+        try:
+            while queue.pending:
+                if queue.batch:
+                    await asyncio.sleep(self.linger)
+
+                pending, queue.pending, queue.batch = queue.pending, {}, False
+                by_reason: dict[str | None, list[int]] = {}
+                for user_id, reason in pending.items():
+                    by_reason.setdefault(reason, []).append(user_id)
+
+                queue.banning.update(pending)
+                try:
+                    await asyncio.gather(
+                        *(
+                            self._ban_many(guild_id, queue, user_ids, reason, report)
+                            for reason, user_ids in by_reason.items()
+                        )
+                    )
+                finally:
+                    queue.banning.difference_update(pending)
+        finally:
+            queue.task = None
+            queue.report.merge(report)
+
+        if report.failed and self.on_report is not None:
+            try:
+                await self.on_report(guild_id, report)
+            except Exception as e:
+                log.error("Failed to report bans of guild %s", guild_id, exc_info=e)
+
+    async def _ban_many(
+        self, guild_id: int, queue: _GuildBanQueue, user_ids: list[int], reason: str | None, report: BanReport,
+    ) -> None:
+        bulk_ban = getattr(self.http, "bulk_ban", None)
+        if bulk_ban is None or len(user_ids) == 1:
+            await asyncio.gather(*(self._ban(guild_id, queue, user_id, reason, report) for user_id in user_ids))
+            return
+
+        for i in range(0, len(user_ids), self.BULK_LIMIT):
+            chunk = user_ids[i : i + self.BULK_LIMIT]
+            async with queue.semaphore:
+                try:
+                    data = await bulk_ban(guild_id, chunk, self.DELETE_MESSAGE_SECONDS, reason=reason)
+                except discord.Forbidden:
+                    forbidden = True
+                except discord.HTTPException as e:
+                    report.record_failure(len(chunk), e.text or str(e.status))
+                    continue
+                else:
+                    forbidden = False
+
+            if forbidden:
+                # bulk bans need manage guild on top of ban members, which the bot might not have
+                await asyncio.gather(*(self._ban(guild_id, queue, user_id, reason, report) for user_id in chunk))
+                continue
+
+            banned = [int(user_id) for user_id in data.get("banned_users", [])]
+            for user_id in banned:
+                queue.banned[user_id] = True
+            report.banned += len(banned)
+            if failed := data.get("failed_users"):
+                report.record_failure(len(failed), "Not bannable")
+
+    async def _ban(self, guild_id: int, queue: _GuildBanQueue, user_id: int, reason: str | None, report: BanReport) -> None:
+        async with queue.semaphore:
+            try:
+                await self.http.ban(user_id, guild_id, self.DELETE_MESSAGE_SECONDS, reason=reason)
+            except discord.HTTPException as e:
+                report.record_failure(1, e.text or str(e.status))
+                return
+
+        queue.banned[user_id] = True
+        report.banned += 1
+
+    async def close(self) -> None:
+        """Waits for the bans that are already queued."""
+
+        tasks = [queue.task for queue in self._queues.values() if queue.task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
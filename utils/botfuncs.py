@@ -32,6 +32,20 @@ def extract_ids_from_discord_message_link(link) -> tuple[int, int, int] | None:
     return None
 
 
+MESSAGE_LINK_RE = re.compile(r"https?://(?:[a-z]+\.)?discord(?:app)?\.com/channels/(\d+)/(\d+)/(\d+)")
+
+
+def extract_message_links(content: str, *, limit: int | None = None) -> list[tuple[int, int, int]]:
+    """Returns the unique (guild_id, channel_id, message_id) of every message link in ``content``, in order."""
+
+    links: dict[tuple[int, int, int], None] = {}
+    for match in MESSAGE_LINK_RE.finditer(content):
+        links[(int(match[1]), int(match[2]), int(match[3]))] = None
+        if limit is not None and len(links) >= limit:
+            break
+    return list(links)
+
+
 def capitalize_greek_numbers(text):
     pattern = r"\b(?=[MDCLXVIΙΙ]+)\b(M{0,4}(CM|CD|D?C{0,3})(XC|XL|L?X{0,3})(IX|IV|V?I{0,2})(?!\S))\b"
     return re.sub(pattern, lambda match: match.group().upper(), text, flags=re.IGNORECASE)
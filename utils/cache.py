@@ -2,58 +2,155 @@ from __future__ import annotations
 
 import asyncio
 import enum
+import operator
 import time
-from collections.abc import Callable, Coroutine, MutableMapping
-from functools import wraps
+from collections import OrderedDict, deque
+from collections.abc import Callable, Coroutine, Iterator, MutableMapping
+from functools import partial, wraps
 from typing import Any, Protocol, TypeVar
 
 from lru import LRU
 
 R = TypeVar("R")
+K = TypeVar("K")
+V = TypeVar("V")
+
+# (positional arguments, keyword argument pairs)
+CacheKey = tuple[tuple[Any, ...], tuple[tuple[str, Any], ...]]
 
 
 # Can't use ParamSpec due to https://github.com/python/typing/discussions/946
 class CacheProtocol(Protocol[R]):
-    cache: MutableMapping[str, asyncio.Task[R]]
+    cache: MutableMapping[CacheKey, asyncio.Task[R]]
 
     def __call__(self, *args: Any, **kwds: Any) -> asyncio.Task[R]:
         ...
 
-    def get_key(self, *args: Any, **kwargs: Any) -> str:
+    def get_key(self, *args: Any, **kwargs: Any) -> CacheKey:
         ...
 
     def invalidate(self, *args: Any, **kwargs: Any) -> bool:
         ...
 
-    def invalidate_containing(self, key: str) -> None:
+    def invalidate_containing(self, value: Any) -> int:
         ...
 
-    def get_stats(self) -> tuple[int, int]:
+    def get_stats(self) -> tuple[int, int, int]:
         ...
 
 
-class ExpiringCache(dict):
-    def __init__(self, seconds: float) -> None:
+class ExpiringCache(MutableMapping[K, V]):
+    """
+    A mapping whose entries expire ``seconds`` after they were set.
+
+    Expiry times are kept in a time-ordered deque and dropped lazily from its left side,
+    so lookups are O(1) amortized instead of scanning every entry. If ``maxsize`` is given,
+    the least recently used entry is evicted once the cache grows past it.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        maxsize: int | None = None,
+        callback: Callable[[K, V], Any] | None = None,
+    ) -> None:
         self.__ttl: float = seconds
-        super().__init__()
+        self.maxsize: int | None = maxsize
+        # called with (key, value) for expired and evicted entries, same as lru-dict's callback
+        self.callback: Callable[[K, V], Any] | None = callback
+
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        # (expires_at, key); entries of overwritten or removed keys are skipped when they come up
+        self._expiry: deque[tuple[float, K]] = deque()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __expire(self, now: float) -> None:
+        expiry, data = self._expiry, self._data
+        while expiry and expiry[0][0] <= now:
+            expires_at, key = expiry.popleft()
+            entry = data.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del data[key]
+                self.evictions += 1
+                if self.callback is not None:
+                    self.callback(key, entry[0])
+
+    def __compact(self) -> None:
+        # overwritten keys leave stale deque entries behind, rebuild once they outnumber the live ones
+        # sorted on the expiry only, keys don't have to be comparable
+        self._expiry = deque(
+            sorted(((expires_at, key) for key, (_, expires_at) in self._data.items()), key=operator.itemgetter(0))
+        )
+
+    def __contains__(self, key: object) -> bool:
+        self.__expire(time.monotonic())
+        if key in self._data:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __getitem__(self, key: K) -> V:
+        self.__expire(time.monotonic())
+        try:
+            value, _ = self._data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        if self.maxsize is not None:
+            self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        now = time.monotonic()
+        self.__expire(now)
+
+        expires_at = now + self.__ttl
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (value, expires_at)
+        self._expiry.append((expires_at, key))
 
-    def __verify_cache_integrity(self):
-        # Have to do this in two steps...
-        current_time = time.monotonic()
-        to_remove = [k for (k, (v, t)) in self.items() if current_time > (t + self.__ttl)]
-        for k in to_remove:
-            del self[k]
+        if self.maxsize is not None and len(self._data) > self.maxsize:
+            evicted_key, (evicted, _) = self._data.popitem(last=False)
+            self.evictions += 1
+            if self.callback is not None:
+                self.callback(evicted_key, evicted)
 
-    def __contains__(self, key: str) -> bool:
-        self.__verify_cache_integrity()
-        return super().__contains__(key)
+        if len(self._expiry) > 2 * len(self._data) + 64:
+            self.__compact()
 
-    def __getitem__(self, key: str):
-        self.__verify_cache_integrity()
-        return super().__getitem__(key)
+    def __delitem__(self, key: K) -> None:
+        del self._data[key]
 
-    def __setitem__(self, key: str, value: Any) -> None:
-        super().__setitem__(key, (value, time.monotonic()))
+    def __iter__(self) -> Iterator[K]:
+        self.__expire(time.monotonic())
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        self.__expire(time.monotonic())
+        return len(self._data)
+
+    def peek(self, key: K, default: Any = None) -> V | Any:
+        """Returns the value without counting a hit or a miss and without refreshing its LRU position."""
+        self.__expire(time.monotonic())
+        try:
+            return self._data[key][0]
+        except KeyError:
+            return default
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._expiry.clear()
+
+    def get_stats(self) -> tuple[int, int, int]:
+        """Returns a tuple of hits, misses and evictions (expired entries included)."""
+        return self.hits, self.misses, self.evictions
 
 
 class Strategy(enum.Enum):
@@ -66,41 +163,124 @@ def cache(
     maxsize: int = 128,
     strategy: Strategy = Strategy.lru,
     ignore_kwargs: bool = False,
+    ttl: float = 300.0,
+    negative_ttl: float | None = None,
+    refresh_after: float | None = None,
 ) -> Callable[[Callable[..., Coroutine[Any, Any, R]]], CacheProtocol[R]]:
+    """
+    Caches the tasks of a coroutine function by its arguments.
+
+    Calls made while the first one is still running get the same task, so concurrent lookups are coalesced.
+    Tasks that raise or get cancelled are dropped once they finish, unless ``negative_ttl`` is given,
+    in which case the failure is served for that many seconds first. If ``refresh_after`` is given,
+    values older than that are still returned, but a single background call is started to replace them.
+    """
+
     def decorator(func: Callable[..., Coroutine[Any, Any, R]]) -> CacheProtocol[R]:
+        # hits, misses, evictions
+        _counters = [0, 0, 0]
+        # argument value -> keys of the calls it was passed to
+        _index: dict[Any, set[CacheKey]] = {}
+        # key -> when its task finished successfully, only kept for stale-while-revalidate
+        _fetched_at: dict[CacheKey, float] = {}
+        # key -> its background refresh in flight, which also keeps a reference to the task
+        _refreshing: dict[CacheKey, asyncio.Task[R]] = {}
+
+        def _evicted(key: CacheKey, _: Any) -> None:
+            _counters[2] += 1
+            _forget(key)
+
         if strategy is Strategy.lru:
-            _internal_cache = LRU(maxsize)
-            _stats = _internal_cache.get_stats
+            _internal_cache = LRU(maxsize, callback=_evicted)
         elif strategy is Strategy.raw:
             _internal_cache = {}
-            _stats = lambda: (0, 0)  # noqa: E731
         elif strategy is Strategy.timed:
-            _internal_cache = ExpiringCache(maxsize)
-            _stats = lambda: (0, 0)  # noqa: E731
-
-        def _make_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> str:
-            # this is a bit of a cluster fuck
-            # we do care what 'self' parameter is when we __repr__ it
-            def _true_repr(o):
-                if o.__class__.__repr__ is object.__repr__:
-                    return f"<{o.__class__.__module__}.{o.__class__.__name__}>"
+            _internal_cache = ExpiringCache(ttl, maxsize=maxsize, callback=_evicted)
+
+        def _stats() -> tuple[int, int, int]:
+            return _counters[0], _counters[1], _counters[2]
+
+        def _normalize(o: Any) -> Any:
+            # we don't care what 'self' parameter is, as long as it's the same class
+            if o.__class__.__repr__ is object.__repr__:
+                return f"<{o.__class__.__module__}.{o.__class__.__name__}>"
+            try:
+                hash(o)
+            except TypeError:
                 return repr(o)
+            return o
 
-            key = [f"{func.__module__}.{func.__name__}"]
-            key.extend(_true_repr(o) for o in args)
-            if not ignore_kwargs:
-                for k, v in kwargs.items():
-                    # note: this only really works for this use case in particular
-                    # I want to pass asyncpg.Connection objects to the parameters
-                    # however, they use default __repr__ and I do not care what
-                    # connection is passed in, so I needed a bypass.
-                    if k == "connection" or k == "pool":
-                        continue
+        def _make_key(args: tuple[Any, ...], kwargs: dict[str, Any]) -> CacheKey:
+            if ignore_kwargs:
+                return tuple(map(_normalize, args)), ()
 
-                    key.append(_true_repr(k))
-                    key.append(_true_repr(v))
+            # note: this only really works for this use case in particular
+            # I want to pass asyncpg.Connection objects to the parameters
+            # however, they use default __repr__ and I do not care what
+            # connection is passed in, so I needed a bypass.
+            return (
+                tuple(map(_normalize, args)),
+                tuple((k, _normalize(v)) for k, v in kwargs.items() if k != "connection" and k != "pool"),
+            )
 
-            return ":".join(key)
+        def _values(key: CacheKey) -> Iterator[Any]:
+            yield from key[0]
+            for _, v in key[1]:
+                yield v
+
+        def _add_to_index(key: CacheKey) -> None:
+            for v in _values(key):
+                _index.setdefault(v, set()).add(key)
+
+        def _forget(key: CacheKey) -> None:
+            _fetched_at.pop(key, None)
+            for v in _values(key):
+                if (keys := _index.get(v)) is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del _index[v]
+
+        def _remove(key: CacheKey) -> bool:
+            try:
+                del _internal_cache[key]
+            except KeyError:
+                return False
+            else:
+                return True
+            finally:
+                _forget(key)
+
+        def _failed(task: asyncio.Task[R]) -> bool:
+            # also marks the exception as retrieved, asyncio would log it otherwise if nobody awaited the task
+            return task.cancelled() or task.exception() is not None
+
+        def _drop(key: CacheKey, task: asyncio.Task[R]) -> None:
+            # the key might have been invalidated and called again meanwhile
+            if _internal_cache.get(key) is task:
+                _remove(key)
+
+        def _done(key: CacheKey, task: asyncio.Task[R]) -> None:
+            if _internal_cache.get(key) is not task:
+                return
+
+            if not _failed(task):
+                if refresh_after is not None:
+                    _fetched_at[key] = time.monotonic()
+            elif negative_ttl:
+                task.get_loop().call_later(negative_ttl, _drop, key, task)
+            else:
+                _remove(key)
+
+        def _refresh(key: CacheKey, stale: asyncio.Task[R], args: tuple[Any, ...], kwargs: dict[str, Any]) -> None:
+            def _refreshed(task: asyncio.Task[R]) -> None:
+                _refreshing.pop(key, None)
+                # a failed refresh keeps serving the stale value
+                if not _failed(task) and _internal_cache.get(key) is stale:
+                    _internal_cache[key] = task
+                    _fetched_at[key] = time.monotonic()
+
+            _refreshing[key] = task = asyncio.create_task(func(*args, **kwargs))
+            task.add_done_callback(_refreshed)
 
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any):
@@ -108,29 +288,28 @@ def cache(
             try:
                 task = _internal_cache[key]
             except KeyError:
+                _counters[1] += 1
                 _internal_cache[key] = task = asyncio.create_task(func(*args, **kwargs))
+                _add_to_index(key)
+                task.add_done_callback(partial(_done, key))
                 return task
-            else:
-                return task
+
+            _counters[0] += 1
+            if refresh_after is not None and key not in _refreshing:
+                fetched_at = _fetched_at.get(key)
+                if fetched_at is not None and time.monotonic() - fetched_at >= refresh_after:
+                    _refresh(key, task, args, kwargs)
+            return task
 
         def _invalidate(*args: Any, **kwargs: Any) -> bool:
-            try:
-                del _internal_cache[_make_key(args, kwargs)]
-            except KeyError:
-                return False
-            else:
-                return True
+            return _remove(_make_key(args, kwargs))
 
-        def _invalidate_containing(key: str) -> None:
-            to_remove = []
-            for k in _internal_cache.keys():  # noqa: SIM118
-                if key in k:
-                    to_remove.append(k)
-            for k in to_remove:
-                try:
-                    del _internal_cache[k]
-                except KeyError:
-                    continue
+        def _invalidate_containing(value: Any) -> int:
+            """Removes every cached call that got ``value`` as one of its arguments. Returns the amount removed."""
+            keys = _index.get(_normalize(value))
+            if not keys:
+                return 0
+            return sum(_remove(key) for key in list(keys))
 
         wrapper.cache = _internal_cache
         wrapper.get_key = lambda *args, **kwargs: _make_key(args, kwargs)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable
+
+import discord
+from PIL import Image, ImageDraw, ImageFont
+
+from .cache import cache
+from .pillow import DIR, _welcome_masks, _welcome_template, get_dominant_colour, render_welcome_card
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+FONT_PATH = f"{DIR}LemonMilk.otf"
+
+_BACKGROUND = (35, 39, 42, 255)
+_FOREGROUND = (255, 255, 255, 255)
+_MUTED = (153, 170, 181, 255)
+_TRACK = (72, 75, 78, 255)
+
+# rank, name, total xp and avatar bytes (None if it couldn't be fetched)
+LeaderboardRow = tuple[int, str, int, bytes | None]
+
+
+# the functions below run in the worker processes of CardRenderer,
+# the font is read and parsed once per process and size instead of for every card
+
+
+@functools.lru_cache(maxsize=1)
+def _font_bytes() -> bytes:
+    with open(FONT_PATH, "rb") as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=16)
+def _font(size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(BytesIO(_font_bytes()), size)
+
+
+def _initializer() -> None:
+    _font_bytes()
+    _welcome_template()
+    _welcome_masks()
+
+
+def _fit(text: str, font: ImageFont.FreeTypeFont, width: int) -> str:
+    if font.getlength(text) <= width:
+        return text
+    while text and font.getlength(f"{text}...") > width:
+        text = text[:-1]
+    return f"{text}..."
+
+
+def _circle(avatar: bytes | None, size: int) -> tuple[Image.Image, Image.Image]:
+    """Returns the avatar resized to ``size`` and a circular, anti-aliased mask for it."""
+
+    mask = Image.new("L", (size * 4, size * 4), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size * 4, size * 4), fill=255)
+    mask = mask.resize((size, size), Image.LANCZOS)
+
+    if avatar is None:
+        return Image.new("RGBA", (size, size), _TRACK), mask
+    with Image.open(BytesIO(avatar)) as image:
+        return image.convert("RGBA").resize((size, size), Image.LANCZOS), mask
+
+
+def _encode(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_rank_card(
+    avatar: bytes | None,
+    name: str,
+    rank: int,
+    level: int,
+    xp: int,
+    needed: int,
+    accent: tuple[int, int, int],
+) -> bytes:
+    card = Image.new("RGBA", (934, 282), _BACKGROUND)
+    draw = ImageDraw.Draw(card)
+
+    picture, mask = _circle(avatar, 180)
+    card.paste(picture, (40, 51), mask)
+
+    draw.text((260, 70), _fit(name, _font(40), 360), font=_font(40), fill=_FOREGROUND)
+    stats = f"RANK #{rank}   LEVEL {level}"
+    draw.text((894 - _font(30).getlength(stats), 78), stats, font=_font(30), fill=(*accent, 255))
+
+    progress = f"{xp} / {needed} XP"
+    draw.text((894 - _font(22).getlength(progress), 140), progress, font=_font(22), fill=_MUTED)
+
+    draw.rounded_rectangle((260, 180, 894, 216), radius=18, fill=_TRACK)
+    filled = int(634 * min(max(xp / needed, 0.0), 1.0)) if needed else 0
+    if filled >= 36:
+        draw.rounded_rectangle((260, 180, 260 + filled, 216), radius=18, fill=(*accent, 255))
+    return _encode(card)
+
+
+def render_leaderboard(rows: list[LeaderboardRow], title: str = "LEVEL LEADERBOARD") -> bytes:
+    row_height, avatar_size = 80, 60
+    card = Image.new("RGBA", (900, 100 + row_height * len(rows)), _BACKGROUND)
+    draw = ImageDraw.Draw(card)
+    draw.text((450 - _font(36).getlength(title) / 2, 30), title, font=_font(36), fill=_FOREGROUND)
+
+    for i, (rank, name, total_xp, avatar) in enumerate(rows):
+        top = 100 + i * row_height
+        draw.text((30, top + 22), f"{rank}.", font=_font(28), fill=_MUTED)
+
+        picture, mask = _circle(avatar, avatar_size)
+        card.paste(picture, (110, top + (row_height - avatar_size) // 2), mask)
+
+        draw.text((195, top + 22), _fit(name, _font(28), 430), font=_font(28), fill=_FOREGROUND)
+        xp = f"{total_xp} XP"
+        draw.text((870 - _font(24).getlength(xp), top + 26), xp, font=_font(24), fill=_MUTED)
+    return _encode(card)
+
+
+class CardRenderer:
+    """
+    Renders rank cards, leaderboards and welcome cards into in-memory :class:`discord.File`s.
+
+    Rendering runs in a process pool (so Pillow neither blocks the event loop nor holds the GIL it shares
+    with it), whose processes load the fonts and the welcome template once. Avatars are downloaded through
+    the bot's aiohttp session and their bytes are cached, concurrent downloads of the same avatar are shared.
+    No temporary files are written, so any amount of commands can render at the same time.
+
+    Also computes the dominant colour of avatars, from a small version of them in a thread,
+    cached by the avatar's url (which contains its hash).
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance.
+    workers: :class:`int`
+        Amount of render processes, started on the first render. (Default: 2)
+    """
+
+    AVATAR_SIZE: int = 256
+    COLOUR_AVATAR_SIZE: int = 64
+
+    def __init__(self, bot: Dwello, *, workers: int = 2) -> None:
+        self.bot: Dwello = bot
+        self.workers: int = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawned, forking the bot's process (event loop, pool and worker threads running) can deadlock a child
+            # on a lock some other thread held at the time
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_initializer
+            )
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @cache(maxsize=512)
+    async def fetch_avatar(self, url: str) -> bytes:
+        async with self.bot.http_session.get(url) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def get_avatar(self, user: discord.abc.User | None) -> bytes | None:
+        if user is None:
+            return None
+
+        # the url contains the avatar's hash, so a changed avatar is a different cache entry
+        url = user.display_avatar.replace(format="png", size=self.AVATAR_SIZE).url
+        try:
+            return await self.fetch_avatar(url)
+        except Exception:
+            return None
+
+    @cache(maxsize=1024)
+    async def fetch_dominant_colour(self, url: str) -> discord.Colour | None:
+        async with self.bot.http_session.get(url) as response:
+            response.raise_for_status()
+            data = await response.read()
+
+        rgb = await asyncio.to_thread(get_dominant_colour, data)
+        return discord.Colour.from_rgb(*rgb) if rgb else None
+
+    async def dominant_colour(self, user: discord.abc.User) -> discord.Colour | None:
+        """Returns the most common colour of the user's avatar, or None if it couldn't be downloaded."""
+
+        url = user.display_avatar.replace(format="png", size=self.COLOUR_AVATAR_SIZE).url
+        try:
+            return await self.fetch_dominant_colour(url)
+        except Exception:
+            return None
+
+    async def render(self, func: Callable[..., bytes], *args: Any, filename: str = "card.png") -> discord.File:
+        data = await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+        return discord.File(BytesIO(data), filename)
+
+    async def rank_card(
+        self,
+        member: discord.abc.User,
+        *,
+        rank: int,
+        level: int,
+        xp: int,
+        needed: int,
+        accent: discord.Colour | None = None,
+    ) -> discord.File:
+        colour = accent if accent and accent.value else discord.Colour.blurple()
+        return await self.render(
+            render_rank_card,
+            await self.get_avatar(member),
+            member.name,
+            rank,
+            level,
+            xp,
+            needed,
+            colour.to_rgb(),
+            filename="rank.png",
+        )
+
+    async def leaderboard(self, entries: list[tuple[int, discord.abc.User | None, int]]) -> discord.File:
+        """Renders (rank, user, total xp) entries, unknown users (None) are shown without an avatar."""
+
+        avatars = await asyncio.gather(*(self.get_avatar(user) for _, user, _ in entries))
+        rows: list[LeaderboardRow] = [
+            (rank, user.name if user else "Unknown user", total_xp, avatar)
+            for (rank, user, total_xp), avatar in zip(entries, avatars)
+        ]
+        return await self.render(render_leaderboard, rows, filename="leaderboard.png")
+
+    async def welcome_card(self, member: discord.abc.User, title: str, subtitle: str | None = None) -> discord.File:
+        return await self.render(
+            render_welcome_card, title, await self.get_avatar(member), subtitle, filename="welcome.png",
+        )
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import discord
+
+from .database.orm import Guild, GuildCounter
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+
+log = logging.getLogger(__name__)
+
+
+class CounterUpdater:
+    """
+    Keeps the counter channels of guilds up to date as members join and leave.
+
+    Bot counts are maintained incrementally from member events (a guild's members are only counted once,
+    the first time its counters are rendered). Changed guilds are collected and renamed together after
+    :attr:`delay` seconds, so a burst of joins results in a single edit, and a channel is never renamed
+    more often than every :attr:`min_interval` seconds, Discord only allows two name edits per 10 minutes.
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance.
+    delay: :class:`float`
+        Seconds to wait for more changes before renaming. (Default: 15.0)
+    min_interval: :class:`float`
+        Minimum seconds between two renames of the same channel. (Default: 300.0)
+    """
+
+    def __init__(self, bot: Dwello, *, delay: float = 15.0, min_interval: float = 300.0) -> None:
+        self.bot: Dwello = bot
+        self.delay: float = delay
+        self.min_interval: float = min_interval
+
+        # guild id -> amount of bots
+        self._bots: dict[int, int] = {}
+        # channel id -> monotonic time of its last rename, within the last min_interval seconds
+        self._last_edit: dict[int, float] = {}
+        self._dirty: set[int] = set()
+        self._handle: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def get_counts(self, guild: discord.Guild) -> dict[str, int]:
+        """Returns the values of the 'all', 'bot' and 'member' counters of a guild."""
+
+        bots = self._bots.get(guild.id)
+        if bots is None:
+            bots = self._bots[guild.id] = sum(member.bot for member in guild.members)
+
+        total = guild.member_count or len(guild.members)
+        return {"all": total, "bot": bots, "member": total - bots}
+
+    def member_joined(self, member: discord.Member) -> None:
+        if member.bot and member.guild.id in self._bots:
+            self._bots[member.guild.id] += 1
+        self.touch(member.guild.id)
+
+    def member_removed(self, member: discord.Member) -> None:
+        if member.bot and member.guild.id in self._bots:
+            self._bots[member.guild.id] -= 1
+        self.touch(member.guild.id)
+
+    def forget(self, guild_id: int) -> None:
+        self._bots.pop(guild_id, None)
+        self._dirty.discard(guild_id)
+
+    def touch(self, *guild_ids: int, delay: float | None = None) -> None:
+        """Marks guilds as changed, their counters are renamed on the next flush."""
+
+        self._dirty.update(guild_ids)
+        self._schedule(self.delay if delay is None else delay)
+
+    def _schedule(self, delay: float) -> None:
+        if self._handle is not None or (self._task is not None and not self._task.done()):
+            return  # a flush is already coming up, it'll pick these up
+        self._handle = asyncio.get_running_loop().call_later(delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._handle = None
+        self._task = asyncio.create_task(self.flush())
+        self._task.add_done_callback(self._flushed)
+
+    def _flushed(self, task: asyncio.Task[None]) -> None:
+        if not task.cancelled() and (e := task.exception()):
+            log.error("Failed to update counters", exc_info=e)
+        if self._dirty:
+            # changes that came in meanwhile, or channels that were edited too recently
+            self._schedule(self._next_delay())
+
+    def _next_delay(self) -> float:
+        now = time.monotonic()
+        waits = [
+            last + self.min_interval - now
+            for guild_id in self._dirty
+            if (guild := Guild.cache.get(guild_id))
+            for counter in (guild.all_counter, guild.bot_counter, guild.member_counter)
+            if counter.id and (last := self._last_edit.get(counter.id)) is not None
+        ]
+        return max(self.delay, min(waits, default=self.delay))
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    async def flush(self) -> None:
+        """Renames the counters of every changed guild that has any configured."""
+
+        # renames older than min_interval don't hold anything back anymore
+        cutoff = time.monotonic() - self.min_interval
+        self._last_edit = {channel_id: last for channel_id, last in self._last_edit.items() if last > cutoff}
+
+        dirty, self._dirty = self._dirty, set()
+        try:
+            guilds = await Guild.get_many(list(dirty), self.bot)
+        except Exception:
+            # picked up again by the flush scheduled in _flushed
+            self._dirty |= dirty
+            raise
+
+        for guild_id, _guild in guilds.items():
+            if not _guild.filtered_counter_ids:
+                continue
+
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                self.forget(guild_id)
+                continue
+
+            if not await self.update(guild, _guild):
+                self._dirty.add(guild_id)
+
+    async def update(self, guild: discord.Guild, _guild: Guild) -> bool:
+        """Renames the guild's counter channels whose count changed. Returns False if some had to be postponed."""
+
+        counts = self.get_counts(guild)
+        done = True
+        now = time.monotonic()
+
+        counters: list[tuple[GuildCounter, int]] = [
+            (_guild.all_counter, counts["all"]),
+            (_guild.bot_counter, counts["bot"]),
+            (_guild.member_counter, counts["member"]),
+        ]
+        for counter, count in counters:
+            channel = counter.instance
+            if channel is None:
+                continue
+
+            name = f"\N{BAR CHART} {counter.name}: {count}"
+            if channel.name == name:
+                continue
+
+            if now - self._last_edit.get(channel.id, -self.min_interval) < self.min_interval:
+                done = False
+                continue
+
+            self._last_edit[channel.id] = now
+            try:
+                await channel.edit(name=name)
+            except discord.HTTPException as e:
+                log.warning("Failed to rename counter %s in guild %s: %s", channel.id, guild.id, e)
+        return done
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING
+
+import discord
+
+from .orm import User
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+
+log = logging.getLogger(__name__)
+
+
+class _PendingXP:
+    """Locally applied xp that hasn't been written to the 'users' table yet."""
+
+    __slots__ = ("user", "total_xp", "messages")
+
+    def __init__(self, user: User) -> None:
+        self.user: User = user
+        self.total_xp: int = 0
+        self.messages: int = 0
+
+
+class XPAccumulator:
+    """
+    Write-back accumulator for message xp.
+
+    Instead of running ``UPDATE users ...`` for every message, xp and message counts are applied
+    to a locally kept :class:`User` (level-ups included, see :attr:`User.xp_formula`) and the
+    resulting rows are flushed in a single batched statement (``user.flush_xp``) every :attr:`interval` seconds,
+    or as soon as :attr:`max_pending` users are waiting to be written.
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance used for working with the postgres database.
+    interval: :class:`float`
+        Seconds between flushes. (Default: 60.0)
+    max_pending: :class:`int`
+        Amount of pending users that triggers an early flush. (Default: 500)
+
+    .. note::
+        # xp and level are written as absolute values (level-ups reset xp),
+        # total_xp and messages are written as deltas so nothing is lost if the row changed meanwhile.
+        # Users are loaded inside :meth:`loading`, so a flush doesn't commit while a row read before
+        # it is still on its way (it would miss both the committed values and the overlay of :meth:`apply`).
+    """
+
+    def __init__(self, bot: Dwello, *, interval: float = 60.0, max_pending: int = 500) -> None:
+        self.bot: Dwello = bot
+        self.interval: float = interval
+        self.max_pending: int = max_pending
+
+        self._pending: dict[int, _PendingXP] = {}
+        self._flushing: dict[int, _PendingXP] = {}
+        self._full: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+        # loads of users in flight, and whether a flush is writing (new loads wait for it then)
+        self._loads: int = 0
+        self._no_loads: asyncio.Event = asyncio.Event()
+        self._no_loads.set()
+        self._not_writing: asyncio.Event = asyncio.Event()
+        self._not_writing.set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._pending
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops the flush loop and writes everything that is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error("Failed to flush pending xp", exc_info=e)
+
+    def add(self, user: User, xp: int, messages: int = 1) -> None:
+        """Queues an already applied xp increase of the given user to be written later."""
+
+        entry = self._pending.get(user.id)
+        if entry is None:
+            entry = self._pending[user.id] = _PendingXP(user)
+            if len(self._pending) >= self.max_pending:
+                self._full.set()
+
+        entry.user = user  # the newest object holds the newest absolute xp and level
+        entry.total_xp += xp
+        entry.messages += messages
+
+    def apply(self, user: User) -> None:
+        """Overlays not yet written xp onto a :class:`User` that was just loaded from the database."""
+
+        for pending in (self._flushing, self._pending):
+            if entry := pending.get(user.id):
+                user._xp = entry.user.xp
+                user._level = entry.user.level
+                user._total_xp += entry.total_xp
+                user._messages += entry.messages
+
+    @contextlib.asynccontextmanager
+    async def loading(self) -> AsyncIterator[None]:
+        """
+        Wraps reading user rows and building :class:`User` objects from them (which calls :meth:`apply`).
+
+        Must not be nested, a flush waiting for the outer load would block the inner one.
+        """
+
+        await self._not_writing.wait()
+        self._loads += 1
+        self._no_loads.clear()
+        try:
+            yield
+        finally:
+            self._loads -= 1
+            if not self._loads:
+                self._no_loads.set()
+
+    def pending_users(self) -> list[User]:
+        """Users with xp that isn't written to the database yet, newest values last."""
+        return [entry.user for pending in (self._flushing, self._pending) for entry in pending.values()]
+
+    async def get_user(self, user_id: int) -> User:
+        """Returns the locally kept user if it was loaded since the last flush, otherwise loads it from the database."""
+
+        if entry := self._pending.get(user_id):
+            return entry.user
+
+        user = await User.get(user_id, self.bot)
+        # kept (without xp) until the next flush, so concurrent messages of the user increase the same object;
+        # a concurrent load that finished first wins. A flush only takes pending users once no load is running,
+        # and nothing awaits between the end of the load and this.
+        entry = self._pending.get(user_id)
+        if entry is None:
+            entry = self._pending[user_id] = _PendingXP(user)
+        return entry.user
+
+    async def record(self, message: discord.Message, rate: int = 5) -> int | None:
+        """Applies xp for a message. Costs no queries if the author was loaded since the last flush."""
+
+        if message.author.bot or not message.guild:
+            return None
+
+        _user = await self.get_user(message.author.id)
+        return await _user.increase_xp(message, rate)
+
+    async def flush(self) -> int:
+        """Writes every pending user with one query. Returns the amount of users written."""
+
+        async with self._lock:
+            self._full.clear()
+            if not self._pending:
+                return 0
+
+            self._not_writing.clear()
+            try:
+                await self._no_loads.wait()
+                return await self._write()
+            finally:
+                self._not_writing.set()
+
+    async def _write(self) -> int:
+        self._flushing, self._pending = self._pending, {}
+        # users that were only loaded have nothing to write
+        entries = [entry for entry in self._flushing.values() if entry.messages or entry.total_xp]
+        if not entries:
+            self._flushing = {}
+            return 0
+
+        written = False
+        try:
+            # a single statement commits on its own, so the rows are committed as soon as it returns
+            async with self.bot.safe_connection(transaction=False) as conn:
+                statement = await conn.prepared("user.flush_xp")
+                await statement.fetch(
+                    [e.user.id for e in entries],
+                    [e.user.xp for e in entries],
+                    [e.user.level for e in entries],
+                    [e.total_xp for e in entries],
+                    [e.messages for e in entries],
+                )
+                # dropped before anything else gets to run (releasing the connection awaits),
+                # users loaded from now on already have these deltas and apply() mustn't add them again
+                written = True
+                self._flushing = {}
+        except Exception:
+            self._flushing = {}
+            if not written:
+                self._restore(entries)
+            raise
+
+        return len(entries)
+
+    def _restore(self, entries: list[_PendingXP]) -> None:
+        # put the failed batch back, newer local state (if any) wins for absolute values
+        for entry in entries:
+            if newer := self._pending.get(entry.user.id):
+                newer.total_xp += entry.total_xp
+                newer.messages += entry.messages
+            else:
+                self._pending[entry.user.id] = entry
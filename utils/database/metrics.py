@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import bisect
+from typing import ClassVar
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Observations are counted into the first bucket whose upper bound (in seconds) they don't exceed,
+    so recording is a bisect and an increment no matter how many were recorded before.
+    """
+
+    BUCKETS: ClassVar[tuple[float, ...]] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        # the last slot is for everything above the last bucket
+        self.counts: list[int] = [0] * (len(self.BUCKETS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Returns the upper bound of the bucket the ``q`` (0-1) percentile falls into."""
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for bound, amount in zip(self.BUCKETS, self.counts):
+            seen += amount
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class PoolMetrics:
+    """
+    Connection pool instrumentation, updated by :meth:`Dwello.safe_connection`.
+
+    Attributes
+    ----------
+    acquire_wait: :class:`LatencyHistogram`
+        Time spent waiting for a connection from the pool.
+    call_sites: dict[:class:`str`, :class:`LatencyHistogram`]
+        Time a connection was held for, by the function that asked for it.
+    in_use: :class:`int`
+        Connections currently held through ``safe_connection``.
+    peak_in_use: :class:`int`
+        The most connections that were held at once.
+    acquire_timeouts: :class:`int`
+        Times no connection became free within the acquire timeout.
+    statement_timeouts: :class:`int`
+        Queries cancelled by their ``statement_timeout``.
+    """
+
+    __slots__ = ("acquire_wait", "call_sites", "in_use", "peak_in_use", "acquire_timeouts", "statement_timeouts")
+
+    def __init__(self) -> None:
+        self.acquire_wait: LatencyHistogram = LatencyHistogram()
+        self.call_sites: dict[str, LatencyHistogram] = {}
+        self.in_use: int = 0
+        self.peak_in_use: int = 0
+        self.acquire_timeouts: int = 0
+        self.statement_timeouts: int = 0
+
+    def acquired(self, waited: float) -> None:
+        self.acquire_wait.observe(waited)
+        self.in_use += 1
+        if self.in_use > self.peak_in_use:
+            self.peak_in_use = self.in_use
+
+    def released(self, call_site: str, held: float) -> None:
+        self.in_use -= 1
+        if (histogram := self.call_sites.get(call_site)) is None:
+            histogram = self.call_sites[call_site] = LatencyHistogram()
+        histogram.observe(held)
+
+    def slowest(self, amount: int = 10) -> list[tuple[str, LatencyHistogram]]:
+        """Returns the call sites that held connections the longest in total."""
+        return sorted(self.call_sites.items(), key=lambda item: item[1].total, reverse=True)[:amount]
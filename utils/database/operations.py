@@ -120,9 +120,12 @@ class DataBaseOperations:
         return await User.get(record, self.bot)""" # check if this is anywhere else in the code | then fix and remove these
     
     async def get_users(self) -> list[User]:
-        async with self.bot.safe_connection() as conn:
-            records: list[Record] = await conn.fetch("SELECT * FROM users")
-        return [await User.get(record, self.bot) for record in records]
+        async with self.bot.xp_accumulator.loading():
+            async with self.bot.safe_connection(transaction=False) as conn:
+                records: list[Record] = await conn.fetch(
+                    "SELECT u.*, c.* FROM users AS u LEFT JOIN user_config AS c ON c.user_id = u.id"
+                )
+            return [User._from_record(record, self.bot) for record in records]
         
     # use ctx, member, message ... (find one class for that) as an object to get guild and author
     async def warn(
@@ -166,16 +169,13 @@ class DataBaseOperations:
 
     # @functools.lru_cache(maxsize=1)
     async def get_warnings(self, user_id: int, guild: discord.Guild) -> list[Warning]:
-        async with self.bot.safe_connection() as conn:
-            records: list[Record] = await conn.fetch(
-                "SELECT * FROM warnings WHERE guild_id = $1 AND user_id = $2",
-                guild.id,
-                user_id,
-            )
+        async with self.bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("warnings.get")
+            records: list[Record] = await statement.fetch(guild.id, user_id)
         return [Warning(record, self.bot) for record in records]
 
     async def get_warning_by_id(self, warn_id: int, user_id: int, guild: discord.Guild) -> Warning | None:
-        async with self.bot.safe_connection() as conn:
+        async with self.bot.safe_connection(transaction=False) as conn:
             record: Record | None = await conn.fetchrow(
                 "SELECT * FROM warnings WHERE (id, guild_id, user_id) IN (($1, $2, $3))",
                 warn_id,
@@ -247,11 +247,9 @@ class DataBaseOperations:
 
     # @functools.lru_cache(maxsize=1)
     async def get_prefixes(self, guild: discord.Guild | None) -> list[Prefix]:
-        async with self.bot.safe_connection() as conn:
-            records: list[Record] = await conn.fetch(
-                "SELECT * FROM prefixes WHERE guild_id = $1",
-                guild.id,
-            )
+        async with self.bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("prefixes.get")
+            records: list[Record] = await statement.fetch(guild.id)
         return [Prefix(record, self.bot) for record in records]
 
     async def suggest_idea(
@@ -263,35 +261,20 @@ class DataBaseOperations:
         return await Idea.suggest(self.bot, title, content, author.id)
 
     async def get_ideas(self) -> list[Idea]:
-        async with self.bot.safe_connection() as conn:
+        async with self.bot.safe_connection(transaction=False) as conn:
             records: list[Record] = await conn.fetch("SELECT * FROM ideas")
         return [await Idea.get(record, self.bot) for record in records]
     
     # maybe make a counter class and add this there
-    async def update_counters(self, guild: discord.Guild) -> None:
-        async with self.bot.safe_connection() as conn:
-            row: Record = await conn.fetchrow("SELECT * FROM guilds WHERE id = $1", guild.id)
+    async def update_counters(self, guild: discord.Guild, _guild: Guild | None = None) -> None:
+        _guild = _guild or await Guild.get(guild.id, self.bot)
 
-        if not row:
+        if not _guild.filtered_counter_ids:
             return
 
-        bot_count = sum(member.bot for member in guild.members)
-        member_count = len(guild.members) - bot_count  # type: ignore
-
-        counters_to_update: list[tuple[str, int | None]] = [
-            ("all_counter", guild.member_count),
-            ("bot_counter", bot_count),
-            ("member_counter", member_count),
-        ]
-        for counter, count_value in counters_to_update:
-            channel_id = row.get(counter)
-            if channel_id:
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    if count_value:
-                        await channel.edit(name=f"\N{BAR CHART} {counter.capitalize().replace('_', ' ')}: {count_value}")
-                except Exception as e:
-                    print(e, "update_counters (utils/other.py)")
+        # renames right away (rate limits permitting), member events go through the debounced CounterUpdater instead
+        if not await self.bot.counters.update(guild, _guild):
+            self.bot.counters.touch(guild.id)
         return
 
     async def remove_counter(self, channel: discord.abc.GuildChannel) -> None:
@@ -302,6 +285,7 @@ class DataBaseOperations:
             async with self.bot.safe_connection() as conn: # shouldn't use f-strings in sql maybe fix very later
                 query = f"UPDATE guilds SET {_guild.counters_dict[channel.id]} = NULL WHERE id = $1"
                 await conn.execute(query, guild.id)
+            Guild.cache.invalidate(guild.id)
         return
     
     async def update_guild_config(self, guild_id: int, _dict: dict[str, bool]) -> Guild:
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, List, TypeVar
+from typing import TYPE_CHECKING, Any, ClassVar, List, TypeVar
 
 import discord
 import contextlib
@@ -9,6 +9,8 @@ from typing_extensions import Self
 
 from constants import GUILD_CONFIG_DICT, USER_CONFIG_DICT
 
+from ..cache import ExpiringCache
+
 if TYPE_CHECKING:
     from datetime import datetime
 
@@ -51,6 +53,60 @@ CONFIG_ALIASES = {
 }
 
 
+class GuildCache:
+    """
+    Bounded LRU cache with a TTL for :class:`Guild` ORMs, so that events don't hit the database every time.
+
+    Cached guilds are shared between callers, which means that the :class:`Guild` methods updating
+    the database also update the cached object in place. Anything that changes guild tables without
+    going through a cached object has to call :meth:`invalidate`.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        The maximum amount of guilds kept. Least recently used ones are evicted first.
+    ttl: :class:`float`
+        Seconds after which a cached guild is considered stale and is reloaded.
+    """
+
+    __slots__ = ("_cache",)
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0) -> None:
+        self._cache: ExpiringCache[int, Guild] = ExpiringCache(ttl, maxsize=maxsize)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return self._cache.peek(guild_id) is not None
+
+    def get(self, guild_id: int) -> Guild | None:
+        return self._cache.get(guild_id)
+
+    def put(self, guild: Guild) -> None:
+        self._cache[guild.id] = guild
+
+    def write_through(self, guild: Guild) -> None:
+        """Keeps the cache consistent after ``guild`` was changed in the database."""
+        cached = self._cache.peek(guild.id)
+        if cached is not None and cached is not guild:  # the cached object wasn't updated, so it's stale now
+            self.invalidate(guild.id)
+
+    def invalidate(self, guild_id: int) -> bool:
+        try:
+            del self._cache[guild_id]
+        except KeyError:
+            return False
+        return True
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def get_stats(self) -> tuple[int, int, int]:
+        """Returns a tuple of hits, misses and evictions."""
+        return self._cache.get_stats()
+
+
 class Guild(BasicORM):
     """
     Class representing an ORM (Object Relational Mapping) for a configured (by user) guild.
@@ -215,6 +271,8 @@ class Guild(BasicORM):
 
     # Twitch Table
     _twitch_users: dict[int, TwitchUser]
+
+    cache: ClassVar[GuildCache] = GuildCache()
     
     @property
     def all_counter(self) -> GuildCounter:
@@ -475,6 +533,8 @@ class Guild(BasicORM):
             row: Record = await conn.fetchrow(query, self.id)
 
         self._update_configuration(row)
+        self.cache.write_through(self)
+        self.bot.dispatch("guild_config_update", self)
         return
 
     def get_channel_by_type(self, _type: str) -> GuildChannel | GuildCounter | None:
@@ -505,6 +565,7 @@ class Guild(BasicORM):
             row: Record = await conn.fetchrow(query, text, self.id)
 
         self._update_channels(row)
+        self.cache.write_through(self)
         return
     
     async def add_channel(self, _type: str, channel_id: int) -> GuildChannel | None:
@@ -518,6 +579,7 @@ class Guild(BasicORM):
             row: Record = await conn.fetchrow(query, channel_id, self.id)
 
         self._update_channels(row)
+        self.cache.write_through(self)
         return self.get_channel_by_type(_type)
     
     async def add_counter(self, _type: str, channel_id: int) -> GuildCounter | None:
@@ -531,85 +593,94 @@ class Guild(BasicORM):
             row: Record = await conn.fetchrow(query, channel_id, self.id)
 
         self._update_counters(row)
+        self.cache.write_through(self)
         return self.get_channel_by_type(_type)
 
     async def _exe(self, option: str, value: Any) -> None:
         async with self.bot.safe_connection() as conn:
             await conn.execute(f"UPDATE guild_config SET {option} = $1 WHERE guild_id = $2", value, self.id)
+        self.cache.invalidate(self.id)
         return
 
     @classmethod
-    async def get(
-        cls: type[GT],
-        _id: int,
-        bot: Dwello,
-    ) -> GT:
-        self = cls(_id, bot)
+    def _from_record(cls: type[GT], record: Record, bot: Dwello) -> GT:
+        """Builds a guild from a ``guild.select`` or ``guild.create`` row and caches it."""
 
-        async with self.bot.safe_connection() as conn:
-            config_record: Record = await conn.fetchrow(
-                "SELECT * FROM guild_config WHERE guild_id = $1",
-                self.id,
-            )
-            record: Record = await conn.fetchrow(
-                "SELECT * FROM guilds WHERE id = $1",
-                self.id,
-            )
-            twitch_records: list[Record] = await conn.fetch(
-                "SELECT * FROM twitch_users WHERE guild_id = $1",
-                self.id,
-            )
-            
-        if not record or not config_record:
-            return await self.create(_id, bot)
-        
-        self._update_configuration(config_record)
+        self = cls(record["id"], bot)
+        self._update_configuration(record)
         self._update_channels(record)
         self._update_counters(record)
 
         self._twitch_users = {}
-        for twitch_record in twitch_records:
-            self._twitch_users[twitch_record["user_id"]] = await TwitchUser.get(twitch_record, self.bot)
+        for twitch_record in record["twitch_users"]:
+            self._twitch_users[twitch_record["user_id"]] = TwitchUser(twitch_record, self.bot)
+
+        self.cache.put(self)
         return self
 
     @classmethod
-    async def create(
+    async def get(
         cls: type[GT],
         _id: int,
         bot: Dwello,
     ) -> GT:
-        self = cls(_id, bot)
+        if cached := cls.cache.get(_id):
+            return cached  # type: ignore
 
-        async with self.bot.safe_connection() as conn:
-            record: Record = await conn.fetchrow(
-                """
-                INSERT INTO guilds (id) VALUES ($1)
-                ON CONFLICT (id) DO UPDATE SET id = excluded.id
-                RETURNING *;
-                """,
-                self.id,
-            )
-            config_record: Record = await conn.fetchrow(
-                """
-                INSERT INTO guild_config (guild_id) VALUES ($1)
-                ON CONFLICT (guild_id) DO UPDATE SET guild_id = excluded.guild_id
-                RETURNING *;
-                """,
-                self.id,
-            )
-            twitch_records: list[Record] = await conn.fetch(
-                "SELECT * FROM twitch_users WHERE guild_id = $1",
-                self.id,
-            )
-        self._update_configuration(config_record)
-        self._update_channels(record)
-        self._update_counters(record)
+        async with bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("guild.select")
+            record: Record | None = await statement.fetchrow([_id])
 
-        self._twitch_users = {}
-        for twitch_record in twitch_records:
-            self._twitch_users[twitch_record["user_id"]] = await TwitchUser.get(twitch_record, self.bot)
+        if not record or record["guild_id"] is None:  # no guild or no config row
+            return await cls.create(_id, bot)
+        return cls._from_record(record, bot)
 
-        return self
+    @classmethod
+    async def get_many(
+        cls: type[GT],
+        ids: list[int],
+        bot: Dwello,
+    ) -> dict[int, GT]:
+        """
+        Same as :func:`.get`, but for multiple guilds at once.
+        Guilds that aren't cached are fetched with a single query; missing ones are created with another one.
+        """
+
+        guilds: dict[int, GT] = {}
+        missing: list[int] = []
+        for _id in ids:
+            if cached := cls.cache.get(_id):
+                guilds[_id] = cached  # type: ignore
+            else:
+                missing.append(_id)
+
+        if not missing:
+            return guilds
+
+        async with bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("guild.select")
+            records: list[Record] = await statement.fetch(missing)
+            for record in records:
+                if record["guild_id"] is not None:
+                    guilds[record["id"]] = cls._from_record(record, bot)
+
+            if to_create := [_id for _id in missing if _id not in guilds]:
+                statement = await conn.prepared("guild.create")
+                records = await statement.fetch(to_create)
+                for record in records:
+                    guilds[record["id"]] = cls._from_record(record, bot)
+        return guilds
+
+    @classmethod
+    async def create(
+        cls: type[GT],
+        _id: int,
+        bot: Dwello,
+    ) -> GT:
+        async with bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("guild.create")
+            record: Record = await statement.fetchrow([_id])
+        return cls._from_record(record, bot)
 
 
 class _GuildChannel:
@@ -634,6 +705,9 @@ class _GuildChannel:
         async with self.bot.safe_connection() as conn:
             query = f"UPDATE guilds SET {self.type} = NULL WHERE id = $1"
             await conn.execute(query, self.guild.id)
+
+        self.id = None
+        self.guild.cache.write_through(self.guild)
         return
     
     async def add_id(self, _id: int) -> None:
@@ -768,7 +842,7 @@ class Idea:
         return _votes
 
     async def _get_voters(self) -> List[int]:
-        async with self.bot.safe_connection() as conn:
+        async with self.bot.safe_connection(transaction=False) as conn:
             records: List[Record] = await conn.fetch(
                 "SELECT * FROM idea_voters WHERE id = $1",
                 self.id,
@@ -1083,16 +1157,13 @@ class User(BasicORM):
     async def get_rank(self) -> int | None:
         """Gets user's global rank based on their total xp."""
 
-        query = """
-            SELECT (SELECT COUNT(*) + 1
-            FROM users AS u2
-            WHERE u2.total_xp > u1.total_xp) AS rank
-            FROM users AS u1
-            WHERE id = $1
-            ON CONFLICT DO NOTHING
-        """
-        async with self.bot.safe_connection() as conn:
-            return await conn.fetchval(query, self.id)
+        if self.bot.ranks.ready:
+            self.bot.ranks.update(self.id, self.total_xp)
+            return self.bot.ranks.rank_of(self.total_xp)
+
+        async with self.bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("user.rank")
+            return await statement.fetchval(self.id)
         
     async def increase_balance(self, message: discord.Message, balance: int | float, /, worked: bool = False) -> float:
         assert not message.author.bot
@@ -1119,30 +1190,22 @@ class User(BasicORM):
         if xp >= self.xp_formula:
             xp, level = 0, level + 1
 
-        async with self.bot.safe_connection() as conn:
-            await conn.execute(
-                "UPDATE users SET xp = $1, total_xp = $2, level = $3, messages = $4 WHERE id = $5",
-                xp,
-                total,
-                level,
-                messages,
-                self.id,
-            )
         self._messages = messages
         self._total_xp = total
         self._level = level
         self._xp = xp
+        self.bot.ranks.update(self.id, total)
 
+        # written to the db in batches, see :class:`XPAccumulator`
+        self.bot.xp_accumulator.add(self, rate)
         return self.xp_until_next_level
     
     async def increase_command_count(self, amount: int = 1) -> None: # make a setter smh?
-        async with self.bot.safe_connection() as conn:
-            await conn.execute(
-                "UPDATE users SET command_count = $1 WHERE id = $2",
-                amount + self.command_count,
-                self.id,
-            )
-        return
+        async with self.bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("user.command_count")
+            command_count: int | None = await statement.fetchval(amount, self.id)
+        # the same object can be handed out again (see :meth:`XPAccumulator.get_user`)
+        self._command_count = command_count if command_count is not None else self._command_count + amount
     
     async def update_config(self, _dict: dict[str, Any]) -> None:
         updates = []
@@ -1166,30 +1229,51 @@ class User(BasicORM):
         self._update_configuration(row)
         return
     
+    @classmethod
+    def _from_record(cls: type[UT], record: Record, bot: Dwello) -> UT:
+        """Builds a user from a ``users`` row joined with its ``user_config`` row."""
+
+        self = cls(record["id"], bot)
+        self._attributes_from_record(record)
+        self._update_configuration(record)
+        self.bot.xp_accumulator.apply(self)
+        return self
+
     @classmethod
     async def get(
         cls: type[UT],
         user_id: int,
         bot: Dwello,
     ) -> UT:
-        self = cls(user_id, bot)
+        # see :meth:`XPAccumulator.loading`
+        async with bot.xp_accumulator.loading():
+            async with bot.safe_connection(transaction=False) as conn:
+                statement = await conn.prepared("user.load")
+                record: Record | None = await statement.fetchrow([user_id])
 
-        async with self.bot.safe_connection() as conn:
-            config_record: Record = await conn.fetchrow(
-                "SELECT * FROM user_config WHERE user_id = $1",
-                self.id,
-            )
-            record: Record = await conn.fetchrow(
-                "SELECT * FROM users WHERE id = $1",
-                self.id,
-            )
+            if record:
+                return cls._from_record(record, bot)
+        # row was inserted concurrently and isn't visible to this statement
+        return await cls.create(user_id, bot)
 
-        if not record or not config_record:
-            return await self.create(user_id, bot)
+    @classmethod
+    async def get_many(
+        cls: type[UT],
+        ids: list[int],
+        bot: Dwello,
+    ) -> dict[int, UT]:
+        """Same as :func:`.get`, but loads (or creates) multiple users with a single query."""
 
-        self._attributes_from_record(record)
-        self._update_configuration(config_record)
-        return self
+        async with bot.xp_accumulator.loading():
+            async with bot.safe_connection(transaction=False) as conn:
+                statement = await conn.prepared("user.load")
+                records: list[Record] = await statement.fetch(ids)
+
+            users = {record["id"]: cls._from_record(record, bot) for record in records}
+        for user_id in ids:
+            if user_id not in users:
+                users[user_id] = await cls.create(user_id, bot)
+        return users
 
     @classmethod
     async def create(
@@ -1199,26 +1283,28 @@ class User(BasicORM):
     ) -> UT:
         self = cls(user_id, bot)
 
-        async with self.bot.safe_connection() as conn:
-            record: Record = await conn.fetchrow(
-                """
-                    INSERT INTO users (id) VALUES ($1)
-                    ON CONFLICT (id) DO UPDATE SET id = excluded.id
+        async with bot.xp_accumulator.loading():
+            async with self.bot.safe_connection() as conn:
+                record: Record = await conn.fetchrow(
+                    """
+                        INSERT INTO users (id) VALUES ($1)
+                        ON CONFLICT (id) DO UPDATE SET id = excluded.id
+                        RETURNING *;
+                    """,
+                    self.id,
+                )
+                config_record: Record = await conn.fetchrow(
+                    """
+                    INSERT INTO user_config (user_id) VALUES ($1)
+                    ON CONFLICT (user_id) DO UPDATE SET user_id = excluded.user_id
                     RETURNING *;
-                """,
-                self.id,
-            )
-            config_record: Record = await conn.fetchrow(
-                """
-                INSERT INTO user_config (user_id) VALUES ($1)
-                ON CONFLICT (user_id) DO UPDATE SET user_id = excluded.user_id
-                RETURNING *;
-                """,
-                self.id,
-            )
+                    """,
+                    self.id,
+                )
 
-        self._attributes_from_record(record)
-        self._update_configuration(config_record)
+            self._attributes_from_record(record)
+            self._update_configuration(config_record)
+            self.bot.xp_accumulator.apply(self)
         return self
 
 
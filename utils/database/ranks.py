@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+
+log = logging.getLogger(__name__)
+
+# users are ordered by total xp (descending), then id, packed into a single int per user
+_ID_BITS = 64
+
+
+def _key(user_id: int, total_xp: int) -> int:
+    return (-total_xp << _ID_BITS) | user_id
+
+
+def _unkey(key: int) -> tuple[int, int]:
+    return key & ((1 << _ID_BITS) - 1), -(key >> _ID_BITS)
+
+
+class SortedKeys:
+    """
+    Sorted multiset of ints, stored as a list of sorted sublists of at most ``2 * load`` items.
+
+    The lengths of the sublists are kept in a Fenwick tree, so the position of a key is a bisect
+    over the sublist maxima, a prefix sum and a bisect inside one sublist (O(log n), plus moving
+    at most ``2 * load`` pointers on inserts and removals).
+    """
+
+    __slots__ = ("load", "_lists", "_maxes", "_tree", "_len")
+
+    def __init__(self, keys: Iterable[int] = (), *, load: int = 1000) -> None:
+        self.load: int = load
+        self._lists: list[list[int]] = []
+        self._maxes: list[int] = []
+        self._tree: list[int] = []
+        self._len: int = 0
+        self.rebuild(keys)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        for sublist in self._lists:
+            yield from sublist
+
+    def rebuild(self, keys: Iterable[int]) -> None:
+        values = sorted(keys)
+        self._lists = [values[i : i + self.load] for i in range(0, len(values), self.load)]
+        self._maxes = [sublist[-1] for sublist in self._lists]
+        self._len = len(values)
+        self._build_tree()
+
+    def _build_tree(self) -> None:
+        tree = [len(sublist) for sublist in self._lists]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, index: int, value: int) -> None:
+        tree = self._tree
+        while index < len(tree):
+            tree[index] += value
+            index |= index + 1
+
+    def _tree_prefix(self, index: int) -> int:
+        """Sum of the lengths of the sublists before ``index``."""
+
+        total, tree = 0, self._tree
+        while index > 0:
+            total += tree[index - 1]
+            index &= index - 1
+        return total
+
+    def add(self, key: int) -> None:
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._build_tree()
+            return
+
+        index = min(bisect.bisect_left(self._maxes, key), len(self._lists) - 1)
+        sublist = self._lists[index]
+        bisect.insort(sublist, key)
+        self._maxes[index] = sublist[-1]
+        self._len += 1
+
+        if len(sublist) > 2 * self.load:
+            self._lists[index : index + 1] = [sublist[: self.load], sublist[self.load :]]
+            self._maxes[index : index + 1] = [sublist[self.load - 1], sublist[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(index, 1)
+
+    def remove(self, key: int) -> bool:
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._lists):
+            return False
+
+        sublist = self._lists[index]
+        position = bisect.bisect_left(sublist, key)
+        if position == len(sublist) or sublist[position] != key:
+            return False
+
+        del sublist[position]
+        self._len -= 1
+        if sublist:
+            self._maxes[index] = sublist[-1]
+            self._tree_add(index, -1)
+        else:
+            del self._lists[index]
+            del self._maxes[index]
+            self._build_tree()
+        return True
+
+    def position(self, key: int) -> int:
+        """Amount of keys smaller than ``key``."""
+
+        index = bisect.bisect_left(self._maxes, key)
+        if index == len(self._lists):
+            return self._len
+        return self._tree_prefix(index) + bisect.bisect_left(self._lists[index], key)
+
+    def first(self, amount: int) -> list[int]:
+        result: list[int] = []
+        for sublist in self._lists:
+            if len(result) >= amount:
+                break
+            result.extend(sublist[: amount - len(result)])
+        return result
+
+
+class RankIndex:
+    """
+    In-memory global leaderboard by total xp.
+
+    Loaded once from the database, then kept up to date by the xp path (:meth:`User.increase_xp` calls :meth:`update`),
+    so ranks and the top users are answered from memory in O(log n) instead of counting the users table each time.
+    The whole index is reconciled against the database every :attr:`interval` seconds, in case rows were changed
+    elsewhere. Until it is loaded, :attr:`ready` is False and callers should fall back to SQL.
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance.
+    interval: :class:`float`
+        Seconds between reconciliations. (Default: 900.0)
+    """
+
+    def __init__(self, bot: Dwello, *, interval: float = 900.0) -> None:
+        self.bot: Dwello = bot
+        self.interval: float = interval
+
+        self._keys: SortedKeys = SortedKeys()
+        # user id -> total xp currently in the index
+        self._total_xp: dict[int, int] = {}
+        # updates that came in while a reconciliation was loading, applied on top of what it loaded
+        self._touched: dict[int, int] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self.ready: bool = False
+
+    def __len__(self) -> int:
+        return len(self._total_xp)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._total_xp
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                log.error("Failed to reconcile the rank index", exc_info=e)
+            await asyncio.sleep(self.interval)
+
+    def update(self, user_id: int, total_xp: int) -> None:
+        old = self._total_xp.get(user_id)
+        if old == total_xp:
+            return
+
+        if old is not None:
+            self._keys.remove(_key(user_id, old))
+        self._keys.add(_key(user_id, total_xp))
+        self._total_xp[user_id] = total_xp
+
+        if self._touched is not None:
+            self._touched[user_id] = total_xp
+
+    def remove(self, user_id: int) -> None:
+        if (old := self._total_xp.pop(user_id, None)) is not None:
+            self._keys.remove(_key(user_id, old))
+
+    def rank_of(self, total_xp: int) -> int:
+        """The rank a user with ``total_xp`` has: 1 plus the amount of users with more."""
+
+        # the smallest possible key with this total xp, every user with more xp sorts before it
+        return self._keys.position(_key(0, total_xp)) + 1
+
+    def get_rank(self, user_id: int) -> int | None:
+        total_xp = self._total_xp.get(user_id)
+        return None if total_xp is None else self.rank_of(total_xp)
+
+    def top(self, amount: int = 10) -> list[tuple[int, int]]:
+        """Returns (user id, total xp) of the ``amount`` users with the most total xp."""
+
+        return [_unkey(key) for key in self._keys.first(amount)]
+
+    async def fetch_top(self, amount: int = 10) -> list[tuple[int, int]]:
+        """Same as :meth:`top`, but queries the database while the index isn't loaded yet."""
+
+        if self.ready:
+            return self.top(amount)
+
+        async with self.bot.safe_connection(transaction=False) as conn:
+            statement = await conn.prepared("user.top")
+            records = await statement.fetch(amount)
+        return [(record["id"], record["total_xp"]) for record in records]
+
+    async def reconcile(self) -> None:
+        """Rebuilds the index from the users table, keeping xp that isn't written to it yet."""
+
+        self._touched = {}
+        try:
+            async with self.bot.safe_connection(transaction=False) as conn:
+                records = await conn.fetch("SELECT id, total_xp FROM users")
+
+            total_xp = {record["id"]: record["total_xp"] or 0 for record in records}
+            # xp still waiting in the accumulator, and updates that came in while loading
+            for user in self.bot.xp_accumulator.pending_users():
+                total_xp[user.id] = user.total_xp
+            total_xp.update(self._touched)
+        finally:
+            self._touched = None
+
+        self.load(total_xp)
+
+    def load(self, total_xp: dict[int, int]) -> None:
+        """Replaces the index with the given user id -> total xp mapping."""
+
+        self._keys.rebuild(_key(user_id, xp) for user_id, xp in total_xp.items())
+        self._total_xp = total_xp
+        self.ready = True
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from asyncpg.prepared_stmt import PreparedStatement
+
+
+log = logging.getLogger(__name__)
+
+
+# The hot queries, prepared once per connection (see :class:`PreparedConnection`) and referenced by name.
+STATEMENTS: dict[str, str] = {
+    # guilds, guild_config and the guild's twitch users in one row
+    "guild.select": """
+        SELECT g.*, c.*, ARRAY(SELECT t FROM twitch_users AS t WHERE t.guild_id = g.id) AS twitch_users
+        FROM guilds AS g
+        LEFT JOIN guild_config AS c ON c.guild_id = g.id
+        WHERE g.id = ANY($1::bigint[])
+    """,
+    # same shape as guild.select, for guilds that don't exist yet
+    "guild.create": """
+        WITH g AS (
+            INSERT INTO guilds (id) SELECT unnest($1::bigint[])
+            ON CONFLICT (id) DO UPDATE SET id = excluded.id
+            RETURNING *
+        ), c AS (
+            INSERT INTO guild_config (guild_id) SELECT unnest($1::bigint[])
+            ON CONFLICT (guild_id) DO UPDATE SET guild_id = excluded.guild_id
+            RETURNING *
+        )
+        SELECT g.*, c.*, ARRAY(SELECT t FROM twitch_users AS t WHERE t.guild_id = g.id) AS twitch_users
+        FROM g
+        JOIN c ON c.guild_id = g.id
+    """,
+    # users joined with user_config; rows that don't exist yet are created in the same statement
+    "user.load": """
+        WITH new_users AS (
+            INSERT INTO users (id) SELECT unnest($1::bigint[])
+            ON CONFLICT (id) DO NOTHING
+            RETURNING *
+        ), new_configs AS (
+            INSERT INTO user_config (user_id) SELECT unnest($1::bigint[])
+            ON CONFLICT (user_id) DO NOTHING
+            RETURNING *
+        ), u AS (
+            SELECT * FROM new_users
+            UNION ALL
+            SELECT * FROM users WHERE id = ANY($1::bigint[])
+        ), c AS (
+            SELECT * FROM new_configs
+            UNION ALL
+            SELECT * FROM user_config WHERE user_id = ANY($1::bigint[])
+        )
+        SELECT u.*, c.* FROM u JOIN c ON c.user_id = u.id
+    """,
+    # an index range scan on users_total_xp_idx, only used until the in-memory RankIndex is loaded
+    "user.rank": """
+        SELECT COUNT(*) + 1 AS rank
+        FROM users
+        WHERE total_xp > (SELECT total_xp FROM users WHERE id = $1)
+    """,
+    "user.top": "SELECT id, total_xp FROM users ORDER BY total_xp DESC, id LIMIT $1",
+    # incremented in place, cached users can be behind concurrent commands
+    "user.command_count": "UPDATE users SET command_count = command_count + $1 WHERE id = $2 RETURNING command_count",
+    # xp and level are absolute values (level-ups reset xp), total_xp and messages are deltas
+    "user.flush_xp": """
+        UPDATE users SET
+            xp = u.xp,
+            level = u.level,
+            total_xp = users.total_xp + u.total_xp,
+            messages = users.messages + u.messages
+        FROM unnest($1::bigint[], $2::bigint[], $3::bigint[], $4::bigint[], $5::bigint[])
+            AS u(id, xp, level, total_xp, messages)
+        WHERE users.id = u.id
+    """,
+    "prefixes.get": "SELECT * FROM prefixes WHERE guild_id = $1",
+    "warnings.get": "SELECT * FROM warnings WHERE guild_id = $1 AND user_id = $2",
+}
+
+
+class PreparedConnection(asyncpg.Connection):
+    """
+    Connection class for the pool that keeps the :data:`STATEMENTS` prepared.
+
+    Pass it as the pool's ``connection_class`` and :meth:`prepare_statements` as its ``init``,
+    so each connection parses and plans the hot queries once instead of on every call site.
+    """
+
+    __slots__ = ("_statements",)
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._statements: dict[str, PreparedStatement] = {}
+
+    async def prepared(self, name: str) -> PreparedStatement:
+        """Returns the prepared statement registered as ``name``, preparing it first if needed."""
+
+        try:
+            return self._statements[name]
+        except KeyError:
+            statement = self._statements[name] = await self.prepare(STATEMENTS[name])
+            return statement
+
+    async def prepare_statements(self) -> None:
+        for name in STATEMENTS:
+            try:
+                await self.prepared(name)
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError) as e:
+                # the schema isn't created yet, it'll be prepared on first use instead
+                log.debug("Couldn't prepare %s: %s", name, e)
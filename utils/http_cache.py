@@ -0,0 +1,353 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from yarl import URL
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+log = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """The parts of an aiohttp response that are cached: status, reason, content type and body."""
+
+    __slots__ = ("endpoint", "status", "reason", "content_type", "body", "expires_at")
+
+    def __init__(
+        self, endpoint: str, status: int, reason: str | None, content_type: str, body: bytes, expires_at: float,
+    ) -> None:
+        self.endpoint: str = endpoint
+        self.status: int = status
+        self.reason: str | None = reason
+        self.content_type: str = content_type
+        self.body: bytes = body
+        # unix time, so entries read back from disk after a restart expire when they should
+        self.expires_at: float = expires_at
+
+    def __repr__(self) -> str:
+        return f"<CachedResponse endpoint={self.endpoint!r} status={self.status} size={len(self.body)}>"
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    def json(self, *, loads: Callable[[str | bytes], Any] = json.loads) -> Any:
+        return loads(self.body)
+
+
+class EndpointStats:
+    __slots__ = ("hits", "disk_hits", "coalesced", "misses", "evictions")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        # requests that waited for an identical request already in flight
+        self.coalesced: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.disk_hits + self.coalesced + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of requests that didn't reach the API."""
+
+        return 1 - self.misses / self.requests if self.requests else 0.0
+
+
+class Endpoint:
+    """
+    How the responses of one API are cached.
+
+    Parameters
+    ----------
+    name: :class:`str`
+        The name requests refer to the endpoint by.
+    ttl: :class:`float`
+        Seconds a response is kept for.
+    statuses: Iterable[:class:`int`]
+        Response statuses that are cached, errors aren't by default. (Default: (200,))
+    casefold: :class:`bool`
+        Whether query values are casefolded and their whitespace collapsed for the key,
+        for APIs whose search doesn't care about either. (Default: False)
+    private_params: Iterable[:class:`str`]
+        Query parameters left out of the key (case-insensitive), like API keys, which then never
+        end up in memory dumps or on disk. (Default: ())
+    """
+
+    __slots__ = ("name", "ttl", "statuses", "casefold", "private_params", "stats")
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        *,
+        statuses: Iterable[int] = (200,),
+        casefold: bool = False,
+        private_params: Iterable[str] = (),
+    ) -> None:
+        self.name: str = name
+        self.ttl: float = ttl
+        self.statuses: frozenset[int] = frozenset(statuses)
+        self.casefold: bool = casefold
+        self.private_params: frozenset[str] = frozenset(p.casefold() for p in private_params)
+        self.stats: EndpointStats = EndpointStats()
+
+    def __repr__(self) -> str:
+        return f"<Endpoint name={self.name!r} ttl={self.ttl}>"
+
+
+class HTTPCache:
+    """
+    Response cache for third-party APIs requested through the bot's aiohttp session.
+
+    Requests go through a registered :class:`Endpoint`, which decides how long their responses are kept and which
+    statuses are cached. Responses are keyed by method, url (with its query sorted, and casefolded if the endpoint
+    wants that) and body, so ``?q=Paris&units=metric`` and ``?units=metric&q=paris`` share an entry. Identical
+    requests made while one is in flight share its response. Bodies are kept in memory up to ``max_bytes``,
+    least recently used first out, and if ``path`` is given also written to a file per response there,
+    so they survive restarts.
+
+    Parameters
+    ----------
+    session: :class:`aiohttp.ClientSession`
+        The session requests are made with.
+    max_bytes: :class:`int`
+        Maximum size of the response bodies kept in memory. (Default: 32 MiB)
+    path: :class:`str` | None
+        Directory of the on-disk store, responses are only kept in memory if None. (Default: None)
+    """
+
+    def __init__(self, session: ClientSession, *, max_bytes: int = 32 * 1024 * 1024, path: str | None = None) -> None:
+        self.session: ClientSession = session
+        self.max_bytes: int = max_bytes
+        self.path: str | None = path
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+        self.endpoints: dict[str, Endpoint] = {}
+        self._data: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[CachedResponse]] = {}
+        # disk writes in flight, referenced so they aren't garbage collected
+        self._writes: set[asyncio.Task[None]] = set()
+        self.bytes: int = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def add_endpoint(
+        self,
+        name: str,
+        ttl: float,
+        *,
+        statuses: Iterable[int] = (200,),
+        casefold: bool = False,
+        private_params: Iterable[str] = (),
+    ) -> Endpoint:
+        """Registers an endpoint, or updates it (keeping its stats) if it's registered already, like on cog reloads."""
+
+        endpoint = Endpoint(name, ttl, statuses=statuses, casefold=casefold, private_params=private_params)
+        if (old := self.endpoints.get(name)) is not None:
+            endpoint.stats = old.stats
+        self.endpoints[name] = endpoint
+        return endpoint
+
+    @staticmethod
+    def make_key(
+        endpoint: Endpoint,
+        method: str,
+        url: str | URL,
+        params: Mapping[str, Any] | None = None,
+        data: str | bytes | None = None,
+    ) -> str:
+        url = URL(url)
+        if params:
+            url = url.update_query({k: str(v) for k, v in params.items() if v is not None})
+
+        query = [
+            (k, " ".join(v.split()).casefold() if endpoint.casefold else v)
+            for k, v in url.query.items()
+            if k.casefold() not in endpoint.private_params
+        ]
+        key = f"{method.upper()} {url.with_query(sorted(query)).with_fragment(None)}"
+        if data:
+            key += f" {hashlib.sha1(data.encode() if isinstance(data, str) else data).hexdigest()}"
+        return key
+
+    def _file(self, key: str) -> str:
+        assert self.path is not None
+        return os.path.join(self.path, hashlib.sha256(key.encode()).hexdigest())
+
+    def _store(self, key: str, response: CachedResponse) -> None:
+        if len(response.body) > self.max_bytes:
+            return
+
+        if (old := self._data.pop(key, None)) is not None:
+            self.bytes -= len(old.body)
+
+        self._data[key] = response
+        self.bytes += len(response.body)
+
+        while self._data and self.bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= len(evicted.body)
+            if (endpoint := self.endpoints.get(evicted.endpoint)) is not None:
+                endpoint.stats.evictions += 1
+
+    def _read(self, key: str) -> CachedResponse | None:
+        file = self._file(key)
+        try:
+            with open(file, "rb") as f:
+                header, body = f.read().split(b"\n", 1)
+        except (OSError, ValueError):
+            return None
+
+        meta = json.loads(header)
+        if meta["expires_at"] <= time.time():
+            self._remove_file(file)
+            return None
+        return CachedResponse(
+            meta["endpoint"], meta["status"], meta["reason"], meta["content_type"], body, meta["expires_at"],
+        )
+
+    def _write(self, key: str, response: CachedResponse) -> None:
+        # the file is named after a hash of the key, the key itself isn't written
+        header = {
+            "endpoint": response.endpoint,
+            "status": response.status,
+            "reason": response.reason,
+            "content_type": response.content_type,
+            "expires_at": response.expires_at,
+        }
+        file = self._file(key)
+        # written to a temporary file first, so a crash never leaves half a response behind
+        with open(f"{file}.tmp", "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n" + response.body)
+        os.replace(f"{file}.tmp", file)
+
+    @staticmethod
+    def _remove_file(file: str) -> None:
+        with contextlib.suppress(OSError):
+            os.remove(file)
+
+    def _persist(self, key: str, response: CachedResponse) -> None:
+        task = asyncio.create_task(asyncio.to_thread(self._write, key, response))
+        self._writes.add(task)
+
+        def _written(task: asyncio.Task[None]) -> None:
+            self._writes.discard(task)
+            if not task.cancelled() and (e := task.exception()) is not None:
+                log.warning("Failed to write a cached response to disk", exc_info=e)
+
+        task.add_done_callback(_written)
+
+    def prune(self) -> int:
+        """Removes expired responses from the on-disk store, returns how many. Blocking, run it in a thread."""
+
+        if self.path is None:
+            return 0
+
+        now, removed = time.time(), 0
+        for name in os.listdir(self.path):
+            file = os.path.join(self.path, name)
+            try:
+                with open(file, "rb") as f:
+                    expires_at = json.loads(f.readline())["expires_at"]
+            except (OSError, ValueError, KeyError):
+                expires_at = 0.0
+            if expires_at <= now:
+                self._remove_file(file)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.bytes = 0
+
+    async def _fetch(
+        self, endpoint: Endpoint, key: str, method: str, url: str | URL, kwargs: dict[str, Any],
+    ) -> CachedResponse:
+        try:
+            if self.path is not None and (response := await asyncio.to_thread(self._read, key)) is not None:
+                endpoint.stats.disk_hits += 1
+                self._store(key, response)
+                return response
+
+            endpoint.stats.misses += 1
+            async with self.session.request(method, url, **kwargs) as resp:
+                body = await resp.read()
+                response = CachedResponse(
+                    endpoint.name, resp.status, resp.reason, resp.content_type, body, time.time() + endpoint.ttl,
+                )
+        finally:
+            self._inflight.pop(key, None)
+
+        if response.status in endpoint.statuses:
+            self._store(key, response)
+            if self.path is not None:
+                self._persist(key, response)
+        return response
+
+    async def request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str | URL,
+        *,
+        params: Mapping[str, Any] | None = None,
+        data: str | bytes | None = None,
+        headers: Mapping[str, str] | None = None,
+    ) -> CachedResponse:
+        """
+        Returns the cached response of the request, making it if there is none.
+
+        Headers aren't part of the key, requests of an endpoint are assumed to be authorized the same way.
+        Raises what the session raises, uncached statuses are returned like any other response.
+        """
+
+        _endpoint = self.endpoints[endpoint]
+        key = self.make_key(_endpoint, method, url, params, data)
+
+        if (response := self._data.get(key)) is not None:
+            if response.expires_at > time.time():
+                self._data.move_to_end(key)
+                _endpoint.stats.hits += 1
+                return response
+            del self._data[key]
+            self.bytes -= len(response.body)
+
+        task = self._inflight.get(key)
+        if task is None:
+            params = {k: str(v) for k, v in params.items() if v is not None} if params else None
+            kwargs = {"params": params, "data": data, "headers": headers}
+            task = self._inflight[key] = asyncio.create_task(self._fetch(_endpoint, key, method, url, kwargs))
+        else:
+            _endpoint.stats.coalesced += 1
+        # shielded, so one cancelled caller doesn't cancel the request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    async def get(self, endpoint: str, url: str | URL, **kwargs: Any) -> CachedResponse:
+        return await self.request(endpoint, "GET", url, **kwargs)
+
+    async def post(self, endpoint: str, url: str | URL, **kwargs: Any) -> CachedResponse:
+        return await self.request(endpoint, "POST", url, **kwargs)
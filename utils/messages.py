@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from collections import OrderedDict
+from datetime import datetime
+
+import discord
+
+
+class CachedMessage:
+    """
+    Compact, read-only projection of a :class:`discord.Message`.
+
+    Only keeps what previews and lookups need, so thousands of them cost far less than
+    the full message objects (with their author, channel, embed and attachment state) would.
+    """
+
+    __slots__ = (
+        "id",
+        "channel_id",
+        "guild_id",
+        "author_id",
+        "author_name",
+        "author_avatar_url",
+        "content",
+        "jump_url",
+        "nsfw",
+        "created_at",
+        "size",
+    )
+
+    def __init__(
+        self,
+        *,
+        id: int,
+        channel_id: int,
+        guild_id: int | None,
+        author_id: int,
+        author_name: str,
+        author_avatar_url: str,
+        content: str,
+        jump_url: str,
+        nsfw: bool,
+        created_at: datetime,
+    ) -> None:
+        self.id: int = id
+        self.channel_id: int = channel_id
+        self.guild_id: int | None = guild_id
+        self.author_id: int = author_id
+        self.author_name: str = author_name
+        self.author_avatar_url: str = author_avatar_url
+        self.content: str = content
+        self.jump_url: str = jump_url
+        self.nsfw: bool = nsfw
+        self.created_at: datetime = created_at
+        # approximate memory footprint in bytes
+        self.size: int = sys.getsizeof(self) + sum(
+            sys.getsizeof(s) for s in (author_name, author_avatar_url, content, jump_url)
+        )
+
+    def __repr__(self) -> str:
+        return f"<CachedMessage id={self.id} channel_id={self.channel_id} author_id={self.author_id}>"
+
+    @classmethod
+    def from_message(cls, message: discord.Message) -> CachedMessage:
+        is_nsfw = getattr(message.channel, "is_nsfw", None)
+        return cls(
+            id=message.id,
+            channel_id=message.channel.id,
+            guild_id=message.guild.id if message.guild else None,
+            author_id=message.author.id,
+            author_name=message.author.name,
+            author_avatar_url=message.author.display_avatar.url,
+            content=message.content,
+            jump_url=message.jump_url,
+            nsfw=bool(is_nsfw and is_nsfw()),
+            created_at=message.created_at,
+        )
+
+
+class MessageCache:
+    """
+    LRU cache of :class:`CachedMessage`, bounded by both entries and (approximate) bytes.
+
+    Concurrent fetches of the same message share a single ``fetch_message`` request.
+    Entries should be invalidated on raw message delete and edit events.
+
+    Parameters
+    ----------
+    maxsize: :class:`int`
+        Maximum amount of messages kept. (Default: 5000)
+    max_bytes: :class:`int`
+        Maximum approximate memory footprint of the kept messages. (Default: 8 MiB)
+    """
+
+    def __init__(self, maxsize: int = 5000, max_bytes: int = 8 * 1024 * 1024) -> None:
+        self.maxsize: int = maxsize
+        self.max_bytes: int = max_bytes
+
+        self._data: OrderedDict[int, CachedMessage] = OrderedDict()
+        self._inflight: dict[int, asyncio.Task[tuple[discord.Message, CachedMessage]]] = {}
+        self.bytes: int = 0
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._data
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    def get(self, message_id: int) -> CachedMessage | None:
+        try:
+            cached = self._data[message_id]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(message_id)
+        self.hits += 1
+        return cached
+
+    def put(self, message: discord.Message) -> CachedMessage:
+        cached = CachedMessage.from_message(message)
+        self._store(cached)
+        return cached
+
+    def _store(self, cached: CachedMessage) -> None:
+        if (old := self._data.pop(cached.id, None)) is not None:
+            self.bytes -= old.size
+
+        self._data[cached.id] = cached
+        self.bytes += cached.size
+
+        while self._data and (len(self._data) > self.maxsize or self.bytes > self.max_bytes):
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, message_id: int) -> bool:
+        # a fetch that is still running won't store its (possibly outdated) result either
+        self._inflight.pop(message_id, None)
+        if (old := self._data.pop(message_id, None)) is None:
+            return False
+        self.bytes -= old.size
+        return True
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._inflight.clear()
+        self.bytes = 0
+
+    def get_stats(self) -> tuple[int, int, int]:
+        """Returns a tuple of hits, misses and evictions."""
+        return self.hits, self.misses, self.evictions
+
+    async def _fetch(self, channel: discord.abc.Messageable, message_id: int) -> tuple[discord.Message, CachedMessage]:
+        current = asyncio.current_task()
+        try:
+            message = await channel.fetch_message(message_id)
+        finally:
+            invalidated = self._inflight.get(message_id) is not current
+            if not invalidated:
+                del self._inflight[message_id]
+
+        cached = CachedMessage.from_message(message)
+        if not invalidated:
+            self._store(cached)
+        return message, cached
+
+    async def _request(self, channel: discord.abc.Messageable, message_id: int) -> tuple[discord.Message, CachedMessage]:
+        task = self._inflight.get(message_id)
+        if task is None:
+            task = self._inflight[message_id] = asyncio.create_task(self._fetch(channel, message_id))
+        # shielded, so one cancelled caller doesn't cancel the request for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    async def fetch(self, channel: discord.abc.Messageable, message_id: int) -> discord.Message:
+        """Fetches the full message from the API and caches its projection."""
+
+        message, _ = await self._request(channel, message_id)
+        return message
+
+    async def get_or_fetch(self, channel: discord.abc.Messageable, message_id: int) -> CachedMessage:
+        """Returns the cached projection, fetching the message on a miss."""
+
+        if (cached := self.get(message_id)) is not None:
+            return cached
+        _, cached = await self._request(channel, message_id)
+        return cached
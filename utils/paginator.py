@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 import contextlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import TYPE_CHECKING, Any, TypeVar
 
 import discord
@@ -21,6 +24,127 @@ if TYPE_CHECKING:
 DPT = TypeVar("DPT", bound="DefaultPaginator")
 
 
+class PageSource:
+    """
+    Pages of a :class:`DefaultPaginator` that are rendered when they're shown, instead of all of them up front.
+
+    ``pages`` is either a coroutine function rendering the page at an index, or an async iterator yielding the
+    pages in order. The last ``cache_size`` rendered pages of a function are kept (an iterator's pages are all
+    kept, it can't render them again), and concurrent requests for a page share one render. Without a ``length``
+    the pages end where the function raises :class:`IndexError` or the iterator is exhausted.
+
+    Parameters
+    ----------
+    pages: Callable[[int], Awaitable[Embed]] | AsyncIterator[Embed]
+        Renders or yields the pages.
+    length: :class:`int` | None
+        Amount of pages, if it's known. (Default: None)
+    cache_size: :class:`int`
+        Maximum amount of rendered pages kept. (Default: 8)
+    """
+
+    def __init__(
+        self,
+        pages: Callable[[int], Awaitable[Embed]] | AsyncIterator[Embed],
+        length: int | None = None,
+        *,
+        cache_size: int = 8,
+    ) -> None:
+        self.length: int | None = length
+        self.cache_size: int = cache_size
+
+        self._render: Callable[[int], Awaitable[Embed]] | None = None
+        self._iterator: AsyncIterator[Embed] | None = None
+        if isinstance(pages, AsyncIterator):
+            self._iterator = pages
+        else:
+            self._render = pages
+
+        # pages yielded by the iterator so far
+        self._iterated: list[Embed] = []
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._pages: OrderedDict[int, asyncio.Task[Embed]] = OrderedDict()
+
+    def __repr__(self) -> str:
+        return f"<PageSource length={self.length} cached={len(self._pages)}>"
+
+    async def _next_pages(self, index: int) -> Embed:
+        assert self._iterator is not None
+        async with self._lock:
+            while len(self._iterated) <= index:
+                try:
+                    self._iterated.append(await anext(self._iterator))
+                except StopAsyncIteration:
+                    self.length = len(self._iterated)
+                    raise IndexError(index) from None
+            return self._iterated[index]
+
+    async def _render_page(self, index: int) -> Embed:
+        if self._render is None:
+            embed = await self._next_pages(index)
+        else:
+            try:
+                embed = await self._render(index)
+            except IndexError:
+                if self.length is None:
+                    self.length = index
+                raise
+
+        if not embed.footer:
+            embed.set_footer(text=f"Page: {index+1}")
+        return embed
+
+    def _page(self, index: int) -> asyncio.Task[Embed]:
+        if (task := self._pages.get(index)) is not None:
+            self._pages.move_to_end(index)
+            return task
+
+        task = self._pages[index] = asyncio.create_task(self._render_page(index))
+        task.add_done_callback(lambda task: self._done(index, task))
+        while len(self._pages) > self.cache_size:
+            self._pages.popitem(last=False)
+        return task
+
+    def _done(self, index: int, task: asyncio.Task[Embed]) -> None:
+        # failed renders aren't kept, also marks the exception as retrieved for prefetches nobody awaited
+        if (task.cancelled() or task.exception() is not None) and self._pages.get(index) is task:
+            del self._pages[index]
+
+    async def get_page(self, index: int) -> Embed:
+        """Returns the rendered page, rendering it if it isn't. Raises :class:`IndexError` if there is no such page."""
+
+        if index < 0 or (self.length is not None and index >= self.length):
+            raise IndexError(index)
+        # shielded, so a cancelled caller doesn't cancel a render other callers (or the cache) wait for
+        return await asyncio.shield(self._page(index))
+
+    async def has_page(self, index: int) -> bool:
+        """Whether the page exists, which renders it if the length isn't known."""
+
+        try:
+            await self.get_page(index)
+        except IndexError:
+            return False
+        return True
+
+    def is_rendered(self, index: int) -> bool:
+        """Whether the page can be returned without waiting for it to render."""
+
+        task = self._pages.get(index)
+        return task is not None and task.done() and not task.cancelled() and task.exception() is None
+
+    def prefetch(self, index: int) -> None:
+        """Starts rendering the page in the background, if it exists and isn't rendered yet."""
+
+        if index >= 0 and (self.length is None or index < self.length):
+            self._page(index)
+
+    def invalidate(self, index: int) -> None:
+        """Drops the rendered page, so it's rendered again the next time it's shown. Pages of iterators are kept."""
+
+        self._pages.pop(index, None)
+
+
 class PreviousPageButton(Button["DefaultPaginator"]):
     def __init__(
         self,
@@ -34,9 +158,7 @@ class PreviousPageButton(Button["DefaultPaginator"]):
         assert self.view is not None
         view: DefaultPaginator = self.view
 
-        view.current_page -= 1
-        view._update_buttons()
-        await interaction.response.edit_message(embed=view.current_embed, view=view)
+        await view.turn_page(interaction, view.current_page - 1)
 
 
 class StopViewButton(Button["DefaultPaginator"]):
@@ -71,9 +193,7 @@ class NextPageButton(Button["DefaultPaginator"]):
         assert self.view is not None
         view: DefaultPaginator = self.view
 
-        view.current_page += 1
-        view._update_buttons()
-        await interaction.response.edit_message(embed=view.current_embed, view=view) # changed
+        await view.turn_page(interaction, view.current_page + 1)
 
 
 class GoBackButton(Button["DefaultPaginator"]):
@@ -90,7 +210,7 @@ class GoBackButton(Button["DefaultPaginator"]):
 
 class DefaultPaginator(View):
     """
-    A simple paginator that paginates through a list of embeds.
+    A simple paginator that paginates through a list of embeds, or the pages of a :class:`PageSource`.
 
     go_back_content:
         If you have another view or content you want to switch to you can pass that to the class and it'll be passed onto
@@ -103,7 +223,7 @@ class DefaultPaginator(View):
     def __init__(
         self,
         obj: Context | Interaction[Dwello],
-        embeds: list[Embed],
+        embeds: list[Embed] | PageSource,
         /,
         values: list[Any] | None = None,
         delete_button: bool | None = False,
@@ -121,7 +241,10 @@ class DefaultPaginator(View):
             self.bot: Dwello = obj.client
             self.interaction: Interaction = obj
 
-        self.embeds = self._reconstruct_embeds(embeds)
+        # embeds of a page source are rendered by it, self.embeds stays empty then
+        self.source: PageSource | None = embeds if isinstance(embeds, PageSource) else None
+        self.embeds = [] if self.source is not None else self._reconstruct_embeds(embeds)
+        self._shown: Embed | None = None
 
         self.values = values
         self.delete_button = delete_button
@@ -130,7 +253,8 @@ class DefaultPaginator(View):
         self.next = NextPageButton()
         self.previous = PreviousPageButton()
 
-        if len(self.embeds) > 1:
+        # a source of unknown length might have a single page, the buttons are removed in _start then
+        if self.page_count is None or self.page_count > 1:
             self.add_item(self.previous)
             self.add_item(self.next)
 
@@ -148,9 +272,62 @@ class DefaultPaginator(View):
         # for now its for customisation paginator, so i would be able to edit the views whilst 'paginating'
         # although should be modified in the future, but now im lazy sooo
 
+    @property
+    def page_count(self) -> int | None:
+        """Amount of pages, None if the page source doesn't know it yet."""
+
+        return self.source.length if self.source is not None else len(self.embeds)
+
     @property
     def current_embed(self) -> Embed:
-        return self.embeds[self.current_page]
+        """The embed of the current page. For a page source, that's the page last returned by :meth:`show_page`."""
+
+        if self.source is None:
+            return self.embeds[self.current_page]
+        if self._shown is None:
+            raise RuntimeError("No page of the source has been shown yet")
+        return self._shown
+
+    async def get_page(self, index: int) -> Embed:
+        if self.source is not None:
+            return await self.source.get_page(index)
+        return self.embeds[index]
+
+    async def show_page(self, index: int) -> Embed:
+        """Moves to the page and returns it, rendering the next one ahead of time."""
+
+        embed = await self.get_page(index)
+        self.current_page = index
+        self._shown = embed
+        if self.source is not None:
+            # not awaited, this runs before button clicks are answered
+            self.source.prefetch(index + 1)
+        self._update_buttons()
+        return embed
+
+    async def turn_page(self, interaction: Interaction, index: int) -> None:
+        """
+        Shows the page in response to a button click.
+
+        Interactions have to be answered within 3 seconds, so the click is deferred first if the page of the
+        source isn't rendered yet. If a source of unknown length turns out to end before the page, the current
+        page stays with the next button disabled.
+        """
+
+        source = self.source
+        if source is not None and (source.length is None or index < source.length) and not source.is_rendered(index):
+            await interaction.response.defer()
+
+        try:
+            embed = await self.show_page(index)
+        except IndexError:
+            self._update_buttons()
+            embed = self.current_embed
+
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embed=embed, view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
 
     @property
     def current_value(self) -> Any | None:
@@ -171,7 +348,7 @@ class DefaultPaginator(View):
 
     def _update_buttons(self) -> None:
         page = self.current_page
-        total = len(self.embeds) - 1
+        total = self.page_count - 1 if self.page_count is not None else None
         self.next.disabled = page == total
         self.previous.disabled = page == 0
         self.next.style = self.btn_styles[page == total]
@@ -186,8 +363,14 @@ class DefaultPaginator(View):
             await self.message.edit(view=self)
 
     async def _start(self) -> Self:  # Here's Self is needed
-        self._update_buttons()
-        embed = self.embeds[0]
+        embed = await self.show_page(0)
+        if self.ctx and self.source is not None and self.source.length is None:
+            # there's no interaction waiting to be answered, so whether a second page exists can be awaited
+            await self.source.has_page(1)
+            self._update_buttons()
+        if self.page_count == 1 and self.source is not None:
+            self.remove_item(self.previous)
+            self.remove_item(self.next)
         if self.ctx:
             self.message = await self.ctx.send(embed=embed, view=self)  # type: ignore  # message could be None
         else:
@@ -208,7 +391,7 @@ class DefaultPaginator(View):
     async def start(
         cls: type[DPT],
         obj: Context | Interaction[Dwello],
-        embeds: list[Embed],
+        embeds: list[Embed] | PageSource,
         /,
         values: list[Any] | None = None,
         delete_button: bool | None = False,
@@ -1,13 +1,24 @@
+import asyncio
+import functools
+import os
 from io import BytesIO
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, BinaryIO, List, Optional, Tuple
 
 import discord
+import numpy as np
 import requests
-from PIL import Image, ImageDraw, ImageFont, ImageSequence, UnidentifiedImageError
+from PIL import Image, ImageDraw, ImageFont, ImageSequence
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
 
 # rename folder and store datasets and pillow within
 DIR = "storage/pillow/"
 
+_WELCOME_SIZE = (920, 500)
+_PFP_SIZE = 172
+_BORDER_SIZE = 185
+
 
 def get_center(size: Tuple[int, int], bbsize: Tuple[int, int, int, int]) -> List[float]:
     W, H = size
@@ -22,11 +33,29 @@ def download_pfp(url: str) -> BytesIO:
     return BytesIO(resp.content)
 
 
+@functools.lru_cache(maxsize=128)
+def _load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(path, size)
+
+
 def get_font(text: str, size: int) -> ImageFont.FreeTypeFont:
     if text.isascii():
-        return ImageFont.truetype(f"{DIR}LemonMilk.otf", size)
+        return _load_font(f"{DIR}LemonMilk.otf", size)
+
+    return _load_font(f"{DIR}Arial.ttf", size)
 
-    return ImageFont.truetype(f"{DIR}Arial.ttf", size)
+
+def fit_font(text: str, size: int, width: float) -> ImageFont.FreeTypeFont:
+    """Returns the font of the biggest size up to ``size`` that ``text`` fits into ``width`` with."""
+
+    low, high = 1, size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if get_font(text, middle).getlength(text) <= width:
+            low = middle
+        else:
+            high = middle - 1
+    return get_font(text, low)
 
 def has_extension(filename: str) -> bool:
     # Split the filename into parts using the dot as a separator
@@ -41,117 +70,286 @@ def has_extension(filename: str) -> bool:
     
     return False
 
-def resize_gif(_bytes: bytes | BytesIO, _size: tuple[int, int], /, _buffer: BytesIO = BytesIO()) -> Image:
-    im = Image.open(BytesIO(_bytes)) if isinstance(_bytes, bytes) else Image.open(_bytes)
+def resize_gif(image: bytes | BinaryIO | Image.Image, size: tuple[int, int], buffer: BinaryIO | None = None, /) -> BinaryIO:
+    """Resizes every frame of a GIF into ``buffer`` (a new one if not given), one frame at a time."""
+
+    buffer = BytesIO() if buffer is None else buffer
+    if not isinstance(image, Image.Image):
+        image = Image.open(BytesIO(image) if isinstance(image, bytes) else image)
 
-    # Wrap on-the-fly thumbnail generator
+    # Wrap on-the-fly thumbnail generator, Pillow pulls the frames while saving, so they're never all resized at once
     def thumbnails(frames):
         for frame in frames:
-            yield frame.resize(_size)
+            yield frame.resize(size)
 
-    frames = thumbnails(ImageSequence.Iterator(im))
+    frames = thumbnails(ImageSequence.Iterator(image))
 
     # Save output
     om = next(frames) # Handle first frame separately
-    om.info = im.info # Copy sequence info
-    om.save(_buffer, save_all=True, append_images=list(frames), loop=0, disposal=2, format="GIF")
-    return om
+    om.info = image.info # Copy sequence info
+    om.save(buffer, save_all=True, append_images=frames, loop=0, disposal=2, format="GIF")
+    return buffer
+
+
+def _resized_name(filename: str | None, extension: str) -> str:
+    if filename:
+        return filename if has_extension(filename) else f"{filename}{extension}"
+    return f"image{extension}"
+
+
+def _save_resized(image: Image.Image, size: tuple[int, int], extension: str, buffer: BinaryIO) -> None:
+    if extension == ".gif":
+        resize_gif(image, size, buffer)
+        return
+
+    _format = "JPEG" if (_ext := extension[1:].upper()) == "JPG" else _ext
+    resized = image.resize(size)
+    if _format == "JPEG" and resized.mode not in ("RGB", "L"):
+        resized = resized.convert("RGB")
+    resized.save(buffer, format=_format)
+
 
 def resize_from_url(url: str, size: tuple[int, int], _file_extension: str = ".png") -> discord.File:
     return resize_discord_file(download_pfp(url), size, _file_extension)
 
 def resize_discord_file(file: discord.File | BytesIO, size: tuple[int, int], _file_extension: str = ".png") -> discord.File:
     buffer = BytesIO()
-    _file = BytesIO(file.fp.read()) if isinstance(file, discord.File) else file
-    try:
-        if _file_extension == ".gif":
-            resize_gif(_file, size, buffer)
-        else:
-            image = Image.open(_file).resize(size)
-            image.save(buffer, format="JPEG" if (_ext:= _file_extension[1:].upper()) == "JPG" else _ext)
-    except UnidentifiedImageError as e:
-        raise e
+    with Image.open(file.fp if isinstance(file, discord.File) else file) as image:
+        _save_resized(image, size, _file_extension, buffer)
     buffer.seek(0)
-    if isinstance(file, discord.File) and file.filename:
-        name = file.filename if has_extension(file.filename) else f'{file.filename}{_file_extension}'
-    else:
-        name = f'image{_file_extension}'
-    return discord.File(buffer, name)
-
-def get_welcome_card(text: str, pfp_url: str, text2: Optional[str] = None) -> Image.Image:
-    with Image.open(f"{DIR}images/2TVCKxLS.jpg").convert("RGBA") as base:
-        base = base.resize((920, 500))
-        txt = Image.new("RGBA", base.size, (255, 255, 255, 0))
-
-        # Get fitting font size
-        fontsize = 64
-        font = get_font(text, fontsize)
-        while font.getlength(text) > (base.size[0] - 80):
-            fontsize -= 1
-            font = get_font(text, fontsize)
-
-        # Draw text
-        d = ImageDraw.Draw(txt)
-        bb = d.textbbox((0, 0), text, font=font)
-        pos1 = get_center(base.size, bb)
-        l, t, r, b = d.textbbox(tuple(pos1), text, font=font)  # noqa: E741
-        d.rectangle((l-20, t-20, r+20, b+20), fill=(0, 0, 0, 150))
-        d.text(tuple(pos1), text, font=font)
-
-        if text2:
-            # Get second font
-            font2size = 24
-            font2 = get_font(text2, font2size)
-            while font2.getlength(text2) > (base.size[0] - 80):
-                font2size -= 1
-                font2 = get_font(text2, font2size)
-
-            # Draw second text
-            bb2 = d.textbbox((0, 0), text2, font=font2)
-            pos11 = get_center(base.size, bb2)
-            pos11[1] += 80
-            l, t, r, b = d.textbbox(tuple(pos11), text2, font=font2)  # noqa: E741
-            d.rectangle((l-10, t-10, r+10, b+10), fill=(0, 0, 0, 150))
-            d.text(tuple(pos11), text2, font=font2)
-
-        # Paste text
-        out = Image.alpha_composite(base, txt)
-        base.paste(out)
-
-        # Get profile picture
-        pfp = Image.open(download_pfp(pfp_url))
-        pfp = pfp.resize((172, 172))
-
-        # Get position for profile picture
-        pos2 = get_center(base.size, pfp.getbbox())  # type: ignore
-        pos2[1] -= (base.size[1] / 3) - 22
-        pos2 = tuple(int(i) for i in pos2)
-
-        # Create border and create profile picture
-        mask = Image.open(f"{DIR}images/mask.jpg").convert("L").resize((172, 172))
-        mask2 = mask.resize((185, 185))
-        border = Image.new("L", (185, 185), 255)
-        pos3 = get_center(base.size, border.getbbox())  # type: ignore
-        pos3[1] -= (base.size[1] / 3) - 22
-        pos3 = tuple(int(i) for i in pos3)
-        base.paste(border, pos3, mask2)
-        base.paste(pfp, pos2, mask)
-
-        return base
-    
+    return discord.File(buffer, _resized_name(file.filename if isinstance(file, discord.File) else None, _file_extension))
+
+
+class ResizeLimitError(Exception):
+    """Raised when an image, or what resizing it would produce, is bigger than :class:`ImageResizer` allows."""
+
+
+class _BudgetedBuffer(BytesIO):
+    # stops the encoder as soon as the output gets bigger than the budget, instead of after writing all of it
+    def __init__(self, budget: int) -> None:
+        super().__init__()
+        self.budget: int = budget
+
+    def write(self, data: Any) -> int:
+        if self.tell() + len(data) > self.budget:
+            raise ResizeLimitError(f"The resized image would be bigger than {self.budget // 1024} KiB.")
+        return super().write(data)
+
+
+class ImageResizer:
+    """
+    Resizes attachments in threads, with bounded memory.
+
+    Attachments are checked against ``max_input_bytes`` before they're downloaded, and images against
+    ``max_pixels`` (per frame), ``max_frames`` and ``max_output_pixels`` (frames times the new size) before
+    anything is decoded. GIF frames are resized one at a time while they're encoded, into a buffer of the
+    request that refuses to grow past the output budget. At most ``concurrency`` images are resized at once.
+
+    Parameters
+    ----------
+    max_input_bytes: :class:`int`
+        Largest file that's downloaded. (Default: 25 MiB)
+    max_pixels: :class:`int`
+        Largest input frame, in pixels. (Default: 4096 * 4096)
+    max_frames: :class:`int`
+        Most frames an animated image can have. (Default: 500)
+    max_output_pixels: :class:`int`
+        Most pixels of all resized frames together, the GIF encoder keeps each of them in memory. (Default: 64M)
+    max_output_bytes: :class:`int`
+        Default output budget, if a request doesn't give its own (like the guild's upload limit). (Default: 10 MiB)
+    concurrency: :class:`int`
+        Maximum amount of images resized at once. (Default: 2)
+    """
+
+    def __init__(
+        self,
+        *,
+        max_input_bytes: int = 25 * 1024 * 1024,
+        max_pixels: int = 4096 * 4096,
+        max_frames: int = 500,
+        max_output_pixels: int = 64_000_000,
+        max_output_bytes: int = 10 * 1024 * 1024,
+        concurrency: int = 2,
+    ) -> None:
+        self.max_input_bytes: int = max_input_bytes
+        self.max_pixels: int = max_pixels
+        self.max_frames: int = max_frames
+        self.max_output_pixels: int = max_output_pixels
+        self.max_output_bytes: int = max_output_bytes
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    def check_input(self, size: int) -> None:
+        if size > self.max_input_bytes:
+            raise ResizeLimitError(f"Files can't be bigger than {self.max_input_bytes // (1024 * 1024)} MiB.")
+
+    def resize(self, fp: BinaryIO, size: tuple[int, int], extension: str, *, budget: int | None = None) -> BytesIO:
+        """Resizes the image in ``fp`` into a new buffer. Blocking, use :meth:`resize_file` from async code."""
+
+        width, height = size
+        if width < 1 or height < 1:
+            raise ResizeLimitError("The width and height have to be positive.")
+
+        with Image.open(fp) as image:
+            if image.width * image.height > self.max_pixels:
+                raise ResizeLimitError(f"Images can't have more than {self.max_pixels} pixels.")
+
+            # for GIFs this only skims over the frames, without decoding them
+            frames = getattr(image, "n_frames", 1) if extension == ".gif" else 1
+            if frames > self.max_frames:
+                raise ResizeLimitError(f"Animated images can't have more than {self.max_frames} frames.")
+            if frames * width * height > self.max_output_pixels:
+                raise ResizeLimitError("The resized image would be too big, try a smaller size.")
+
+            buffer = _BudgetedBuffer(min(budget or self.max_output_bytes, self.max_output_bytes))
+            _save_resized(image, size, extension, buffer)
+
+        buffer.seek(0)
+        return buffer
+
+    async def resize_file(
+        self,
+        file: discord.Attachment | discord.File,
+        size: tuple[int, int],
+        extension: str,
+        *,
+        budget: int | None = None,
+    ) -> discord.File:
+        """
+        Resizes an attachment (downloaded if it's within the input limit) or a file in a thread.
+
+        Raises :class:`ResizeLimitError` if it's over one of the limits, or ``budget`` bytes once resized.
+        """
+
+        if isinstance(file, discord.Attachment):
+            self.check_input(file.size)
+            fp: BinaryIO = BytesIO(await file.read())
+        else:
+            fp = file.fp
+            fp.seek(0, os.SEEK_END)
+            self.check_input(fp.tell())
+            fp.seek(0)
+
+        async with self._semaphore:
+            buffer = await asyncio.to_thread(self.resize, fp, size, extension, budget=budget)
+        return discord.File(buffer, _resized_name(file.filename, extension))
+
+    async def resize_url(
+        self,
+        session: "ClientSession",
+        url: str,
+        size: tuple[int, int],
+        extension: str,
+        *,
+        budget: int | None = None,
+    ) -> discord.File:
+        """
+        Downloads the image with ``session``, stopping once it's over the input limit, and resizes it in a thread.
+
+        Raises :class:`ResizeLimitError` like :meth:`resize_file`, and what the session raises.
+        """
+
+        data = BytesIO()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            if response.content_length is not None:
+                self.check_input(response.content_length)
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                data.write(chunk)
+                self.check_input(data.tell())
+
+        data.seek(0)
+        return await self.resize_file(discord.File(data), size, extension, budget=budget)
+
+
+# the template and masks are decoded once (per process) and copied for every card
+
+
+@functools.lru_cache(maxsize=1)
+def _welcome_template() -> Image.Image:
+    with Image.open(f"{DIR}images/2TVCKxLS.jpg") as image:
+        return image.convert("RGBA").resize(_WELCOME_SIZE)
+
+
+@functools.lru_cache(maxsize=1)
+def _welcome_masks() -> Tuple[Image.Image, Image.Image, Image.Image]:
+    """Returns the profile picture mask, the border mask and the border."""
+
+    with Image.open(f"{DIR}images/mask.jpg") as image:
+        mask = image.convert("L").resize((_PFP_SIZE, _PFP_SIZE))
+    return mask, mask.resize((_BORDER_SIZE, _BORDER_SIZE)), Image.new("L", (_BORDER_SIZE, _BORDER_SIZE), 255)
+
+
+def get_welcome_card(text: str, pfp: bytes | None, text2: Optional[str] = None) -> Image.Image:
+    base = _welcome_template().copy()
+    txt = Image.new("RGBA", base.size, (255, 255, 255, 0))
+
+    # Get fitting font size
+    font = fit_font(text, 64, base.size[0] - 80)
+
+    # Draw text
+    d = ImageDraw.Draw(txt)
+    bb = d.textbbox((0, 0), text, font=font)
+    pos1 = get_center(base.size, bb)
+    l, t, r, b = d.textbbox(tuple(pos1), text, font=font)  # noqa: E741
+    d.rectangle((l-20, t-20, r+20, b+20), fill=(0, 0, 0, 150))
+    d.text(tuple(pos1), text, font=font)
+
+    if text2:
+        # Get second font
+        font2 = fit_font(text2, 24, base.size[0] - 80)
+
+        # Draw second text
+        bb2 = d.textbbox((0, 0), text2, font=font2)
+        pos11 = get_center(base.size, bb2)
+        pos11[1] += 80
+        l, t, r, b = d.textbbox(tuple(pos11), text2, font=font2)  # noqa: E741
+        d.rectangle((l-10, t-10, r+10, b+10), fill=(0, 0, 0, 150))
+        d.text(tuple(pos11), text2, font=font2)
+
+    # Paste text
+    base = Image.alpha_composite(base, txt)
+
+    # Get position for profile picture
+    mask, mask2, border = _welcome_masks()
+    pos2 = get_center(base.size, mask.getbbox())  # type: ignore
+    pos2[1] -= (base.size[1] / 3) - 22
+    pos2 = tuple(int(i) for i in pos2)
+
+    # Create border and paste profile picture, cards of avatars that couldn't be downloaded only get the border
+    pos3 = get_center(base.size, border.getbbox())  # type: ignore
+    pos3[1] -= (base.size[1] / 3) - 22
+    pos3 = tuple(int(i) for i in pos3)
+    base.paste(border, pos3, mask2)
+    if pfp is not None:
+        with Image.open(BytesIO(pfp)) as image:
+            base.paste(image.convert("RGBA").resize((_PFP_SIZE, _PFP_SIZE)), pos2, mask)
+
+    return base
+
+
+def render_welcome_card(text: str, pfp: bytes | None, text2: Optional[str] = None) -> bytes:
+    buffer = BytesIO()
+    get_welcome_card(text, pfp, text2).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def get_dominant_colour(data: bytes) -> Tuple[int, int, int] | None:
+    """
+    Returns the most common colour of an image, ignoring transparent pixels.
+
+    Colours are quantized to 5 bits per channel before counting, so close shades of a photo count as one,
+    and the average of the pixels in the most common bucket is returned. Meant for small avatars (64x64),
+    returns None if every pixel is transparent.
+    """
+
+    with Image.open(BytesIO(data)) as image:
+        pixels = np.asarray(image.convert("RGBA")).reshape(-1, 4)
+
+    pixels = pixels[pixels[:, 3] != 0, :3].astype(np.uint32)
+    if not len(pixels):
+        return None
 
-async def get_avatar_dominant_color(member: discord.Member | discord.User | discord.ClientUser) -> discord.Colour | None:
-    image = Image.open(BytesIO(await member.display_avatar.read()))
-    colours = [
-        colour
-        for colour in sorted(
-            image.getcolors(image.size[0] * image.size[1]),
-            key=lambda c: c[0],  # Sorts by most amount of pixels
-            reverse=True,
-        )
-        if colour[-1][-1] != 0  # Ignores transparent pixels
-    ]
-
-    most_used_colour = colours[0][1]  # This will be a tuple of the format (RRR, GGG, BBB, AAA)
-    r, g, b = most_used_colour[0], most_used_colour[1], most_used_colour[2]
-    return discord.Colour.from_rgb(r, g, b)
\ No newline at end of file
+    buckets = ((pixels[:, 0] >> 3) << 10) | ((pixels[:, 1] >> 3) << 5) | (pixels[:, 2] >> 3)
+    counts = np.bincount(buckets, minlength=1 << 15)
+    r, g, b = pixels[buckets == counts.argmax()].mean(axis=0).round().astype(int)
+    return int(r), int(g), int(b)
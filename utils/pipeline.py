@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable, Coroutine
+from typing import TYPE_CHECKING, Any, ClassVar
+
+import discord
+
+from .database.metrics import LatencyHistogram
+from .database.orm import Guild, User
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+
+log = logging.getLogger(__name__)
+
+# a stage returning True stops the stages after it
+StageCallback = Callable[["MessageContext"], Coroutine[Any, Any, "bool | None"]]
+
+
+class MessageContext:
+    """
+    State shared by every stage processing a single message.
+
+    The guild config and the author's user row are loaded on first access and then reused,
+    so a message costs at most one lookup of each no matter how many stages (and the command) need them,
+    even if they ask at the same time.
+    """
+
+    __slots__ = ("bot", "message", "_guild", "_user")
+
+    def __init__(self, bot: Dwello, message: discord.Message) -> None:
+        self.bot: Dwello = bot
+        self.message: discord.Message = message
+        self._guild: asyncio.Future[Guild] | None = None
+        self._user: asyncio.Future[User] | None = None
+
+    def __repr__(self) -> str:
+        return f"<MessageContext message_id={self.message.id} author_id={self.message.author.id}>"
+
+    @property
+    def guild(self) -> discord.Guild | None:
+        return self.message.guild
+
+    @property
+    def author(self) -> discord.User | discord.Member:
+        return self.message.author
+
+    async def get_guild(self) -> Guild | None:
+        """Returns the guild config, or None in DMs."""
+
+        if self.message.guild is None:
+            return None
+        if self._guild is None or _failed(self._guild):
+            self._guild = asyncio.ensure_future(Guild.get(self.message.guild.id, self.bot))
+        # shielded, so a cancelled stage doesn't cancel the lookup for the others
+        return await asyncio.shield(self._guild)
+
+    async def get_user(self) -> User:
+        """Returns the author's user row, the locally kept one if they have xp waiting to be written."""
+
+        if self._user is None or _failed(self._user):
+            self._user = asyncio.ensure_future(self.bot.xp_accumulator.get_user(self.message.author.id))
+        return await asyncio.shield(self._user)
+
+
+def _failed(future: asyncio.Future[Any]) -> bool:
+    return future.done() and (future.cancelled() or future.exception() is not None)
+
+
+class MessagePipeline:
+    """
+    Runs every incoming message through an ordered list of stages, with one :class:`MessageContext` per message.
+
+    Stages are registered by name (usually from ``cog_load``) and run in :attr:`ORDER`, stages with other names
+    run after those, in the order they were added. A failing stage is logged and doesn't affect the others.
+    How long each stage takes is recorded in :attr:`timings`.
+    """
+
+    ORDER: ClassVar[tuple[str, ...]] = ("antispam", "xp", "link_preview", "mention_reply")
+
+    def __init__(self, bot: Dwello) -> None:
+        self.bot: Dwello = bot
+        self.stages: dict[str, StageCallback] = {}
+        self.timings: dict[str, LatencyHistogram] = {}
+        self._ordered: list[tuple[str, StageCallback]] = []
+        # messages being processed in the background, referenced so their tasks aren't garbage collected
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def add_stage(self, name: str, callback: StageCallback) -> None:
+        if name in self.stages:
+            raise ValueError(f"A stage named {name!r} is already registered")
+
+        self.stages[name] = callback
+        self.timings.setdefault(name, LatencyHistogram())
+        self._reorder()
+
+    def remove_stage(self, name: str) -> StageCallback | None:
+        callback = self.stages.pop(name, None)
+        self._reorder()
+        return callback
+
+    def _reorder(self) -> None:
+        rank = {name: index for index, name in enumerate(self.ORDER)}
+        # sorted() is stable, so unknown stages keep their insertion order
+        self._ordered = sorted(self.stages.items(), key=lambda item: rank.get(item[0], len(rank)))
+
+    def start(self, message: discord.Message) -> MessageContext:
+        """
+        Processes the message in the background and returns its context right away,
+        so commands share its lookups without waiting for the stages.
+        """
+
+        context = MessageContext(self.bot, message)
+        task = asyncio.create_task(self._run(context))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return context
+
+    async def process(self, message: discord.Message) -> MessageContext:
+        context = MessageContext(self.bot, message)
+        await self._run(context)
+        return context
+
+    async def _run(self, context: MessageContext) -> None:
+        message = context.message
+        for name, callback in self._ordered:
+            start = time.perf_counter()
+            try:
+                stop = await callback(context)
+            except Exception as e:
+                log.error("Message stage %s failed for message %s", name, message.id, exc_info=e)
+                stop = False
+            finally:
+                self.timings[name].observe(time.perf_counter() - start)
+
+            if stop:
+                break
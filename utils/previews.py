@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import discord
+
+from .botfuncs import extract_message_links
+from .cache import ExpiringCache
+from .dpy.embed import NewEmbed as Embed
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+    from .messages import CachedMessage
+
+# (channel_id, message_id)
+PreviewKey = tuple[int, int]
+
+
+class LinkPreviewer:
+    """
+    Turns discord message links into preview embeds, for guilds with ``turn_link_into_message`` enabled.
+
+    Rendered previews are cached by (channel_id, message_id) and invalidated on edit and delete events,
+    so a message that keeps getting linked is only fetched once. Up to :attr:`max_links` links of a message
+    are previewed (fetched concurrently, at most :attr:`per_guild` at a time for each guild) and sent together.
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance.
+    max_links: :class:`int`
+        Maximum amount of links previewed per message. (Default: 3)
+    per_guild: :class:`int`
+        Maximum amount of concurrent fetches per guild. (Default: 2)
+    ttl: :class:`float`
+        Seconds a rendered preview is kept for. (Default: 3600.0)
+    maxsize: :class:`int`
+        Maximum amount of rendered previews kept. (Default: 2048)
+    """
+
+    def __init__(
+        self,
+        bot: Dwello,
+        *,
+        max_links: int = 3,
+        per_guild: int = 2,
+        ttl: float = 3600.0,
+        maxsize: int = 2048,
+    ) -> None:
+        self.bot: Dwello = bot
+        self.max_links: int = max_links
+        self.per_guild: int = per_guild
+
+        # rendered embed and whether the linked message is in an nsfw channel
+        self.cache: ExpiringCache[PreviewKey, tuple[Embed, bool]] = ExpiringCache(ttl, maxsize=maxsize)
+        self._semaphores: dict[int, asyncio.Semaphore] = {}
+
+    def invalidate(self, channel_id: int, message_id: int) -> None:
+        self.cache.pop((channel_id, message_id), None)
+
+    @staticmethod
+    def render(message: CachedMessage) -> Embed:
+        content_preview = message.content[:300] + ('...' if len(message.content) > 300 else '')
+        return (
+            Embed(description=f"**Contents**\n{content_preview}")
+            .set_author(name=message.author_name, icon_url=message.author_avatar_url)
+            .add_field(name="Message", value=f"[Jump!](<{message.jump_url}>)")
+        )
+
+    async def get_preview(self, guild_id: int, channel_id: int, message_id: int) -> tuple[Embed, bool] | None:
+        key = (channel_id, message_id)
+        if (preview := self.cache.get(key)) is not None:
+            return preview
+
+        semaphore = self._semaphores.get(guild_id)
+        if semaphore is None:
+            semaphore = self._semaphores[guild_id] = asyncio.Semaphore(self.per_guild)
+
+        async with semaphore:
+            message = await self.bot.get_cached_message(channel_id, message_id)
+
+        # messages that couldn't be fetched aren't cached, the failure might be temporary
+        if message is None or not message.content:
+            return None
+
+        preview = self.cache[key] = (self.render(message), message.nsfw)
+        return preview
+
+    async def send_previews(self, message: discord.Message) -> discord.Message | None:
+        """Sends the previews of the links to messages of the same guild in ``message``, if there are any."""
+
+        assert message.guild is not None
+        links = [
+            (guild_id, channel_id, message_id)
+            for guild_id, channel_id, message_id in extract_message_links(message.content, limit=self.max_links)
+            if guild_id == message.guild.id
+        ]
+        if not links:
+            return None
+
+        previews = await asyncio.gather(*(self.get_preview(*link) for link in links))
+        nsfw_allowed = message.channel.is_nsfw()  # type: ignore
+        embeds = [embed for embed, nsfw in filter(None, previews) if not nsfw or nsfw_allowed]
+        if not embeds:
+            return None
+        return await message.channel.send(embeds=embeds)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Callable, Coroutine
+from datetime import datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING, Any
+
+import pytz
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+
+log = logging.getLogger(__name__)
+
+JobCallback = Callable[[], Coroutine[Any, Any, Any]]
+
+
+class ScheduledJob:
+    """
+    A coroutine function run every day at a wall-clock time or every ``interval``.
+
+    Parameters
+    ----------
+    name: :class:`str`
+        Unique name of the job, also the key its last run is persisted under.
+    callback: Callable[[], Coroutine]
+        The coroutine function to run.
+    at: :class:`datetime.time` | None
+        Time of day to run at, in ``tz``.
+    interval: :class:`datetime.timedelta` | None
+        Time between runs. Exactly one of ``at`` and ``interval`` has to be given.
+    tz: :class:`str`
+        Timezone name for ``at``. (Default: "UTC")
+    catch_up: :class:`bool`
+        Whether to run once right away if a run was missed while the bot was offline. (Default: True)
+    """
+
+    __slots__ = ("name", "callback", "at", "interval", "tz", "catch_up", "last_run", "next_run", "running")
+
+    def __init__(
+        self,
+        name: str,
+        callback: JobCallback,
+        *,
+        at: time | None = None,
+        interval: timedelta | None = None,
+        tz: str = "UTC",
+        catch_up: bool = True,
+    ) -> None:
+        if (at is None) is (interval is None):
+            raise ValueError("Exactly one of 'at' and 'interval' has to be given")
+
+        self.name: str = name
+        self.callback: JobCallback = callback
+        self.at: time | None = at
+        self.interval: timedelta | None = interval
+        self.tz = pytz.timezone(tz)
+        self.catch_up: bool = catch_up
+
+        self.last_run: datetime | None = None
+        self.next_run: datetime | None = None
+        self.running: bool = False
+
+    def __repr__(self) -> str:
+        return f"<ScheduledJob name={self.name!r} next_run={self.next_run}>"
+
+    def compute_next_run(self, after: datetime) -> datetime:
+        """Returns the first time after ``after`` (timezone-aware) this job is due."""
+
+        if self.interval is not None:
+            return after + self.interval
+
+        assert self.at is not None
+        day = after.astimezone(self.tz).date()
+        while True:
+            candidate = self.tz.localize(datetime.combine(day, self.at))
+            if candidate > after:
+                return candidate.astimezone(timezone.utc)
+            day += timedelta(days=1)
+
+    def schedule(self, now: datetime) -> None:
+        if self.last_run is None:
+            # never ran before: interval jobs start right away, daily ones wait for their time
+            self.next_run = now if self.interval is not None else self.compute_next_run(now)
+            return
+
+        due = self.compute_next_run(self.last_run)
+        self.next_run = due if due > now or self.catch_up else self.compute_next_run(now)
+
+
+class Scheduler:
+    """
+    Runs :class:`ScheduledJob`s from a single task that sleeps until the next one is due.
+
+    Last runs are kept in the ``scheduled_jobs`` table, so runs missed while the bot was offline
+    (or while a job was registered but not loaded) are caught up once after a restart.
+    """
+
+    # upper bound for a single sleep, so wall-clock jumps (suspend, ntp) are noticed eventually
+    MAX_SLEEP: float = 600.0
+    # delay before retrying to load the last runs, if that failed
+    LOAD_RETRY: float = 30.0
+
+    def __init__(self, bot: Dwello) -> None:
+        self.bot: Dwello = bot
+        self.jobs: dict[str, ScheduledJob] = {}
+
+        self._last_runs: dict[str, datetime] | None = None
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._running: set[asyncio.Task[None]] = set()
+
+    def add_job(self, job: ScheduledJob) -> ScheduledJob:
+        """Schedules the job, replacing a job of the same name (e.g. one left behind by a cog that is reloaded)."""
+
+        previous = self.jobs.get(job.name)
+        if previous is not None and previous.last_run is not None:
+            # newer than what was loaded if it ran since
+            job.last_run = previous.last_run
+        elif self._last_runs is not None:
+            job.last_run = self._last_runs.get(job.name)
+        self.jobs[job.name] = job
+        self._wakeup.set()
+        return job
+
+    def remove_job(self, name: str) -> ScheduledJob | None:
+        job = self.jobs.pop(name, None)
+        self._wakeup.set()
+        return job
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _load(self) -> None:
+        async with self.bot.safe_connection(transaction=False) as conn:
+            records = await conn.fetch("SELECT name, last_run FROM scheduled_jobs")
+
+        self._last_runs = {record["name"]: record["last_run"] for record in records}
+        for job in self.jobs.values():
+            job.last_run = self._last_runs.get(job.name)
+
+    async def _persist(self, job: ScheduledJob) -> None:
+        async with self.bot.safe_connection(transaction=False) as conn:
+            await conn.execute(
+                """
+                INSERT INTO scheduled_jobs (name, last_run) VALUES ($1, $2)
+                ON CONFLICT (name) DO UPDATE SET last_run = excluded.last_run
+                """,
+                job.name,
+                job.last_run,
+            )
+
+    async def _run(self) -> None:
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self._load()
+            except Exception as e:
+                log.error("Failed to load the last runs of scheduled jobs, retrying in %.0fs", self.LOAD_RETRY, exc_info=e)
+                await asyncio.sleep(self.LOAD_RETRY)
+            else:
+                break
+
+        while True:
+            self._wakeup.clear()
+            now = datetime.now(timezone.utc)
+
+            upcoming: datetime | None = None
+            for job in list(self.jobs.values()):
+                if job.running:
+                    continue
+                if job.next_run is None:
+                    job.schedule(now)
+                assert job.next_run is not None
+
+                if job.next_run <= now:
+                    self._start_job(job)
+                elif upcoming is None or job.next_run < upcoming:
+                    upcoming = job.next_run
+
+            timeout = self.MAX_SLEEP
+            if upcoming is not None:
+                timeout = min(max((upcoming - now).total_seconds(), 0.0), self.MAX_SLEEP)
+
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+
+    def _start_job(self, job: ScheduledJob) -> None:
+        job.running = True
+        task = asyncio.create_task(self._execute(job))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: ScheduledJob) -> None:
+        started = datetime.now(timezone.utc)
+        try:
+            await job.callback()
+        except Exception as e:
+            # last_run is left as is, so a failed run is retried after a restart
+            log.error("Scheduled job %s failed", job.name, exc_info=e)
+        else:
+            job.last_run = started
+            try:
+                await self._persist(job)
+            except Exception as e:
+                log.error("Failed to persist the last run of %s", job.name, exc_info=e)
+        finally:
+            job.running = False
+            job.next_run = job.compute_next_run(started)
+            self._wakeup.set()
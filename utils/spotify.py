@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import TYPE_CHECKING, Any
+
+from .cache import Strategy, cache
+
+if TYPE_CHECKING:
+    from core import Dwello
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+
+
+class SpotifyFetcher:
+    """
+    Fetches what the spotify commands show besides the search results: the tracks of albums and the albums
+    and top tracks of artists.
+
+    Requests go to the Web API with the bot's spotify token (retried once with a new one if it got rejected),
+    at most ``concurrency`` at a time. Results are cached by id for an hour, and concurrent requests for the
+    same id share one request. The methods return tasks that are already running, so the follow-ups of every
+    search result can be started at once and awaited by the page that shows them.
+
+    Parameters
+    ----------
+    bot: :class:`Dwello`
+        The bot instance.
+    concurrency: :class:`int`
+        Maximum amount of concurrent requests. (Default: 4)
+    """
+
+    def __init__(self, bot: Dwello, *, concurrency: int = 4) -> None:
+        self.bot: Dwello = bot
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def _request(self, path: str, params: dict[str, Any], access_token: str) -> dict[str, Any]:
+        async with self.bot.http_session.get(
+            f"{SPOTIFY_API_URL}{path}", params=params, headers={"Authorization": f"Bearer {access_token}"},
+        ) as response:
+            # a 401 raises ClientResponseError with that status, which the token manager retries
+            response.raise_for_status()
+            return await response.json()
+
+    async def get(self, path: str, **params: Any) -> dict[str, Any]:
+        async with self._semaphore:
+            return await self.bot.tokens.call("spotify", functools.partial(self._request, path, params))
+
+    @cache(maxsize=512, strategy=Strategy.timed, ttl=3600.0)
+    async def album_tracks(self, album_id: str) -> list[dict[str, Any]]:
+        return (await self.get(f"/albums/{album_id}/tracks", market="US", limit=5))["items"]
+
+    @cache(maxsize=512, strategy=Strategy.timed, ttl=3600.0)
+    async def artist_albums(self, artist_id: str) -> list[dict[str, Any]]:
+        return (await self.get(f"/artists/{artist_id}/albums", include_groups="album", market="US", limit=5))["items"]
+
+    @cache(maxsize=512, strategy=Strategy.timed, ttl=3600.0)
+    async def artist_top_tracks(self, artist_id: str) -> list[dict[str, Any]]:
+        return (await self.get(f"/artists/{artist_id}/top-tracks", market="US"))["tracks"]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, TypeVar
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+log = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# fetches a new token, returns it and the seconds it's valid for
+TokenFetcher = Callable[["ClientSession"], Awaitable[tuple[str, float]]]
+
+
+def client_credentials(url: str, client_id: str, client_secret: str, *, basic_auth: bool = False) -> TokenFetcher:
+    """
+    Returns a fetcher of OAuth client credentials tokens from ``url``.
+
+    The credentials are sent in the body (Twitch) or, with ``basic_auth``, as basic auth (Spotify).
+    """
+
+    async def fetch(session: ClientSession) -> tuple[str, float]:
+        data = {"grant_type": "client_credentials"}
+        auth = None
+        if basic_auth:
+            auth = aiohttp.BasicAuth(client_id, client_secret)
+        else:
+            data.update(client_id=client_id, client_secret=client_secret)
+
+        async with session.post(url, data=data, auth=auth) as response:
+            response.raise_for_status()
+            keys = await response.json()
+        return keys["access_token"], float(keys.get("expires_in", 3600))
+
+    return fetch
+
+
+class AccessToken:
+    __slots__ = ("value", "expires_at", "refresh_at")
+
+    def __init__(self, value: str, expires_at: float, refresh_at: float) -> None:
+        self.value: str = value
+        # monotonic times
+        self.expires_at: float = expires_at
+        self.refresh_at: float = refresh_at
+
+    def __repr__(self) -> str:
+        return f"<AccessToken expires_in={self.expires_at - time.monotonic():.0f}>"
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class TokenManager:
+    """
+    Keeps the OAuth tokens of every provider fresh.
+
+    Tokens are fetched when :meth:`start` is called and refreshed in the background ``margin`` seconds
+    (at most a tenth of their lifetime) before they expire, so commands don't wait for a token and an expired
+    token doesn't stay around until a restart. Concurrent refreshes of a provider share one request.
+    :meth:`call` retries a request once with a new token if the API rejected the old one with a 401.
+
+    Parameters
+    ----------
+    session: :class:`aiohttp.ClientSession`
+        The session tokens are fetched with.
+    margin: :class:`float`
+        Seconds before expiry tokens are refreshed at. (Default: 300.0)
+    retry_after: :class:`float`
+        Seconds between attempts after a refresh failed. (Default: 30.0)
+    """
+
+    def __init__(self, session: ClientSession, *, margin: float = 300.0, retry_after: float = 30.0) -> None:
+        self.session: ClientSession = session
+        self.margin: float = margin
+        self.retry_after: float = retry_after
+
+        self._fetchers: dict[str, TokenFetcher] = {}
+        self._tokens: dict[str, AccessToken] = {}
+        self._refreshing: dict[str, asyncio.Task[str]] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def add_provider(self, name: str, fetch: TokenFetcher) -> None:
+        self._fetchers[name] = fetch
+
+    def start(self) -> None:
+        for name in self._fetchers:
+            if (task := self._tasks.get(name)) is None or task.done():
+                self._tasks[name] = asyncio.create_task(self._keep_fresh(name))
+
+    def close(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def _keep_fresh(self, name: str) -> None:
+        while True:
+            if (token := self._tokens.get(name)) is not None:
+                await asyncio.sleep(max(token.refresh_at - time.monotonic(), 0.0))
+            try:
+                await self.refresh(name)
+            except Exception as e:
+                log.warning("Failed to refresh the %s token, retrying in %ss", name, self.retry_after, exc_info=e)
+                await asyncio.sleep(self.retry_after)
+
+    async def _fetch(self, name: str) -> str:
+        try:
+            value, expires_in = await self._fetchers[name](self.session)
+        finally:
+            self._refreshing.pop(name, None)
+
+        now = time.monotonic()
+        self._tokens[name] = AccessToken(value, now + expires_in, now + expires_in - min(self.margin, expires_in / 10))
+        return value
+
+    async def refresh(self, name: str) -> str:
+        """Fetches a new token, or waits for the refresh already running."""
+
+        task = self._refreshing.get(name)
+        if task is None:
+            task = self._refreshing[name] = asyncio.create_task(self._fetch(name))
+        # shielded, so one cancelled caller doesn't cancel the refresh for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    def current(self, name: str) -> str | None:
+        """The cached token, None if there is none or it expired."""
+
+        token = self._tokens.get(name)
+        return None if token is None or token.expired else token.value
+
+    async def get(self, name: str) -> str:
+        if (value := self.current(name)) is not None:
+            return value
+        return await self.refresh(name)
+
+    def invalidate(self, name: str, value: str) -> None:
+        """Drops the token, unless it was replaced already (by a request that got a 401 before)."""
+
+        if (token := self._tokens.get(name)) is not None and token.value == value:
+            del self._tokens[name]
+
+    async def call(self, name: str, func: Callable[[str], Awaitable[R]]) -> R:
+        """
+        Calls ``func`` with the provider's token, and once more with a new token if the first one got a 401.
+
+        A 401 is either a result or an exception with a ``status`` of 401 (like aiohttp's responses and errors).
+        """
+
+        value = await self.get(name)
+        try:
+            result = await func(value)
+        except Exception as e:
+            if getattr(e, "status", None) != 401:
+                raise
+        else:
+            if getattr(result, "status", None) != 401:
+                return result
+
+        log.info("The %s token was rejected, retrying with a new one", name)
+        self.invalidate(name, value)
+        return await func(await self.get(name))
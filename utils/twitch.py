@@ -3,7 +3,6 @@ from __future__ import annotations
 import os  # noqa: F401
 from typing import TYPE_CHECKING, Any, Literal
 
-import aiohttp
 import asyncpg
 import discord
 from typing_extensions import Self
@@ -11,6 +10,8 @@ from typing_extensions import Self
 import constants as cs
 from utils import ENV
 
+from .database.orm import Guild
+
 if TYPE_CHECKING:
     from core import Context, Dwello
 
@@ -20,43 +21,41 @@ CLIENT_SECRET = ENV["TWITCH_CLIENT_SECRET"]
 HELIX_URL = "https://api.twitch.tv/helix/eventsub/subscriptions"
 
 
-async def get_access_token(bot: Dwello):
-    body = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials",
-    }
-    request: aiohttp.ClientResponse = await bot.http_session.post("https://id.twitch.tv/oauth2/token", data=body)
-    keys = await request.json()
-    keys["expires_in"]
-
-    return keys["access_token"]
-
-
 class Twitch:
-    # FIX ACCESS TOKEN ISSUE. CREATE LOOP BASED ON EXPIRATION DATE AND REQUEST NEW ONE WHENEVER ONE EXPIRES
-    def __init__(self, access_token: str, bot: Dwello) -> None:
+    def __init__(self, bot: Dwello) -> None:
         self.bot = bot
         self.session = bot.http_session
-        self.access_token = access_token
-
-    @classmethod
-    async def create_access_token(cls: type[Self], bot: Dwello) -> Self:
-        access_token = await get_access_token(bot)
-        return cls(access_token, bot)
 
     @property
-    def headers(self: Self) -> dict[str, Any]:
+    def access_token(self) -> str | None:
+        # kept fresh by the bot's token manager
+        return self.bot.tokens.current("twitch")
+
+    @staticmethod
+    def headers(access_token: str) -> dict[str, Any]:
         return {
             "Client-ID": CLIENT_ID,
-            "Authorization": f"Bearer {self.access_token}",
+            "Authorization": f"Bearer {access_token}",
         }
 
-    async def username_to_id(self, username: str) -> str | None:
-        url = f"https://api.twitch.tv/helix/users?login={username.lower()}"
+    async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """
+        Sends a Helix request with the managed token (waiting for one if there is none yet, and retrying once with
+        a new one if it got a 401) and returns the JSON it responded with, None if there was none.
+        """
+
+        async def send(access_token: str) -> Any:
+            async with self.session.request(method, url, headers=self.headers(access_token), **kwargs) as response:
+                # errors (a 401 included, which the token manager retries) raise ClientResponseError
+                response.raise_for_status()
+                if response.content_type != "application/json":
+                    return None
+                return await response.json()
 
-        response: aiohttp.ClientResponse = await self.session.get(url, headers=self.headers)
-        data = await response.json()
+        return await self.bot.tokens.call("twitch", send)
+
+    async def username_to_id(self, username: str) -> str | None:
+        data = await self.request("GET", "https://api.twitch.tv/helix/users", params={"login": username.lower()})
 
         if "data" not in data or len(data["data"]) <= 0:
             raise Exception(f"Could not find user {username}")  # incorrect check ?
@@ -67,10 +66,7 @@ class Twitch:
         return _user_id
 
     async def id_to_username(self, user_id: int) -> str | None:
-        url = f"https://api.twitch.tv/helix/users?id={user_id}"
-
-        response: aiohttp.ClientResponse = await self.session.get(url, headers=self.headers)
-        data = await response.json()
+        data = await self.request("GET", "https://api.twitch.tv/helix/users", params={"id": user_id})
 
         # The Twitch username to subscribe to
         if "data" in data and len(data["data"]) > 0:
@@ -85,8 +81,6 @@ class Twitch:
         async with self.bot.pool.acquire() as conn:
             conn: asyncpg.Connection
             async with conn.transaction():
-                session = self.bot.http_session
-
                 try:
                     user_id = await self.username_to_id(username)
 
@@ -101,7 +95,7 @@ class Twitch:
                 broadcaster_check_dict = {}
 
                 # List of subscriptions
-                response_ = session.get(HELIX_URL, headers=self.headers).json()
+                response_ = await self.request("GET", HELIX_URL)
 
                 # FIX THE CHECK
                 for i in response_["data"]:
@@ -142,14 +136,7 @@ class Twitch:
                 }
 
                 # Send the API request to create the subscription
-
-                headers = {
-                    "Client-ID": CLIENT_ID,
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/json",
-                }
-
-                response = session.post(HELIX_URL, headers=headers, json=body)
+                response = await self.request("POST", HELIX_URL, json=body)
 
                 # add some extra checks here
                 # one user now; update later
@@ -162,10 +149,11 @@ class Twitch:
                 # await conn.execute("UPDATE server_data SET twitch_id = $1 WHERE guild_id = $2 AND event_type = 'twitch'", user_id, ctx.guild.id)  # noqa: E501
                 # Print the response to confirm whether the subscription was created successfully or not
 
+        Guild.cache.invalidate(ctx.guild.id)
         await self.bot.db.fetch_table_data("twitch_users")
         return (
             await ctx.reply(f"Added **{username}** to twitch notifications list.", ephemeral=True),
-            response.json(),
+            response,
         )
 
         # type_ = stream.online
@@ -207,9 +195,7 @@ class Twitch:
         async with self.bot.pool.acquire() as conn:
             conn: asyncpg.Connection
             async with conn.transaction():
-                session = self.bot.http_session
-
-                response = session.get(HELIX_URL, headers=self.headers).json()
+                response = await self.request("GET", HELIX_URL)
 
                 if not response["data"]:
                     return await ctx.reply(
@@ -227,7 +213,7 @@ class Twitch:
                     url = f"https://api.twitch.tv/helix/eventsub/subscriptions?id={subscription_id}"
 
                     if username == "all":
-                        response = session.delete(url, headers=self.headers)
+                        await self.request("DELETE", url)
                         if not done:
                             await conn.execute(
                                 "DELETE FROM twitch_users WHERE guild_id = $1",
@@ -246,7 +232,7 @@ class Twitch:
                         )
 
                         if user_id and broadcaster_id == user_id:
-                            response = session.delete(url, headers=self.headers)
+                            await self.request("DELETE", url)
                             await conn.execute(
                                 "DELETE FROM twitch_users WHERE user_id = $1 AND guild_id = $2",
                                 user_id,
@@ -254,6 +240,7 @@ class Twitch:
                             )
                             break
 
+        Guild.cache.invalidate(ctx.guild.id)
         await self.bot.db.fetch_table_data("twitch_users")
         return await ctx.reply(
             f"Unsubscribed from {f'{count} streamer(s)' if count != 0 else username}.",
@@ -309,8 +296,7 @@ class Twitch:
     async def event_subscription_list(
         self,
     ):  # RETURNS ALL SUBSCRIPTIONS FOR A CERTAIN CLIENT_ID (?)
-        response: aiohttp.ClientResponse = await self.session.get(HELIX_URL, headers=self.headers)
-        data = await response.json()
+        data = await self.request("GET", HELIX_URL)
 
         # return data['data'] -> make it a property?
 
@@ -318,12 +304,11 @@ class Twitch:
         for i in data["data"]:
             print(i["condition"]["broadcaster_user_id"])
             print(i["type"])
-        print(response["data"])
+        print(data["data"])
 
     # UNSUBSCRIBE FROM ALL (OWNER)
     async def unsubscribe_from_all_eventsubs(self: Self):
-        response: aiohttp.ClientResponse = await self.session.get(HELIX_URL, headers=self.headers)
-        response.json()
+        response = await self.request("GET", HELIX_URL)
 
         count = 0
         if not response["data"]:
@@ -333,7 +318,7 @@ class Twitch:
         for subscription in response["data"]:
             subscription_id = subscription["id"]
             url = f"https://api.twitch.tv/helix/eventsub/subscriptions?id={subscription_id}"
-            response = self.bot.http_session.delete(url, headers=self.headers)
+            await self.request("DELETE", url)
             count += 1
 
         print(f"Unsubscribed from {count} event(s).")